@@ -0,0 +1,112 @@
+# app/analytics/cost_guard.py
+"""
+Query cost guard: pooled connection-ийг удаан query барьж бусдыг блоклохоос сэргийлнэ.
+
+- calc бүрийн statement_timeout (SET LOCAL, query-ийн transaction дотор л үйлчилнэ)
+  STATEMENT_TIMEOUT_MS (default) + STATEMENT_TIMEOUTS="timeseries_month:30000,yoy:10000"
+- QUERY_MAX_COST > 0 бол ажиллуулахаас өмнө EXPLAIN (FORMAT JSON)-ийн Total Cost-ийг шалгана
+- хэт үнэтэй / timeout → QueryRejected (chat нь "он/улсаа нарийсгана уу" clarification буцаана)
+
+Шийдвэр бүр (allowed/too_expensive/timeout) trade_query_guard_total-д, chat-ийн query log-д
+"guard" талбараар орно.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.analytics.metrics import registry
+from app.analytics.slow_query import execute_rows
+from app.core.config import settings
+from app.core.database import LazySession
+
+QUERY_GUARD = registry.counter(
+    "trade_query_guard_total", "Cost guard decisions by calc (allowed/too_expensive/timeout)", ("decision", "calc")
+)
+
+# Postgres query_canceled (statement_timeout)
+_TIMEOUT_SQLSTATE = "57014"
+
+
+class QueryRejected(Exception):
+    def __init__(self, reason: str, decision: Dict[str, Any]):
+        super().__init__(reason)
+        self.reason = reason
+        self.decision = decision
+
+
+def _parse_ms_map(raw: str) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for part in (raw or "").split(","):
+        calc, _, ms = part.strip().partition(":")
+        try:
+            out[calc.strip()] = int(ms)
+        except ValueError:
+            continue
+    return out
+
+
+calc_timeouts = _parse_ms_map(settings.statement_timeouts)
+
+
+def timeout_for(calc: Optional[str]) -> int:
+    return calc_timeouts.get(str(calc), settings.statement_timeout_ms)
+
+
+async def estimate_cost(db: LazySession, sql: Any, params: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    """
+    Planner-ийн тооцоо (query ажиллуулахгүй). Уншиж чадахгүй бол None → guard алгасна.
+    """
+    try:
+        r = await db.execute(text("EXPLAIN (FORMAT JSON) " + str(getattr(sql, "text", sql))), params)
+        raw = r.all()[0][0]
+        doc = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        plan = doc[0]["Plan"]
+        return {"cost": float(plan["Total Cost"]), "plan_rows": float(plan["Plan Rows"])}
+    except Exception:
+        return None
+
+
+def is_timeout(e: BaseException) -> bool:
+    orig = getattr(e, "orig", None) or e
+    if getattr(orig, "sqlstate", None) == _TIMEOUT_SQLSTATE or getattr(orig, "pgcode", None) == _TIMEOUT_SQLSTATE:
+        return True
+    return "statement timeout" in str(e)
+
+
+def _decide(decision: Dict[str, Any], outcome: str) -> Dict[str, Any]:
+    decision["decision"] = outcome
+    QUERY_GUARD.inc(decision=outcome, calc=str(decision.get("calc")))
+    return decision
+
+
+async def guarded_rows(
+    db: LazySession,
+    sql: Any,
+    params: Dict[str, Any],
+    sql_meta: Dict[str, Any],
+    limit: int = 500,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    (rows, decision). Хэт үнэтэй эсвэл timeout бол QueryRejected.
+    """
+    calc = sql_meta.get("calc")
+    decision: Dict[str, Any] = {"calc": calc, "view": sql_meta.get("view"), "timeout_ms": timeout_for(calc)}
+
+    if settings.query_max_cost > 0:
+        est = await estimate_cost(db, sql, params)
+        if est is not None:
+            decision.update(est)
+            if est["cost"] > settings.query_max_cost:
+                decision["max_cost"] = settings.query_max_cost
+                raise QueryRejected("too_expensive", _decide(decision, "too_expensive"))
+
+    try:
+        rows = await execute_rows(db, sql, params, sql_meta, limit=limit, timeout_ms=decision["timeout_ms"])
+    except Exception as e:
+        if is_timeout(e):
+            raise QueryRejected("timeout", _decide(decision, "timeout")) from e
+        raise
+    return rows, _decide(decision, "allowed")
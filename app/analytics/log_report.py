@@ -0,0 +1,393 @@
+# app/analytics/log_report.py
+"""
+Query log analytics (capacity planning).
+
+QUERY_LOG_PATH (default logs/query_log.jsonl) + rotated <stem>.*.jsonl.gz-ийг урсгалаар (constant memory) уншаад:
+- хамгийн их асуугддаг intent / view (top-k, space-saving)
+- calc төрлийн тархалт, no_data rate
+- result cache байсан бол хэдийг хэмнэх байсан (time window доторх давталт)
+
+Run:
+  python -m app.analytics.log_report [logs/] [--window 3600] [--top 15] [--json]   # path-гүй бол QUERY_LOG_PATH
+  python -m app.analytics.log_report logs/ --compact logs/query_log.parquet
+  python -m app.analytics.log_report logs/query_log.parquet      # compacted файлаас хурдан
+
+Parquet (compact) нь pyarrow шаардана (optional).
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import heapq
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+LOG_STEM = "query_log"
+
+
+# -------- input --------
+
+def default_log_path() -> Path:
+    """
+    App-ийн бичдэг query log (settings.query_log_path). DATABASE_URL-гүй (analyst) машин дээр
+    settings validate алдаа өгөх тул QUERY_LOG_PATH env-ээс шууд.
+    """
+    try:
+        from app.core.config import settings
+
+        return Path(settings.query_log_path)
+    except RuntimeError:
+        return Path(os.getenv("QUERY_LOG_PATH", "logs/query_log.jsonl").strip())
+
+
+def log_files(path: Path, stem: str = LOG_STEM) -> List[Path]:
+    """
+    Directory → rotated (.jsonl.gz, хугацааны дарааллаар) + идэвхтэй .jsonl
+    """
+    if path.is_file():
+        return [path]
+    rotated = sorted(path.glob(f"{stem}.*.jsonl.gz"))
+    current = path / f"{stem}.jsonl"
+    return rotated + ([current] if current.exists() else [])
+
+
+def iter_events(files: Iterable[Path]) -> Iterator[Dict[str, Any]]:
+    for f in files:
+        if f.suffix == ".parquet":
+            yield from _iter_parquet(f)
+            continue
+
+        opener = gzip.open if f.suffix == ".gz" else open
+        with opener(f, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _iter_parquet(path: Path) -> Iterator[Dict[str, Any]]:
+    pq = _pyarrow_parquet()
+    for batch in pq.ParquetFile(str(path)).iter_batches(batch_size=10_000):
+        for row in batch.to_pylist():
+            row["intent_key"] = row.get("intent_key") or ""
+            yield row
+
+
+def _pyarrow_parquet():
+    try:
+        import pyarrow.parquet as pq  # type: ignore
+    except Exception:
+        raise SystemExit("Parquet дэмжлэгт pyarrow хэрэгтэй: pip install pyarrow")
+    return pq
+
+
+def intent_key(event: Dict[str, Any]) -> str:
+    if event.get("intent_key"):
+        return str(event["intent_key"])
+    return json.dumps(event.get("intent") or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+# -------- constant-memory aggregators --------
+
+class SpaceSaving:
+    """
+    Top-k heavy hitters (Metwally et al.): хамгийн ихдээ `capacity` түлхүүр хадгална.
+
+    Хамгийн бага count-ийг min-heap-ээс авна (түлхүүр бүр heap-д нэг entry). Increment нь
+    heap-ийг шинэчлэхгүй — eviction үед орой дээрх хуучирсан entry-г одоогийн count-оор нь
+    буцааж оруулна (count зөвхөн өсдөг тул зөв) → event бүр amortized O(log capacity).
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self._heap: List[Tuple[int, int, str]] = []  # (count, seq, key); count нь хуучирсан байж болно
+        self._seq = 0
+
+    def _entry(self, key: str) -> Tuple[int, int, str]:
+        self._seq += 1
+        return (self.counts[key], self._seq, key)
+
+    def add(self, key: str) -> None:
+        if key in self.counts:
+            self.counts[key] += 1
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = 1
+            heapq.heappush(self._heap, self._entry(key))
+        else:
+            while True:
+                count, _, victim = self._heap[0]
+                if self.counts[victim] == count:
+                    break
+                heapq.heapreplace(self._heap, self._entry(victim))
+            self.counts[key] = self.counts.pop(victim) + 1
+            heapq.heapreplace(self._heap, self._entry(key))
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda kv: -kv[1])[:k]
+
+
+class RepeatWindows:
+    """
+    Time window (жишээ нь 1 цаг) бүрт ижил (intent, view, calc) дахин асуугдсан эсэх.
+    Нэг window-ийн түлхүүрүүд л санах ойд байна (max_keys-ээр хязгаарлагдана).
+    """
+
+    def __init__(self, window_seconds: int = 3600, max_keys: int = 100_000):
+        self.window = max(1, window_seconds)
+        self.max_keys = max_keys
+        self._current: Optional[int] = None
+        self._seen: set = set()
+        self._n = 0
+        self._rep = 0
+
+        self.total = 0
+        self.repeats = 0
+        self.saved_db_ms = 0.0
+        self.windows = 0
+        self.ratio_min = 1.0
+        self.ratio_max = 0.0
+        self.ratio_hist = [0] * 10  # 0-10%, 10-20%, ...
+
+    def _close_window(self) -> None:
+        if self._n:
+            r = self._rep / self._n
+            self.windows += 1
+            self.ratio_min = min(self.ratio_min, r)
+            self.ratio_max = max(self.ratio_max, r)
+            self.ratio_hist[min(9, int(r * 10))] += 1
+        self._seen.clear()
+        self._n = self._rep = 0
+
+    def add(self, ts: int, key: str, db_ms: float) -> None:
+        w = int(ts) // self.window
+        if self._current is None or w != self._current:
+            self._close_window()
+            self._current = w
+
+        self._n += 1
+        self.total += 1
+        if key in self._seen:
+            self._rep += 1
+            self.repeats += 1
+            self.saved_db_ms += db_ms
+        elif len(self._seen) < self.max_keys:
+            self._seen.add(key)
+
+    def finish(self) -> None:
+        self._close_window()
+
+
+# -------- report --------
+
+def analyze(events: Iterable[Dict[str, Any]], window_seconds: int = 3600, top: int = 15) -> Dict[str, Any]:
+    intents = SpaceSaving()
+    views: Counter = Counter()
+    calcs: Counter = Counter()
+    no_data: Counter = Counter()
+    caches: Counter = Counter()
+    repeats = RepeatWindows(window_seconds)
+    dropped = 0
+    n = 0
+    ts_min: Optional[int] = None
+    ts_max: Optional[int] = None
+
+    for ev in events:
+        if ev.get("event") == "query_log_dropped":
+            dropped += int(ev.get("dropped") or 0)
+            continue
+        if ev.get("event"):
+            continue
+
+        n += 1
+        ts = int(ev.get("ts") or 0)
+        ts_min = ts if ts_min is None else min(ts_min, ts)
+        ts_max = ts if ts_max is None else max(ts_max, ts)
+
+        key = intent_key(ev)
+        calc = str(ev.get("calc") or "unknown")
+        view = str(ev.get("view") or "unknown")
+
+        intents.add(key)
+        views[view] += 1
+        calcs[calc] += 1
+        if ev.get("status") == "no_data":
+            no_data[calc] += 1
+        if ev.get("cache"):
+            caches[str(ev["cache"])] += 1
+
+        timings = ev.get("timings_ms") or {}
+        db_ms = float(timings.get("db.execute") or ev.get("db_ms") or 0.0)
+        repeats.add(ts, f"{key}|{view}|{calc}", db_ms)
+
+    repeats.finish()
+
+    return {
+        "events": n,
+        "ts_range": [ts_min, ts_max],
+        "dropped_events": dropped,
+        "top_intents": [{"intent": k, "count": c} for k, c in intents.top(top)],
+        "views": dict(views.most_common()),
+        "calcs": dict(calcs.most_common()),
+        "no_data_rate": {
+            "overall": (sum(no_data.values()) / n) if n else 0.0,
+            "by_calc": {c: no_data[c] / calcs[c] for c in calcs if calcs[c]},
+        },
+        "served_from_cache": dict(caches),
+        "result_cache_potential": {
+            "window_seconds": repeats.window,
+            "repeat_ratio": (repeats.repeats / repeats.total) if repeats.total else 0.0,
+            "queries_saved": repeats.repeats,
+            "db_ms_saved": round(repeats.saved_db_ms, 1),
+            "windows": repeats.windows,
+            "window_ratio_min": repeats.ratio_min if repeats.windows else 0.0,
+            "window_ratio_max": repeats.ratio_max,
+            "window_ratio_hist": repeats.ratio_hist,
+        },
+    }
+
+
+def _print_report(rep: Dict[str, Any]) -> None:
+    n = rep["events"]
+    print(f"events: {n}   dropped: {rep['dropped_events']}   ts: {rep['ts_range'][0]} .. {rep['ts_range'][1]}")
+
+    print("\nTop intents:")
+    for item in rep["top_intents"]:
+        print(f"  {item['count']:>7}  {item['intent']}")
+
+    print("\nViews:")
+    for v, c in rep["views"].items():
+        print(f"  {c:>7}  {v}")
+
+    print("\nCalc distribution (no_data rate):")
+    by_calc = rep["no_data_rate"]["by_calc"]
+    for calc, c in rep["calcs"].items():
+        share = c / n if n else 0.0
+        print(f"  {c:>7}  {share:6.1%}  {calc:<18} no_data={by_calc.get(calc, 0.0):.1%}")
+    print(f"  overall no_data rate: {rep['no_data_rate']['overall']:.1%}")
+
+    if rep["served_from_cache"]:
+        print("\nAlready served from cache:", rep["served_from_cache"])
+
+    pot = rep["result_cache_potential"]
+    print(f"\nResult cache potential (window={pot['window_seconds']}s):")
+    print(f"  repeat ratio: {pot['repeat_ratio']:.1%}  queries saved: {pot['queries_saved']}  db ms saved: {pot['db_ms_saved']}")
+    print(f"  windows: {pot['windows']}  per-window ratio min/max: {pot['window_ratio_min']:.1%} / {pot['window_ratio_max']:.1%}")
+    print(f"  per-window ratio histogram (10% buckets): {pot['window_ratio_hist']}")
+
+
+# -------- compaction --------
+
+COMPACT_COLUMNS = (
+    "ts", "question", "intent_key", "view", "view_type", "calc", "status", "row_count", "cache", "total_ms", "db_ms",
+    "event", "dropped",
+)
+
+
+def compact(events: Iterable[Dict[str, Any]], out: Path, batch_rows: int = 50_000) -> int:
+    """
+    JSONL → Parquet (row group-оор урсгаж бичнэ, constant memory).
+    query_log_dropped event-үүд event/dropped баганатай мөр болж үлдэнэ (report-ийн dropped тоо).
+    Буцаах утга: бичсэн query event-ийн тоо.
+    """
+    pq = _pyarrow_parquet()
+    import pyarrow as pa  # type: ignore
+
+    schema = pa.schema([
+        ("ts", pa.int64()),
+        ("question", pa.string()),
+        ("intent_key", pa.string()),
+        ("view", pa.string()),
+        ("view_type", pa.string()),
+        ("calc", pa.string()),
+        ("status", pa.string()),
+        ("row_count", pa.int32()),
+        ("cache", pa.string()),
+        ("total_ms", pa.float64()),
+        ("db_ms", pa.float64()),
+        ("event", pa.string()),
+        ("dropped", pa.int64()),
+    ])
+
+    cols: Dict[str, List[Any]] = {c: [] for c in COMPACT_COLUMNS}
+    written = 0
+    with pq.ParquetWriter(str(out), schema, compression="zstd") as w:
+        def flush() -> None:
+            if cols["ts"]:
+                w.write_table(pa.table(cols, schema=schema))
+                for v in cols.values():
+                    v.clear()
+
+        def row(values: Dict[str, Any]) -> None:
+            for c in COMPACT_COLUMNS:
+                cols[c].append(values.get(c))
+            if len(cols["ts"]) >= batch_rows:
+                flush()
+
+        for ev in events:
+            if ev.get("event") == "query_log_dropped":
+                row({"ts": int(ev.get("ts") or 0), "event": ev["event"], "dropped": int(ev.get("dropped") or 0)})
+                continue
+            if ev.get("event"):
+                continue
+            timings = ev.get("timings_ms") or {}
+            row({
+                "ts": int(ev.get("ts") or 0),
+                "question": ev.get("question"),
+                "intent_key": intent_key(ev),
+                "view": ev.get("view"),
+                "view_type": ev.get("view_type"),
+                "calc": ev.get("calc"),
+                "status": ev.get("status"),
+                "row_count": ev.get("row_count"),
+                "cache": ev.get("cache"),
+                "total_ms": timings.get("total"),
+                "db_ms": timings.get("db.execute") if timings else ev.get("db_ms"),
+            })
+            written += 1
+        flush()
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Query log analytics for capacity planning")
+    ap.add_argument("paths", nargs="*", help="log directory, .jsonl/.jsonl.gz эсвэл .parquet (default: QUERY_LOG_PATH)")
+    ap.add_argument("--window", type=int, default=3600, help="repeat window (seconds)")
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--json", action="store_true", help="JSON гаралт")
+    ap.add_argument("--compact", metavar="OUT.parquet", help="логуудыг columnar Parquet болгон хадгална")
+    args = ap.parse_args(argv)
+
+    files: List[Path] = []
+    for p in args.paths:
+        files.extend(log_files(Path(p)))
+    if not args.paths:
+        current = default_log_path()
+        files = log_files(current.parent, current.stem)
+    if not files:
+        print("log файл олдсонгүй", file=sys.stderr)
+        return 1
+
+    if args.compact:
+        n = compact(iter_events(files), Path(args.compact))
+        print(f"compacted {n} events → {args.compact}")
+        return 0
+
+    rep = analyze(iter_events(files), window_seconds=args.window, top=args.top)
+    if args.json:
+        print(json.dumps(rep, ensure_ascii=False, indent=2))
+    else:
+        _print_report(rep)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,185 @@
+# app/analytics/metrics.py
+"""
+Prometheus text exposition (0.0.4) — гадны dependency-гүй, хамгийн бага хэрэгцээтэй хэсэг:
+Counter / Histogram / callback Gauge (scrape үед утгаа уншина).
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+LabelValues = Tuple[str, ...]
+GaugeSample = Union[float, int, Iterable[Tuple[Dict[str, str], float]]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels.get(n, "")) for n in self.labels), 0.0)
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, v in sorted(self._values.items()):
+            out.append(f"{self.name}{_fmt_labels(self.labels, key)} {_fmt_value(v)}")
+        return out
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (bucket counts, sum, count)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, n = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            if i < len(counts):
+                counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, n) in sorted(self._values.items()):
+            cum = 0
+            for le, c in zip(self.buckets, counts):
+                cum += c
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, ('le', _fmt_value(le)))} {cum}")
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, ('le', '+Inf'))} {n}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {_fmt_value(total)}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {n}")
+        return out
+
+
+class CallbackGauge:
+    """
+    Scrape хийх үед fn()-ийг дуудна: тоо эсвэл [(labels, value), ...] буцаана.
+    fn алдаа өгвөл тэр gauge-ийг алгасна.
+    """
+
+    def __init__(self, name: str, help: str, fn: Callable[[], GaugeSample]):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            sample = self.fn()
+        except Exception:
+            return []
+
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if isinstance(sample, (int, float)):
+            out.append(f"{self.name} {_fmt_value(sample)}")
+            return out
+
+        for labels, v in sample:
+            names = tuple(labels.keys())
+            out.append(f"{self.name}{_fmt_labels(names, tuple(labels[n] for n in names))} {_fmt_value(v)}")
+        return out
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Union[Counter, Histogram, CallbackGauge]] = {}
+
+    def _add(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, fn: Callable[[], GaugeSample]) -> CallbackGauge:
+        # callback-ийг дахин бүртгэвэл шинийг нь авна (reload-д хэрэгтэй)
+        g = CallbackGauge(name, help, fn)
+        self._metrics[name] = g
+        return g
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# -------- shared metrics --------
+
+HTTP_REQUESTS = registry.counter(
+    "trade_http_requests_total", "HTTP requests by route/method/status", ("route", "method", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "trade_http_request_duration_seconds", "HTTP request latency by route", ("route",)
+)
+CHAT_CALC = registry.counter(
+    "trade_chat_calc_total", "Answered /chat requests by calc and status", ("calc", "status")
+)
+CHAT_CALC_LATENCY = registry.histogram(
+    "trade_chat_calc_duration_seconds", "/chat latency by calc", ("calc",)
+)
+CACHE_LOOKUPS = registry.counter(
+    "trade_result_cache_lookups_total", "Result lookups by outcome (last_result/derived/cube/replica/miss)", ("outcome",)
+)
+RESPONSE_BYTES = registry.counter(
+    "trade_response_bytes_total", "/chat JSON body bytes by profile", ("profile",)
+)
+RESPONSE_BYTES_SAVED = registry.counter(
+    "trade_response_bytes_saved_total", "Response bytes saved by reason (lean/gzip/br)", ("reason",)
+)
+DB_POOL_WAIT = registry.histogram(
+    "trade_db_pool_wait_seconds", "Time to check out a pooled DB connection (lazy, per query)",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+DB_READ_QUERIES = registry.counter(
+    "trade_db_read_queries_total", "Analytic reads by endpoint and outcome (ok/error/failover)", ("endpoint", "outcome")
+)
+DB_READ_LATENCY = registry.histogram(
+    "trade_db_read_duration_seconds", "Analytic read latency (checkout + query) by endpoint", ("endpoint",)
+)
+LLM_CALLS = registry.counter(
+    "trade_llm_calls_total", "Gemini calls by kind and outcome", ("kind", "outcome")
+)
@@ -1,22 +1,237 @@
 # app/analytics/query_log.py
 from __future__ import annotations
 
+import atexit
+import gzip
 import json
+import os
+import queue
+import shutil
+import threading
 import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional
 
-LOG_PATH = Path("logs/query_log.jsonl")
+try:
+    import fcntl  # type: ignore
+except ImportError:  # pragma: no cover - Windows (нэг process-той dev орчин)
+    fcntl = None
+
+from app.core.config import settings
+
+LOG_PATH = Path(settings.query_log_path)
+
+_STOP = object()
+
+
+class QueryLogWriter:
+    """
+    Background JSONL writer:
+    - request path зөвхөн bounded queue руу put_nowait хийнэ (disk хүлээхгүй)
+    - дүүрсэн үед event-ийг хаяж, dropped тоолно (backpressure)
+    - batch-аар нэг open/write/close
+    - size эсвэл хугацаагаар rotate → gzip, хуучныг backup_count-оор цэвэрлэнэ
+    - uvicorn worker бүр нэг файл руу бичнэ: append болон rename нь <stem>.lock дээрх
+      flock дотор (rotate хийсэн worker-ийн дараа бусад нь шинэ файл руу бичнэ)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        queue_size: int = 10_000,
+        batch_size: int = 200,
+        flush_seconds: float = 1.0,
+        max_bytes: int = 50 * 1024 * 1024,
+        rotate_seconds: int = 24 * 60 * 60,
+        backup_count: int = 30,
+    ):
+        self.path = Path(path)
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+
+        self.dropped = 0
+        self._dropped_reported = 0
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._opened_at = time.time()
+        self._inode: Optional[int] = None
+        self._lock_path = self.path.with_name(f"{self.path.stem}.lock")
+
+    # -------- producer side (request path) --------
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        if self._thread is None:
+            self.start()
+        try:
+            self._q.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def qsize(self) -> int:
+        return self._q.qsize()
+
+    # -------- lifecycle --------
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._q.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+        self._thread = None
+
+    # -------- consumer side (writer thread) --------
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: List[Dict[str, Any]] = []
+            try:
+                item = self._q.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                item = None
+
+            deadline = time.monotonic() + self.flush_seconds
+            while item is not None:
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._q.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    item = None
+
+            try:
+                self._write(batch)
+                self._maybe_rotate()
+            except Exception:
+                # log бичих алдаа request-д хэзээ ч нөлөөлөхгүй
+                continue
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        dropped = self.dropped
+        if dropped != self._dropped_reported:
+            batch.append({
+                "event": "query_log_dropped",
+                "dropped": dropped - self._dropped_reported,
+                "ts": int(time.time()),
+            })
+            self._dropped_reported = dropped
+
+        if not batch:
+            return
+
+        lines = []
+        for event in batch:
+            try:
+                lines.append(json.dumps(event, ensure_ascii=False, default=str))
+            except Exception:
+                continue
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._file_lock(), self.path.open("a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        # process хоорондын lock; fcntl байхгүй бол (Windows) lock-гүй
+        if fcntl is None:
+            yield
+            return
+        self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock_path.open("a") as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _maybe_rotate(self) -> None:
+        with self._file_lock():
+            try:
+                st = self.path.stat()
+            except FileNotFoundError:
+                return
+            # өөр worker rotate хийсэн бол шинэ файлын насыг эндээс тоолно
+            if st.st_ino != self._inode:
+                self._inode = st.st_ino
+                self._opened_at = time.time()
+
+            too_big = self.max_bytes > 0 and st.st_size >= self.max_bytes
+            too_old = self.rotate_seconds > 0 and time.time() - self._opened_at >= self.rotate_seconds
+            if not (too_big or too_old) or st.st_size == 0:
+                return
+
+            rotated = self._rotated_name()
+            os.replace(self.path, rotated)
+            self._opened_at = time.time()
+
+        # rename-ийн дараа хэн ч хуучин файл руу бичихгүй → gzip-ийг lock-гүй хийнэ
+        with rotated.open("rb") as src, gzip.open(str(rotated) + ".gz", "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        rotated.unlink()
+
+        self._prune()
+
+    def _rotated_name(self) -> Path:
+        # query_log.20260129-101500123.jsonl (ms хүртэл; эрэмбэлэхэд хугацааны дарааллаар)
+        while True:
+            now = time.time()
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{int(now * 1000) % 1000:03d}"
+            rotated = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+            if not rotated.exists() and not Path(str(rotated) + ".gz").exists():
+                return rotated
+            time.sleep(0.001)
+
+    def _prune(self) -> None:
+        if self.backup_count <= 0:
+            return
+        backups = sorted(self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}.gz"))
+        for old in backups[: -self.backup_count]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+writer = QueryLogWriter(
+    LOG_PATH,
+    queue_size=settings.query_log_queue_size,
+    batch_size=settings.query_log_batch_size,
+    flush_seconds=settings.query_log_flush_seconds,
+    max_bytes=settings.query_log_max_bytes,
+    rotate_seconds=settings.query_log_rotate_seconds,
+    backup_count=settings.query_log_backups,
+)
+atexit.register(writer.close)
 
 
 def log_query(event: Dict[str, Any]) -> None:
     """
-    Append JSONL log. Never throw.
+    Enqueue JSONL log (background writer бичнэ). Never throw, never block.
     """
     try:
-        LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
         event.setdefault("ts", int(time.time()))
-        with LOG_PATH.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+        writer.submit(event)
     except Exception:
-        return
\ No newline at end of file
+        return
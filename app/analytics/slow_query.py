@@ -0,0 +1,94 @@
+# app/analytics/slow_query.py
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import text
+
+from app.analytics.metrics import registry
+from app.analytics.query_log import QueryLogWriter
+from app.analytics.slow_report import shape_id
+from app.core.config import settings
+from app.core.database import LazySession, read_router
+from app.sql.builder import with_row_limit
+
+slow_writer = QueryLogWriter(Path(settings.slow_query_log_path), queue_size=1000, batch_size=50)
+
+SLOW_QUERIES = registry.counter(
+    "trade_slow_queries_total", "Queries slower than SLOW_QUERY_MS by calc/view", ("calc", "view")
+)
+
+# background EXPLAIN task-уудыг GC-ээс хамгаална
+_pending: Set[asyncio.Task] = set()
+
+
+def _label(sql_meta: Dict[str, Any]) -> str:
+    filters = sorted((sql_meta.get("filters") or {}).keys())
+    return f"{sql_meta.get('calc')} @ {sql_meta.get('view')} filters={','.join(filters) or '-'}"
+
+
+async def _explain(sql: Any, params: Dict[str, Any], event: Dict[str, Any], timeout_ms: Optional[int] = None) -> None:
+    """
+    EXPLAIN (ANALYZE, BUFFERS) — query-г дахин ажиллуулдаг тул request дууссаны дараа,
+    statement_timeout-тойгоор, read_router-оор (replica; байхгүй бол primary).
+    sql/params: яг ажилласан (LIMIT-тэй) query — plan нь тухайн query-ийнх, зардал нь түүнээс хэтрэхгүй.
+    """
+    try:
+        limit_ms = max(1000, int(settings.slow_query_ms * 4))
+        if timeout_ms:
+            # анхны query-ийн statement_timeout-оос урт ажиллуулахгүй
+            limit_ms = min(limit_ms, timeout_ms)
+        db = LazySession(read_router)
+        r = await db.execute(
+            text("EXPLAIN (ANALYZE, BUFFERS) " + str(getattr(sql, "text", sql))), params, timeout_ms=limit_ms
+        )
+        event["plan"] = [row[0] for row in r.all()]
+    except Exception as e:
+        event["plan_error"] = f"{type(e).__name__}: {e}"[:500]
+    slow_writer.submit(event)
+
+
+async def execute_rows(
+    db: LazySession,
+    sql: Any,
+    params: Dict[str, Any],
+    sql_meta: Dict[str, Any],
+    limit: int = 500,
+    timeout_ms: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    db.execute + fetch. SLOW_QUERY_MS-ээс удаан бол SQL/params/duration-ийг
+    logs/slow_query.jsonl-д бичиж, SLOW_QUERY_EXPLAIN_SAMPLE магадлалаар EXPLAIN plan авна.
+    timeout_ms: query-ийн statement_timeout (SET LOCAL).
+    """
+    t0 = time.perf_counter()
+    # ✅ LIMIT нь SQL дотор → илүү мөр сүлжээгээр ирж, dict болохгүй
+    limited, limited_params = with_row_limit(sql, params, limit)
+    r = await db.execute(limited, limited_params, timeout_ms=timeout_ms)
+    rows = [dict(x) for x in r.mappings().all()]
+    ms = (time.perf_counter() - t0) * 1000.0
+
+    if settings.slow_query_ms > 0 and ms >= settings.slow_query_ms:
+        SLOW_QUERIES.inc(calc=str(sql_meta.get("calc")), view=str(sql_meta.get("view")))
+        sql_text = str(getattr(limited, "text", limited))
+        event = {
+            "ts": int(time.time()),
+            "shape": shape_id(sql_text),
+            "label": _label(sql_meta),
+            "duration_ms": round(ms, 1),
+            "row_count": len(rows),
+            "sql": sql_text,
+            "params": limited_params,
+        }
+        if random.random() < settings.slow_query_explain_sample:
+            task = asyncio.create_task(_explain(limited, dict(limited_params), event, timeout_ms))
+            _pending.add(task)
+            task.add_done_callback(_pending.discard)
+        else:
+            slow_writer.submit(event)
+
+    return rows
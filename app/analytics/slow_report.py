@@ -0,0 +1,124 @@
+# app/analytics/slow_report.py
+"""
+Slow query summary: logs/slow_query.jsonl-ийг query shape-ээр бүлэглэнэ.
+
+Run:
+  python -m app.analytics.slow_report [logs/slow_query.jsonl] [--top 20] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+_WS = re.compile(r"\s+")
+_STR = re.compile(r"'(?:[^']|'')*'")
+_NUM = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+
+def query_shape(sql_text: str) -> str:
+    """
+    SQL text → shape: whitespace/literal-уудыг нэгтгэсэн normalized текст.
+    (build_sql bind param ашигладаг тул ихэнх ялгаа нь WHERE бүтэц/calc-д л байна)
+    """
+    s = _STR.sub("?", sql_text or "")
+    s = _NUM.sub("?", s)
+    return _WS.sub(" ", s).strip()
+
+
+def shape_id(sql_text: str) -> str:
+    return hashlib.sha1(query_shape(sql_text).encode("utf-8")).hexdigest()[:12]
+
+
+def _iter(path: Path) -> Iterator[Dict[str, Any]]:
+    files = [path] if path.is_file() else sorted(path.glob("slow_query*.jsonl*"))
+    for f in files:
+        opener = gzip.open if f.suffix == ".gz" else open
+        with opener(f, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(events: Iterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    groups: Dict[str, Dict[str, Any]] = {}
+    for ev in events:
+        if ev.get("event"):
+            continue
+        sid = ev.get("shape") or shape_id(ev.get("sql") or "")
+        g = groups.get(sid)
+        if g is None:
+            g = groups[sid] = {
+                "shape": sid,
+                "label": ev.get("label"),
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "durations": [],
+                "explained": 0,
+                "example_sql": query_shape(ev.get("sql") or ""),
+                "example_params": ev.get("params"),
+                "slowest_plan": None,
+            }
+        ms = float(ev.get("duration_ms") or 0.0)
+        g["count"] += 1
+        g["total_ms"] += ms
+        g["durations"].append(ms)
+        if ev.get("plan"):
+            g["explained"] += 1
+        if ms >= g["max_ms"]:
+            g["max_ms"] = ms
+            g["example_params"] = ev.get("params")
+            if ev.get("plan"):
+                g["slowest_plan"] = ev["plan"]
+
+    out = []
+    for g in groups.values():
+        d = sorted(g.pop("durations"))
+        g["p50_ms"] = d[len(d) // 2]
+        g["p95_ms"] = d[int(0.95 * (len(d) - 1))]
+        g["avg_ms"] = g["total_ms"] / g["count"]
+        out.append(g)
+    out.sort(key=lambda g: -g["total_ms"])
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Group slow queries by shape")
+    ap.add_argument("path", nargs="?", default="logs")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+
+    groups = summarize(_iter(Path(args.path)))[: args.top]
+    if not groups:
+        print("slow query олдсонгүй", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(groups, ensure_ascii=False, indent=2, default=str))
+        return 0
+
+    for g in groups:
+        print(
+            f"[{g['shape']}] {g['label'] or ''}\n"
+            f"  count={g['count']} total={g['total_ms']:.0f}ms avg={g['avg_ms']:.0f}ms "
+            f"p50={g['p50_ms']:.0f}ms p95={g['p95_ms']:.0f}ms max={g['max_ms']:.0f}ms explained={g['explained']}\n"
+            f"  sql: {g['example_sql'][:300]}\n"
+            f"  params: {json.dumps(g['example_params'], ensure_ascii=False, default=str)}"
+        )
+        if g["slowest_plan"]:
+            print("  plan:\n    " + "\n    ".join(g["slowest_plan"][:25]))
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
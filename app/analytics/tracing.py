@@ -0,0 +1,95 @@
+# app/analytics/tracing.py
+from __future__ import annotations
+
+import threading
+from collections import deque
+from time import perf_counter_ns
+from typing import Deque, Dict, Optional
+
+
+class _Span:
+    __slots__ = ("_trace", "_name", "_t0")
+
+    def __init__(self, trace: "Trace", name: str):
+        self._trace = trace
+        self._name = name
+        self._t0 = 0
+
+    def __enter__(self) -> "_Span":
+        self._t0 = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._trace.add(self._name, perf_counter_ns() - self._t0)
+
+
+class Trace:
+    """
+    Нэг request-ийн stage бүрийн хугацаа (ns). Span нь ~1µs-ээс бага overhead-тэй.
+
+        trace = Trace()
+        with trace.span("build_sql"):
+            ...
+        trace.as_ms()  # {"build_sql": 0.042, "total": 12.3}
+    """
+
+    __slots__ = ("_t0", "spans")
+
+    def __init__(self) -> None:
+        self._t0 = perf_counter_ns()
+        self.spans: Dict[str, int] = {}
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def add(self, name: str, ns: int) -> None:
+        # нэг stage олон удаа ажиллавал нийлбэрийг нь авна
+        self.spans[name] = self.spans.get(name, 0) + ns
+
+    def total_ns(self) -> int:
+        return perf_counter_ns() - self._t0
+
+    def as_ms(self) -> Dict[str, float]:
+        out = {k: round(v / 1e6, 3) for k, v in self.spans.items()}
+        out["total"] = round(self.total_ns() / 1e6, 3)
+        return out
+
+
+class StageStats:
+    """
+    Stage бүрийн сүүлийн N хэмжилт (ms) → p50/p90/p99 (process-local).
+    """
+
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self._data: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings_ms: Dict[str, float]) -> None:
+        for stage, ms in timings_ms.items():
+            buf = self._data.get(stage)
+            if buf is None:
+                with self._lock:
+                    buf = self._data.setdefault(stage, deque(maxlen=self.window))
+            buf.append(ms)
+
+    def percentiles(self, stage: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {}
+        for name, buf in list(self._data.items()):
+            if stage and name != stage:
+                continue
+            values = sorted(buf)
+            if not values:
+                continue
+            n = len(values)
+            out[name] = {
+                "count": n,
+                "p50": values[int(0.50 * (n - 1))],
+                "p90": values[int(0.90 * (n - 1))],
+                "p99": values[int(0.99 * (n - 1))],
+                "max": values[-1],
+            }
+        return out
+
+
+stage_stats = StageStats()
@@ -1,14 +1,19 @@
 # D:\DataAnalystBot\app\api\chat.py
 from __future__ import annotations
 
+import datetime as _dt
 import json
-from typing import Any, Dict, Optional, Tuple
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from fastapi import APIRouter, Depends, Header, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import Response
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import LazySession, get_db
+from app.core.security import is_valid_key, resolve_profile
 
 from app.llm.client import llm_text
 
@@ -18,14 +23,35 @@ from app.models.intent import ChatRequest
 # ✅ conversation pre-processor (state merge + clarify + suggestions)
 from app.services.chat_service import handle_chat
 from app.analytics.query_log import log_query
+from app.analytics.tracing import Trace, stage_stats
+from app.analytics.metrics import (
+    CACHE_LOOKUPS,
+    CHAT_CALC,
+    CHAT_CALC_LATENCY,
+    RESPONSE_BYTES,
+    RESPONSE_BYTES_SAVED,
+)
+from app.analytics.cost_guard import QueryRejected, guarded_rows
+from app.core.result_cache import LastResultStore, SeriesCache, intent_key, is_presentation_only
+from app.sql.derive import compute_rows
+from app.replica.cube import cubes
+from app.replica.engine import replica
+from app.api.responses import FastJSONResponse, dumps, json_default, lean_payload
 
 
 router = APIRouter()
 
+# ✅ session бүрийн сүүлийн raw rows (presentation-only follow-up-д DB-гүй хариулна)
+last_results = LastResultStore()
+# ✅ session бүрийн monthly series → coarser calc-уудыг DB-гүй бодно
+series_cache = SeriesCache()
+
 
-async def require_key(x_api_key: Optional[str] = Header(None)) -> None:
-    if x_api_key != settings.api_key:
+async def require_key(x_api_key: Optional[str] = Header(None)) -> str:
+    # API_KEY эсвэл API_KEY_PROFILES-д бүртгэлтэй key; key нь response profile-ийг тодорхойлно
+    if not is_valid_key(x_api_key):
         raise HTTPException(status_code=401, detail="Unauthorized")
+    return x_api_key
 
 
 def _unit(metric: str) -> str:
@@ -72,7 +98,14 @@ def _filters_summary(intent: Dict[str, Any]) -> str:
 
     return " • " + ", ".join(parts) if parts else ""
 
-def _scale_info(metric: str) -> dict:
+def _scale_info(metric: str, scale_label: Optional[str] = None) -> dict:
+    # ✅ user сонгосон scale ("сая нэгжээр" / "мянга нэгжээр") default-ийг дарна
+    if metric != "weighted_price":
+        if scale_label == "сая":
+            return {"scale": 1_000_000.0, "scale_label": "сая"}
+        if scale_label == "мянга":
+            return {"scale": 1_000.0, "scale_label": "мянга"}
+
     # Chart/Table дээр default scale
     if metric == "amountUSD":
         return {"scale": 1_000_000.0, "scale_label": "сая"}  # USD -> сая
@@ -81,7 +114,7 @@ def _scale_info(metric: str) -> dict:
     return {"scale": 1.0, "scale_label": ""}  # weighted_price: scale хийхгүй
 
 
-def _format_value(x: Any, metric: str) -> str:
+def _format_value(x: Any, metric: str, scale_label: Optional[str] = None) -> str:
     if x is None:
         return "—"
 
@@ -96,7 +129,7 @@ def _format_value(x: Any, metric: str) -> str:
     if metric == "weighted_price":
         return f"{v:,.2f} {u}"
 
-    scale_meta = _scale_info(metric)
+    scale_meta = _scale_info(metric, scale_label)
     sc = float(scale_meta.get("scale", 1.0) or 1.0)
     label = scale_meta.get("scale_label", "")
 
@@ -111,6 +144,10 @@ def _looks_analytic(q: str) -> bool:
     keys = [
         "экспорт", "импорт", "дүн", "хэмжээ", "тонн", "usd", "ам.доллар",
         "өмнөх", "мөн үе", "өссөн", "сар", "он", "сар сараар", "дундаж", "yoy",
+        # ✅ presentation follow-up ("сая нэгжээр", "мянга нэгжээр")
+        "сая", "мянга", "нэгж",
+        # ✅ granularity follow-up ("жилээр")
+        "жил",
     ]
     return any(k in t for k in keys) or any(ch.isdigit() for ch in t)
 
@@ -146,12 +183,18 @@ def canonicalize_intent(intent: Dict[str, Any], state: Any, q: str) -> Dict[str,
 
     return out
 
+# ✅ series calc-ууд; window calc-ийн нэмэлт баганууд result.series-д орно
+MONTH_SERIES_CALCS = ("timeseries_month", "timeseries_range", "mom", "rolling_12m")
+SERIES_CALCS = (*MONTH_SERIES_CALCS, "timeseries_year")
+SERIES_EXTRA = {"mom": ("previous", "pct"), "rolling_12m": ("months",)}
+
+
 def _infer_period(calc: str, time_field: Any) -> str:
-    if calc in ("timeseries_month",):
+    if calc in MONTH_SERIES_CALCS:
         return "series_month"
     if calc in ("timeseries_year",):
         return "series_year"
-    if calc in ("ytd", "year_total", "avg_years"):
+    if calc in ("ytd", "year_total", "avg_years", "cagr"):
         return "year"
     return "month"
 
@@ -171,7 +214,17 @@ def _normalize_value_result(
             "pct": r0.get("pct"),
         }, None
 
-    if calc == "timeseries_month":
+    if calc == "cagr":
+        return {
+            "start_year": r0.get("start_year"),
+            "end_year": r0.get("end_year"),
+            "start_value": r0.get("start_value"),
+            "end_value": r0.get("end_value"),
+            "periods": r0.get("periods"),
+            "pct": r0.get("pct"),
+        }, None
+
+    if calc in MONTH_SERIES_CALCS:
         series = []
         for x in rows:
             try:
@@ -186,15 +239,17 @@ def _normalize_value_result(
             y_str = str(yy) if yy is not None else ""
             m_str = f"{mm:02d}" if mm is not None else ""
 
-            series.append(
-                {
-                    # ✅ string болгосон (front хүснэгтэнд 2024.00 болохгүй)
-                    "year": y_str,
-                    "month": m_str,
-                    "label": f"{y_str}-{m_str}" if y_str and m_str else (x.get("label") or ""),
-                    "value": x.get("value"),
-                }
-            )
+            point = {
+                # ✅ string болгосон (front хүснэгтэнд 2024.00 болохгүй)
+                "year": y_str,
+                "month": m_str,
+                "label": f"{y_str}-{m_str}" if y_str and m_str else (x.get("label") or ""),
+                "value": x.get("value"),
+            }
+            # ✅ window calc-ийн нэмэлт баганууд (mom: previous/pct, rolling_12m: months)
+            for k in SERIES_EXTRA.get(calc, ()):
+                point[k] = x.get(k)
+            series.append(point)
 
         return {"series": series}, None
 
@@ -220,6 +275,141 @@ def _normalize_value_result(
     return {"value": r0.get("value")}, None
 
 
+def _normalize_columnar(
+    calc: str, rows: list[Dict[str, Any]], scale: float
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Series rows → parallel arrays (label/year/month/value/value_scaled), нэг pass + numpy.
+    Мөр бүрт dict, try/except үүсгэхгүй; NaN нь JSON-д null болно.
+    """
+    if not rows:
+        return {"value": None}, "no_data"
+
+    n = len(rows)
+    year = np.fromiter((x.get("year") or 0 for x in rows), dtype=np.int32, count=n)
+    value = np.fromiter(
+        (np.nan if x.get("value") is None else x["value"] for x in rows), dtype=np.float64, count=n
+    )
+    series: Dict[str, Any] = {"year": year}
+
+    if calc in MONTH_SERIES_CALCS:
+        month = np.fromiter((x.get("month") or 0 for x in rows), dtype=np.int32, count=n)
+        series["month"] = month
+        series["label"] = [
+            f"{y}-{m:02d}" if y and m else "" for y, m in zip(year.tolist(), month.tolist())
+        ]
+    else:
+        series["label"] = [str(y) if y else "" for y in year.tolist()]
+
+    series["value"] = value
+    series["value_scaled"] = value / (scale or 1.0)
+    for k in SERIES_EXTRA.get(calc, ()):
+        series[k] = np.fromiter(
+            (np.nan if x.get(k) is None else x[k] for x in rows), dtype=np.float64, count=n
+        )
+    return {"series": series}, None
+
+
+def _series_ends(series: Any) -> Optional[Tuple[Tuple[Any, Any], Tuple[Any, Any]]]:
+    """
+    ((эхний label, value_scaled), (сүүлийн label, value_scaled)) — rows болон columnar аль алинд.
+    """
+    if isinstance(series, dict):
+        labels = series.get("label") or []
+        if not labels:
+            return None
+        scaled = json_default(series["value_scaled"])
+        return (labels[0], scaled[0]), (labels[-1], scaled[-1])
+    if series:
+        return (
+            (series[0].get("label"), series[0].get("value_scaled")),
+            (series[-1].get("label"), series[-1].get("value_scaled")),
+        )
+    return None
+
+
+def _finish_trace(
+    trace: Trace,
+    log_event: Optional[Dict[str, Any]],
+    kind: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> None:
+    """
+    Stage timings → aggregated percentiles + /metrics + query log.
+    kind: SQL-гүй хариуны төрөл ("smalltalk" | "clarify")
+    """
+    if timings is None:
+        timings = trace.as_ms()
+    stage_stats.record(timings)
+
+    calc = (log_event or {}).get("calc") or kind or "unknown"
+    status = (log_event or {}).get("status") or "success"
+    CHAT_CALC.inc(calc=calc, status=status)
+    CHAT_CALC_LATENCY.observe(timings["total"] / 1000.0, calc=calc)
+
+    if log_event is not None:
+        log_event["timings_ms"] = timings
+        log_query(log_event)
+
+
+def _respond(
+    payload: Dict[str, Any],
+    profile: str,
+    trace: Trace,
+    log_event: Optional[Dict[str, Any]],
+    kind: Optional[str] = None,
+) -> Response:
+    """
+    Trace хаах + profile-оор meta тайрах + нэг удаа serialize.
+    lean: debug meta (state/intent/sql_meta/...) хасна; хэмнэсэн byte-ийг LEAN_SAVINGS_SAMPLE
+    хувь дээр хэмжиж → /metrics (жигнэсэн) + query log.
+    """
+    timings = trace.as_ms()
+    meta = payload.get("meta")
+    if settings.trace_in_meta and isinstance(meta, dict):
+        meta["timings_ms"] = timings
+
+    dropped = None
+    if profile == "lean":
+        payload, dropped = lean_payload(payload)
+    body = dumps(payload)
+    # хасагдсан meta-г serialize хийх нь lean-ийн хэмнэсэн CPU-г буцааж зарцуулна → sample-ээр хэмжинэ
+    rate = settings.lean_savings_sample
+    saved = len(dumps(dropped)) if dropped and rate > 0 and random.random() < rate else 0
+
+    RESPONSE_BYTES.inc(len(body), profile=profile)
+    if saved:
+        # counter-т 1/rate-аар жигнэж нэмнэ (нийт хэмнэлтийн үнэлгээ)
+        RESPONSE_BYTES_SAVED.inc(saved / min(rate, 1.0), reason="lean")
+    if log_event is not None:
+        log_event.update({"profile": profile, "response_bytes": len(body)})
+        if saved:
+            log_event["bytes_saved"] = saved
+
+    _finish_trace(trace, log_event, kind=kind, timings=timings)
+    return Response(content=body, media_type="application/json")
+
+
+def _narrowing_choices(sql_meta: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    Cost guard татгалзсан үед: нэг он / сүүлийн 2 он, улс шүүлтгүй бол улс сонгох.
+    """
+    t = sql_meta.get("time") or {}
+    years = [int(y) for y in (t.get("years") or []) if y]
+    year = int(t.get("year") or (max(years) if years else _dt.date.today().year))
+    choices = [
+        {"label": f"{year} он", "prompt": f"{year} он"},
+        {"label": f"{year - 1}–{year} он", "prompt": f"{year - 1}, {year} он"},
+    ]
+    filters = sql_meta.get("filters") or {}
+    if not (filters.get("country") or filters.get("senderReceiver")):
+        choices += [
+            {"label": "Хятад", "prompt": "Хятад улсаар"},
+            {"label": "ОХУ", "prompt": "ОХУ-аар"},
+        ]
+    return choices
+
+
 def sync_intent_from_state(intent: dict, state: Any) -> dict:
     """
     ✅ Single source of truth:
@@ -234,32 +424,44 @@ async def health():
     return {"ok": True}
 
 
-@router.post("/chat")
+@router.get("/stats/latency")
+async def latency_stats(dep: None = Depends(require_key)):
+    # stage бүрийн p50/p90/p99 (ms), энэ worker дээрх сүүлийн хэмжилтүүдээр
+    return stage_stats.percentiles()
+
+
+@router.post("/chat", response_class=FastJSONResponse)
 async def chat(
     body: ChatRequest,
-    dep: None = Depends(require_key),
-    db: AsyncSession = Depends(get_db),
+    api_key: str = Depends(require_key),
+    db: LazySession = Depends(get_db),
 ):
+    profile = resolve_profile(api_key, body.profile)
     q = (body.message or "").strip()
     if not q:
-        return {"answer": "Асуултаа бичнэ үү.", "meta": {}, "result": None}
+        return FastJSONResponse({"answer": "Асуултаа бичнэ үү.", "meta": {}, "result": None})
+
+    trace = Trace()
 
     # 0) Smalltalk / General knowledge
     if not _looks_analytic(q):
         prompt = f"Та Монгол хэл дээр ярьдаг туслах. Найрсаг, товч хариул.\nАсуулт: {q}"
-        return {"answer": llm_text(prompt), "meta": {"intent": None}, "result": None}
+        with trace.span("smalltalk_llm"):
+            answer = llm_text(prompt)
+        meta = {"intent": None}
+        return _respond({"answer": answer, "meta": meta, "result": None}, profile, trace, None, kind="smalltalk")
 
     session_id = getattr(body, "session_id", None) or "default"
 
     # ✅ 1) Conversation layer (state merge + clarify + suggestions)
-    convo = handle_chat(q, session_id)
+    with trace.span("handle_chat"):
+        convo = handle_chat(q, session_id, trace)
 
     if convo.get("mode") == "clarify":
-        return {
-            "answer": convo.get("answer"),
-            "meta": convo.get("meta"),
-            "result": None,
-        }
+        return _respond(
+            {"answer": convo.get("answer"), "meta": convo.get("meta"), "result": None},
+            profile, trace, None, kind="clarify",
+        )
 
     state = convo.get("state")
     overrides = convo.get("overrides") or {}
@@ -269,21 +471,97 @@ async def chat(
     intent = state.to_intent() if state else {}
     intent = canonicalize_intent(intent, state, q)
 
-    # 1) SQL build + execute (✅ once)
-    sql, params, sql_meta = build_sql(intent, q)
-    r = await db.execute(sql, params)
-    rows = [dict(x) for x in r.mappings().all()][:500]
+    # ✅ presentation-only follow-up (scale гэх мэт) → cached rows-оо дахин render хийнэ
+    key = intent_key(intent)
+    cached = last_results.get(session_id)
+    cache_hit: Optional[str] = None
+    guard: Optional[Dict[str, Any]] = None
+
+    if cached and cached.key == key and is_presentation_only(overrides):
+        intent, sql_meta, rows = cached.intent, cached.sql_meta, cached.rows
+        cache_hit = "last_result"
+    else:
+        # 1) SQL build + execute (✅ once)
+        with trace.span("build_sql"):
+            sql, params, sql_meta = build_sql(intent, q)
+
+        # ✅ өмнө татсан monthly series-ээс бодож болох бол DB руу явахгүй
+        with trace.span("derive"):
+            rows = compute_rows(sql_meta, series_cache.monthly(session_id, sql_meta))
+        if rows is not None:
+            cache_hit = "derived"
+        else:
+            # ✅ in-memory cube (hscode/country slice → µs)
+            with trace.span("cube"):
+                rows = cubes.rows(sql_meta)
+            if rows is not None:
+                cache_hit = "cube"
+
+        if rows is None and replica is not None:
+            # ✅ local columnar replica (primary read path), чадахгүй бол Postgres
+            with trace.span("replica"):
+                rows = replica.rows(sql_meta)
+            if rows is not None:
+                cache_hit = "replica"
+
+        if rows is None:
+            try:
+                with trace.span("db.execute"):
+                    rows, guard = await guarded_rows(db, sql, params, sql_meta, limit=500)
+            except QueryRejected as e:
+                # ✅ хэт өргөн query → ажиллуулахгүй, хүрээгээ нарийсгахыг санал болгоно
+                CACHE_LOOKUPS.inc(outcome="miss")
+                log_event = {
+                    "question": q,
+                    "intent": intent,
+                    "view": sql_meta.get("view"),
+                    "view_type": sql_meta.get("view_type"),
+                    "calc": sql_meta.get("calc"),
+                    "row_count": 0,
+                    "status": e.reason,
+                    "cache": None,
+                    "guard": e.decision,
+                }
+                meta = convo.get("meta", {}) or {}
+                meta.update(
+                    {
+                        "needs_clarification": True,
+                        "choices": _narrowing_choices(sql_meta),
+                        "intent": intent,
+                        "intent_raw": raw_intent,
+                        "sql_meta": sql_meta,
+                        "overrides": overrides,
+                        "guard": e.decision,
+                    }
+                )
+                answer = (
+                    "Энэ асуулт хэт өргөн хүрээтэй тул удаан ажиллахаар байна. "
+                    "Оны хүрээгээ нарийсгах эсвэл улсаа сонгоно уу."
+                )
+                return _respond({"answer": answer, "meta": meta, "result": None}, profile, trace, log_event)
+            series_cache.put(session_id, sql_meta, rows)
+
+        last_results.set(session_id, key, intent, sql_meta, rows)
+
+    CACHE_LOOKUPS.inc(outcome=cache_hit or "miss")
 
     # ✅ IMPORTANT: use sql_meta overrides
     calc = sql_meta.get("calc") or intent.get("calc") or "month_value"
     metric = sql_meta.get("metric") or intent.get("metric") or "amountUSD"
     domain = sql_meta.get("domain") or intent.get("domain") or "export"
 
+    scale_label = getattr(state, "scale_label", None)
+    columnar = (body.format or settings.result_format) == "columnar"
+
     # 3) Normalize
-    normalized, err_code = _normalize_value_result(calc, rows)
+    with trace.span("normalize"):
+        if columnar and calc in SERIES_CALCS:
+            normalized, err_code = _normalize_columnar(calc, rows, _scale_info(metric, scale_label)["scale"])
+        else:
+            normalized, err_code = _normalize_value_result(calc, rows)
 
-    # ✅ LOG HERE (rows + err_code бэлэн болсон яг энэ цэг)
-    log_query({
+    # ✅ LOG event (rows + err_code бэлэн болсон яг энэ цэг; timings-тэй хамт хариу буцаахын өмнө бичнэ)
+    log_event = {
         "question": q,
         "intent": intent,
         "view": sql_meta.get("view"),
@@ -291,7 +569,10 @@ async def chat(
         "calc": sql_meta.get("calc"),
         "row_count": len(rows),
         "status": ("no_data" if err_code == "no_data" else "success"),
-    })
+        "cache": cache_hit,
+    }
+    if guard is not None:
+        log_event["guard"] = guard
 
     unit = _unit(metric)
     period = _infer_period(calc, intent.get("time"))
@@ -299,21 +580,30 @@ async def chat(
     # display (UI)
     if calc == "yoy":
         display = {
-            "current": _format_value(normalized.get("current"), metric),
-            "previous": _format_value(normalized.get("previous"), metric),
+            "current": _format_value(normalized.get("current"), metric, scale_label),
+            "previous": _format_value(normalized.get("previous"), metric, scale_label),
+            "pct": "—"
+            if normalized.get("pct") is None
+            else f"{float(normalized['pct']):.2f}%",
+        }
+    elif calc == "cagr":
+        display = {
+            "start": _format_value(normalized.get("start_value"), metric, scale_label),
+            "end": _format_value(normalized.get("end_value"), metric, scale_label),
             "pct": "—"
             if normalized.get("pct") is None
             else f"{float(normalized['pct']):.2f}%",
         }
-    elif calc in ("timeseries_month", "timeseries_year"):
+    elif calc in SERIES_CALCS:
         display = None
     else:
-        display = _format_value(normalized.get("value"), metric)
+        display = _format_value(normalized.get("value"), metric, scale_label)
 
-    scale_meta = _scale_info(metric)
+    scale_meta = _scale_info(metric, scale_label)
 
     result_contract: Dict[str, Any] = {
         **normalized,
+        "format": "columnar" if columnar else "rows",
         "display": display,
         "unit": unit,
         "period": period,
@@ -351,11 +641,11 @@ async def chat(
             }
         )
 
-        return {
+        return _respond({
             "answer": "Өгөгдөл олдсонгүй. Хугацаа/ангилал/шүүлтээ өөрчлөөд дахин оролдоорой.",
             "meta": meta,
             "result": result_contract,
-        }
+        }, profile, trace, log_event)
 
     if err_code:
         result_contract["warning"] = err_code
@@ -390,7 +680,7 @@ async def chat(
         "sql_meta": sql_meta,
         "result": result_contract,
         "rows_preview": rows[:20],
-        "state": (state.model_dump() if hasattr(state, "model_dump") else None),
+        "state": (state.dump() if hasattr(state, "dump") else None),
     }
     domain_label = _domain_label(domain)
     metric_label = _metric_label(metric)
@@ -410,10 +700,11 @@ async def chat(
     - Тоог таслалтай, 2 орны нарийвчлалтай бич (display байгаа бол display-г тэр чигт нь ашигла)
 
     JSON:
-    {json.dumps(explain_payload, ensure_ascii=False, default=str)}
+    {json.dumps(explain_payload, ensure_ascii=False, default=json_default)}
     """.strip()
 
-    explanation = llm_text(explain_prompt).strip()
+    with trace.span("llm_text"):
+        explanation = llm_text(explain_prompt).strip()
 
     # fallback base answer
     if not explanation:
@@ -433,16 +724,21 @@ async def chat(
                 f"Одоогийн={display['current']}, Өмнөх={display['previous']}, "
                 f"Өөрчлөлт={display['pct']} ({trend})"
             )
-        elif calc in ("timeseries_month", "timeseries_year"):
-            series = normalized.get("series") or []
-            if series:
-                first = series[0]
-                last = series[-1]
+        elif calc == "cagr":
+            explanation = (
+                f"{dom} • {met}{flt}: "
+                f"{normalized.get('start_year')} он={display['start']}, {normalized.get('end_year')} он={display['end']}, "
+                f"жилийн дундаж өсөлт (CAGR)={display['pct']}"
+            )
+        elif calc in SERIES_CALCS:
+            ends = _series_ends(normalized.get("series"))
+            if ends:
+                (first_label, first_value), (last_label, last_value) = ends
                 # display байхгүй үед raw value дээр scale ашиглан format хийхгүй, богино үлдээнэ
                 explanation = (
                     f"{dom} • {met}{flt}: хүснэгт/цуваа гаргалаа. "
-                    f"Эхлэл {first.get('label')}: {first.get('value_scaled')}, "
-                    f"Сүүл {last.get('label')}: {last.get('value_scaled')}."
+                    f"Эхлэл {first_label}: {first_value}, "
+                    f"Сүүл {last_label}: {last_value}."
                 )
             else:
                 explanation = f"{dom} • {met}{flt}: хүснэгт/цуваа гаргалаа."
@@ -458,9 +754,9 @@ async def chat(
         "overrides": overrides,
     })
 
-    return {
+    return _respond({
         "answer": explanation,
         "meta": meta,
         "result": result_contract,
-    }
+    }, profile, trace, log_event)
 
@@ -0,0 +1,119 @@
+# app/api/compression.py
+"""
+Response compression (pure ASGI): Accept-Encoding-оор br (brotli суусан бол) эсвэл gzip.
+
+- COMPRESS_MIN_BYTES-ээс жижиг, аль хэдийн шахсан, эсвэл streaming (more_body) response-ийг
+  хөндөхгүй → NDJSON/export stream-үүд шууд урсана
+- binary / өөрөө шахагдсан media type (parquet, xlsx, zip, зураг г.м.)-ийг шахахгүй; шахсан нь
+  анхныхаасаа жижиг биш бол identity body-г хэвээр илгээнэ
+- хэмнэсэн byte-ийг trade_response_bytes_saved_total{reason="gzip"|"br"}-д нэмнэ
+"""
+from __future__ import annotations
+
+import gzip
+from typing import Any, Callable, Dict, List, Optional
+
+from app.analytics.metrics import RESPONSE_BYTES_SAVED
+
+try:
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    brotli = None
+
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4  # JSON дээр gzip-6-аас жижиг, хурдан
+
+# content-type prefix-ууд: дотроо шахагдсан эсвэл binary → дахин шахахад ашиггүй
+BINARY_TYPES = (
+    "image/",
+    "audio/",
+    "video/",
+    "font/",
+    "application/octet-stream",
+    "application/zip",
+    "application/gzip",
+    "application/pdf",
+    "application/vnd.apache.parquet",
+    "application/vnd.openxmlformats-officedocument.",
+)
+
+
+def is_binary(content_type: str) -> bool:
+    return content_type.strip().lower().startswith(BINARY_TYPES)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    tokens = {t.split(";")[0].strip().lower() for t in (accept_encoding or "").split(",")}
+    if brotli is not None and "br" in tokens:
+        return "br"
+    if "gzip" in tokens:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: Callable, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or self.minimum_size <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers") or []}
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Dict[str, Any]] = None
+        passthrough = False
+
+        async def _send(message: Dict[str, Any]) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            resp_headers: List = list(start.get("headers") or [])
+            names = {k.lower(): v for k, v in resp_headers}
+            if (
+                message.get("more_body")
+                or b"content-encoding" in names
+                or len(body) < self.minimum_size
+                or is_binary(names.get(b"content-type", b"").decode("latin-1"))
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            packed = compress(body, encoding)
+            passthrough = True
+            if len(packed) >= len(body):
+                # шахалт ашиггүй (санамсаргүй/шахсан өгөгдөл) → identity
+                await send(start)
+                await send(message)
+                return
+            RESPONSE_BYTES_SAVED.inc(len(body) - len(packed), reason=encoding)
+            resp_headers = [(k, v) for k, v in resp_headers if k.lower() != b"content-length"]
+            resp_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(packed)).encode()),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            await send({**start, "headers": resp_headers})
+            await send({"type": "http.response.body", "body": packed})
+
+        await self.app(scope, receive, _send)
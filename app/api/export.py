@@ -0,0 +1,107 @@
+# app/api/export.py
+"""
+Bulk export: intent (эсвэл session-ий сүүлийн result) → CSV / Parquet / XLSX, chunk-аар урсгана.
+
+POST /export  {"intent": {...} | "session_id": "...", "format": "csv"|"parquet"|"xlsx", "detail": true}
+
+Server-side cursor (LazySession.stream) → writer → spooled temp файл (EXPORT_SPOOL_BYTES хүртэл
+санах ойд, цааш нь disk) → StreamingResponse. Файл бүтэн бичигдсэний дараа илгээдэг тул
+header-т мөрийн тоо болон хязгаарт хүрсэн эсэхийг өгнө:
+  X-Row-Count: N, X-Truncated: 1 (STREAM_MAX_ROWS / max_rows-оос их мөртэй байсан)
+detail=true (default) бол view-ийн бүх багана, false бол /chat-ийн aggregate result.
+"""
+from __future__ import annotations
+
+import asyncio
+import tempfile
+from typing import IO, Any, AsyncIterator, Dict, List, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.analytics.cost_guard import timeout_for
+from app.api.chat import require_key
+from app.api.stream import resolve_intent, stream_query
+from app.core.config import settings
+from app.core.database import LazySession, get_db
+from app.models.intent import ExportRequest
+from app.services.export_service import MEDIA_TYPES, READ_BLOCK, make_writer, missing_dependency
+
+router = APIRouter()
+
+
+def _append(writer: Any, out: IO[bytes], rows: List[Dict[str, Any]]) -> None:
+    data = writer.write(rows)
+    if data:
+        out.write(data)
+
+
+def _finish(writer: Any, out: IO[bytes]) -> None:
+    for block in writer.close():
+        if block:
+            out.write(block)
+
+
+async def spool_export(
+    db: LazySession, sql: Any, params: Dict[str, Any], fmt: str, max_rows: int
+) -> Tuple[IO[bytes], int, bool]:
+    """
+    (файл (эхэнд seek хийсэн), бичсэн мөрийн тоо, truncated). Query max_rows + 1 мөр татна.
+    Encode + spool (disk руу шилжиж болно) нь thread дээр → event loop блоклогдохгүй.
+    """
+    writer = make_writer(fmt)
+    out = tempfile.SpooledTemporaryFile(max_size=settings.export_spool_bytes)
+    n = seen = 0
+    try:
+        async for chunk in db.stream(sql, params, timeout_ms=timeout_for("export"), chunk_rows=settings.stream_chunk_rows):
+            seen += len(chunk)
+            chunk = chunk[: max(max_rows - n, 0)]
+            n += len(chunk)
+            if chunk:
+                await asyncio.to_thread(_append, writer, out, chunk)
+        await asyncio.to_thread(_finish, writer, out)
+        out.seek(0)
+    except BaseException:
+        out.close()
+        raise
+    return out, n, seen > max_rows
+
+
+@router.post("/export")
+async def export(
+    body: ExportRequest,
+    dep: str = Depends(require_key),
+    db: LazySession = Depends(get_db),
+):
+    missing = missing_dependency(body.format)
+    if missing:
+        raise HTTPException(status_code=501, detail=f"{body.format} export-д {missing} суулгах шаардлагатай")
+
+    intent = resolve_intent(body.intent, body.session_id)
+    max_rows = min(body.max_rows or settings.stream_max_rows, settings.stream_max_rows)
+    sql, params, meta = stream_query(intent, body.detail, max_rows)
+    out, n, truncated = await spool_export(db, sql, params, body.format, max_rows)
+    size = out.seek(0, 2)
+    out.seek(0)
+
+    async def _body() -> AsyncIterator[bytes]:
+        try:
+            while True:
+                block = await asyncio.to_thread(out.read, READ_BLOCK)
+                if not block:
+                    break
+                yield block
+        finally:
+            out.close()
+
+    filename = f"trade_{meta.get('domain')}_{'detail' if body.detail else meta.get('calc')}.{body.format}"
+    return StreamingResponse(
+        _body(),
+        media_type=MEDIA_TYPES[body.format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(size),
+            "X-Row-Count": str(n),
+            "X-Truncated": "1" if truncated else "0",
+        },
+    )
@@ -0,0 +1,55 @@
+# app/api/metrics.py
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.analytics.metrics import registry
+from app.analytics.query_log import writer as query_log_writer
+from app.api.chat import last_results, series_cache
+from app.core.database import read_router
+from app.replica.cube import cubes
+from app.replica.engine import replica
+from app.services.chat_service import store
+from app.sql.categories import category_dims
+
+router = APIRouter()
+
+
+def _pool_stats():
+    out = []
+    for ep in read_router.endpoints:
+        pool = ep.engine.pool
+        out += [
+            ({"endpoint": ep.name, "state": "size"}, pool.size()),
+            ({"endpoint": ep.name, "state": "checked_out"}, pool.checkedout()),
+            ({"endpoint": ep.name, "state": "checked_in"}, pool.checkedin()),
+            ({"endpoint": ep.name, "state": "overflow"}, pool.overflow()),
+        ]
+    return out
+
+
+# scrape үед уншигдах gauge-ууд
+registry.gauge("trade_db_pool_connections", "SQLAlchemy pool connections by state", _pool_stats)
+registry.gauge("trade_db_endpoint_healthy", "Read endpoint health (1 = routable)", lambda: read_router.gauge("healthy"))
+registry.gauge("trade_db_endpoint_latency_ewma_ms", "Read endpoint EWMA latency used for routing", lambda: read_router.gauge("ewma_ms"))
+registry.gauge("trade_session_store_sessions", "Live conversation sessions in the session store", store.size)
+registry.gauge("trade_last_result_cache_sessions", "Sessions with a cached last result (this worker)", last_results.size)
+registry.gauge("trade_series_cache_entries", "Cached monthly series (this worker)", series_cache.size)
+registry.gauge("trade_query_log_queue_depth", "Query log events waiting to be written", query_log_writer.qsize)
+registry.gauge("trade_query_log_dropped", "Query log events dropped under backpressure (since start)", lambda: query_log_writer.dropped)
+
+registry.gauge("trade_cube_bytes", "In-memory trade cube size in bytes by view", lambda: cubes.gauge("bytes"))
+registry.gauge("trade_cube_cells", "Non-empty (hscode, country, month) cells by view", lambda: cubes.gauge("cells"))
+registry.gauge("trade_cube_build_seconds", "Last trade cube build time by view", lambda: cubes.gauge("build_seconds"))
+registry.gauge("trade_cube_age_seconds", "Seconds since the trade cube was last checked against SQL, by view", cubes.ages)
+registry.gauge("trade_category_dim_values", "Cached distinct category values by view and field", category_dims.gauge)
+
+if replica is not None:
+    registry.gauge("trade_replica_partitions", "Month partitions loaded from the local replica by view", replica.stats)
+    registry.gauge("trade_replica_age_seconds", "Seconds since the local replica was synced, by view", replica.ages)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
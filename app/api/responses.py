@@ -0,0 +1,70 @@
+# app/api/responses.py
+"""
+Хурдан JSON response: orjson (numpy array-г шууд, NaN → null) + Decimal/date дэмжлэг.
+
+FastAPI dict буцаахад jsonable_encoder бүх модыг Python-оор давтдаг; Response буцаавал
+түүнийг алгасна. orjson суулгаагүй бол stdlib json руу унана.
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import json
+import math
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+# lean profile-д хасагдах debug meta (answer/result/suggestions/choices/needs_clarification үлдэнэ)
+LEAN_DROP_META = ("state", "intent", "intent_raw", "sql_meta", "overrides", "q_final", "pending_question", "timings_ms", "guard")
+
+
+def lean_payload(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    (lean payload, хасагдсан meta) — эх payload-ийг өөрчлөхгүй.
+    """
+    meta = payload.get("meta")
+    if not isinstance(meta, dict):
+        return payload, None
+    dropped = {k: meta[k] for k in LEAN_DROP_META if k in meta}
+    if not dropped:
+        return payload, None
+    return {**payload, "meta": {k: v for k, v in meta.items() if k not in dropped}}, dropped
+
+
+def json_default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "f":
+            return [None if math.isnan(x) else x for x in obj.tolist()]
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (_dt.date, _dt.datetime)):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(content, ensure_ascii=False, default=json_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,92 @@
+# app/api/stream.py
+"""
+Том structured query-г NDJSON-оор урсгана (server-side cursor, санах ой тогтмол).
+
+POST /query/stream  {"intent": {...}} эсвэл {"session_id": "..."}  (+ "detail": true → view-ийн бүх багана)
+
+Мөрүүд:
+  {"meta": {...sql_meta, "columns": [...]}}
+  {...row...}                        (мөр бүр нэг JSON object)
+  {"done": true, "rows": N, "truncated": false}
+Алдаа stream дундуур гарвал сүүлийн мөр нь {"error": "..."}.
+"""
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.analytics.cost_guard import timeout_for
+from app.api.chat import canonicalize_intent, last_results, require_key
+from app.api.responses import dumps
+from app.core.config import settings
+from app.core.database import LazySession, get_db
+from app.conversation.models import ConversationState
+from app.models.intent import StreamRequest
+from app.services.chat_service import store as session_store
+from app.sql.builder import build_detail_sql, build_sql, with_row_limit
+
+router = APIRouter()
+
+_EMPTY_STATE = ConversationState().model_dump()
+
+
+def resolve_intent(intent: Any, session_id: Any) -> Dict[str, Any]:
+    """
+    Body-ийн intent, эс бөгөөс session-ий сүүлийн intent.
+    last_results нь worker-local (LRU) тул зөвхөн hit бол ашиглана; үгүй бол shared session
+    store-ийн state → /chat-тай ижил to_intent() (өөр worker / evict болсон ч ажиллана).
+    """
+    if intent:
+        return dict(intent)
+    if not session_id:
+        raise HTTPException(status_code=400, detail="intent эсвэл session_id шаардлагатай")
+
+    cached = last_results.get(session_id)
+    if cached is not None:
+        return dict(cached.intent)
+
+    state = session_store.get(session_id)
+    if state.dump() == _EMPTY_STATE:
+        raise HTTPException(status_code=400, detail="session_id-д асуулт алга (эхлээд /chat)")
+    return canonicalize_intent(state.to_intent(), state, "")
+
+
+def stream_query(intent: Dict[str, Any], detail: bool, max_rows: int) -> Tuple[Any, Dict[str, Any], Dict[str, Any]]:
+    # max_rows + 1: хязгаарт хүрсэн эсэхийг (truncated) мэдэхийн тулд
+    sql, params, meta = build_detail_sql(intent) if detail else build_sql(intent, "")
+    sql, params = with_row_limit(sql, params, max_rows + 1)
+    return sql, params, meta
+
+
+@router.post("/query/stream")
+async def query_stream(
+    body: StreamRequest,
+    dep: str = Depends(require_key),
+    db: LazySession = Depends(get_db),
+):
+    intent = resolve_intent(body.intent, body.session_id)
+    max_rows = min(body.max_rows or settings.stream_max_rows, settings.stream_max_rows)
+    sql, params, meta = stream_query(intent, body.detail, max_rows)
+
+    async def _lines() -> AsyncIterator[bytes]:
+        n = seen = 0
+        sent_meta = False
+        try:
+            async for chunk in db.stream(sql, params, timeout_ms=timeout_for("stream"), chunk_rows=settings.stream_chunk_rows):
+                if not sent_meta:
+                    yield dumps({"meta": {**meta, "columns": list(chunk[0].keys()) if chunk else []}}) + b"\n"
+                    sent_meta = True
+                seen += len(chunk)
+                take = chunk[: max(max_rows - n, 0)]
+                n += len(take)
+                if take:
+                    yield b"\n".join(dumps(row) for row in take) + b"\n"
+            if not sent_meta:
+                yield dumps({"meta": {**meta, "columns": []}}) + b"\n"
+            yield dumps({"done": True, "rows": n, "truncated": seen > max_rows}) + b"\n"
+        except Exception as e:
+            yield dumps({"error": f"{type(e).__name__}: {e}"[:500]}) + b"\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
@@ -10,7 +10,7 @@ def needs_clarification(s: ConversationState) -> Optional[Dict[str, Any]]:
     # ❌ metric clarify-г авна (backend өөрөө infer хийж чадна)
 
     # ⏱ time clarify — зөвхөн explicit огноо, latest байхгүй үед
-    if not (s.time.year or s.time.years or getattr(s.time, "latest", False)):
+    if not (s.time.year or s.time.years or s.time.start or getattr(s.time, "latest", False)):
         return {
             "question": "Аль оны мэдээлэл вэ?",
             "choices": [
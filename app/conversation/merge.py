@@ -1,5 +1,5 @@
 # app/conversation/merge.py
-from .models import ConversationState, Intent, Commodity
+from .models import WINDOW_CALCS, ConversationState, Intent, Commodity
 
 HS_LABEL_MAP = {
     "2701": "нүүрс",
@@ -9,6 +9,12 @@ HS_LABEL_MAP = {
 }
 
 
+def _clear_range(s: ConversationState) -> None:
+    if s.time.start is not None or s.time.end is not None:
+        s.time.start = None
+        s.time.end = None
+
+
 def merge_intent(
     prev: ConversationState,
     intent: Intent,
@@ -17,7 +23,7 @@ def merge_intent(
     """
     Previous state + шинэ intent + follow-up override-уудыг нэгтгэнэ
     """
-    s = prev.model_copy(deep=True)
+    s = prev.cow_copy()
 
     # --- base intent ---
     if intent.domain:
@@ -26,19 +32,36 @@ def merge_intent(
     if intent.metric:
         s.metric = intent.metric
 
+    # ✅ mom / rolling_12m / cagr: intent-ийн calc-аар шинэчлэгдэнэ (calc-гүй intent бол хэвээр)
+    if intent.calc in WINDOW_CALCS:
+        s.analysis = intent.calc
+    elif intent.calc and s.analysis is not None:
+        s.analysis = None
+
     # base time from intent
+    has_range = isinstance(intent.time, dict) and bool(intent.time.get("start")) and bool(intent.time.get("end"))
     if intent.time:
         # ✅ years эхэлж (multi-year) → year-г clear
         if "years" in intent.time and intent.time["years"]:
             s.time.years = intent.time["years"]
             s.time.year = None
             s.time.latest = False
+            _clear_range(s)
 
         # ✅ year → years-г clear
         if "year" in intent.time and intent.time["year"]:
             s.time.year = intent.time["year"]
             s.time.years = None
             s.time.latest = False
+            _clear_range(s)
+
+        # ✅ сарын range (timeseries_range) → year/years-г clear
+        if has_range:
+            s.time.start = {"year": int(intent.time["start"]["year"]), "month": int(intent.time["start"].get("month") or 1)}
+            s.time.end = {"year": int(intent.time["end"]["year"]), "month": int(intent.time["end"].get("month") or 12)}
+            s.time.year = None
+            s.time.years = None
+            s.time.latest = False
 
         # ✅ explicit latest (хэрвээ intent_extractor ингэж өгдөг бол)
         if intent.time == "latest" or (
@@ -47,6 +70,7 @@ def merge_intent(
             s.time.latest = True
             s.time.year = None
             s.time.years = None
+            _clear_range(s)
 
     # commodity (HS → label)
     filters = intent.filters or {}
@@ -72,22 +96,27 @@ def merge_intent(
     # ✅ granularity (сар/жил)
     if overrides.get("granularity"):
         s.time.granularity = overrides["granularity"]
+        s.analysis = None
 
     # ✅ time overrides MUST be independent of granularity
-    if overrides.get("year"):
+    # (intent нь сарын range авчирсан бол түүний он/сар нь year/years override-оос нарийн)
+    if overrides.get("year") and not has_range:
         s.time.year = overrides["year"]
         s.time.years = None
         s.time.latest = False
+        _clear_range(s)
 
-    if overrides.get("years"):
+    if overrides.get("years") and not has_range:
         s.time.years = overrides["years"]
         s.time.year = None
         s.time.latest = False
+        _clear_range(s)
 
     if overrides.get("latest") is True:
         s.time.latest = True
         s.time.year = None
         s.time.years = None
+        _clear_range(s)
 
     # scale
     if overrides.get("scale_label"):
@@ -107,7 +136,7 @@ def apply_compare_prev_year(s: ConversationState) -> ConversationState:
     """
     “өмнөх онтой харьцуулах” гэвэл
     """
-    out = s.model_copy(deep=True)
+    out = s.cow_copy()
 
     if isinstance(out.time.year, int) and out.time.year >= 1900 and not out.time.years:
         out.time.years = [out.time.year - 1, out.time.year]
@@ -1,21 +1,55 @@
 # D:\DataAnalystBot\app\conversation\models.py
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Literal
-from pydantic import BaseModel, Field, model_validator
+import itertools
+from typing import Any, Dict, List, Optional, Literal, Tuple, Union
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 
 Domain = Literal["export", "import"]
 Metric = Literal["amountUSD", "quantity", "weighted_price"]
 Granularity = Literal["month", "year"]
 ScaleLabel = Literal["сая", "мянга"]
+WindowCalc = Literal["mom", "rolling_12m", "cagr"]
+WINDOW_CALCS = ("mom", "rolling_12m", "cagr")
+
+# ✅ revision counter: field өөрчлөгдөх бүрт шинэ (глобал давтагдашгүй) дугаар авна
+_REV = itertools.count(1)
+
+
+def _copy_json(v: Any) -> Any:
+    # dict/list-ийн хурдан deep copy (copy.deepcopy-оос хямд; JSON төрлүүд л байна)
+    if isinstance(v, dict):
+        return {k: _copy_json(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_copy_json(x) for x in v]
+    return v
+
+
+def _touch(model: BaseModel) -> None:
+    priv = getattr(model, "__pydantic_private__", None)
+    if priv is not None:
+        priv["_rev"] = next(_REV)
 
 
 class TimeSpec(BaseModel):
     year: Optional[int] = None
     years: Optional[List[int]] = None
+    # ✅ сарын range: {"year", "month"} (timeseries_range)
+    start: Optional[Dict[str, int]] = None
+    end: Optional[Dict[str, int]] = None
     granularity: Optional[str] = None  # "month" | "year"
     latest: bool = False  # ✅ add (байхгүй бол нэм)
 
+    _rev: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context: Any) -> None:
+        _touch(self)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            _touch(self)
+
     @model_validator(mode="after")
     def _normalize_time(self) -> "TimeSpec":
         # years өгөгдвөл year-г цэвэрлэнэ
@@ -35,24 +69,37 @@ class TimeSpec(BaseModel):
             if self.year is not None:
                 self.years = None
 
+        # range бол year/years байх ёсгүй (хоёулаа байх ёстой)
+        if self.start and self.end:
+            self.year = None
+            self.years = None
+        else:
+            self.start = None
+            self.end = None
+
         # latest бол year/years байх ёсгүй
         if self.latest:
             self.year = None
             self.years = None
+            self.start = None
+            self.end = None
 
         return self
 
 
 class Commodity(BaseModel):
+    # ✅ immutable: state-үүдийн хооронд хуваалцагдана (in-place append боломжгүй)
+    model_config = ConfigDict(frozen=True)
+
     label: Optional[str] = None
-    hscode: Optional[List[str]] = None
+    hscode: Optional[Tuple[str, ...]] = None
 
 
 class Intent(BaseModel):
     domain: Optional[Domain] = None               # export | import
     metric: Optional[Metric] = None               # amountUSD | quantity | weighted_price
     calc: Optional[str] = None
-    time: Optional[Dict[str, Any]] = None
+    time: Optional[Union[Literal["latest"], Dict[str, Any]]] = None  # ✅ "latest" string ч ирнэ
     filters: Optional[Dict[str, Any]] = None
 
 
@@ -68,6 +115,55 @@ class ConversationState(BaseModel):
     commodity: Optional[Commodity] = None
 
     scale_label: Optional[ScaleLabel] = None      # "сая" | "мянга"
+    analysis: Optional[WindowCalc] = None         # ✅ mom | rolling_12m | cagr (granularity calc-ийг дарна)
+
+    # ✅ cached model_dump(): (self._rev, time._rev) өөрчлөгдвөл хүчингүй болно
+    _rev: int = PrivateAttr(default=0)
+    _dump_cache: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        _touch(self)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            _touch(self)
+
+    def dump(self) -> Dict[str, Any]:
+        """
+        model_dump()-ийн cached хувилбар (meta/explain-д олон удаа ашиглана).
+        - Буцаасан dict-ийг read-only гэж үзнэ
+        - time.* өөрчлөлтийг мэдэрнэ; commodity нь frozen, pending_clarify-г
+          шинэ dict-ээр солино (assignment → _rev)
+        """
+        key = (self._rev, self.time._rev)
+        cached = self._dump_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        data = self.model_dump()
+        self._dump_cache = (key, data)
+        return data
+
+    def cow_copy(self) -> "ConversationState":
+        """
+        Copy-on-write хуулбар: mutable nested утгууд (time, түүний years/start/end,
+        pending_clarify) хуулагдана; зөвхөн frozen commodity хуваалцагдана.
+        """
+        # __dict__-ээр шууд солино (__setattr__ биш) → _rev хадгалагдаж, ижил өгөгдөлд dump cache хүчинтэй
+        time = self.time.model_copy()
+        td = time.__dict__
+        for k in ("start", "end"):
+            if td[k] is not None:
+                td[k] = dict(td[k])
+        if td["years"] is not None:
+            td["years"] = list(td["years"])
+
+        out = self.model_copy()
+        out.__dict__["time"] = time
+        if self.pending_clarify is not None:
+            out.__dict__["pending_clarify"] = _copy_json(self.pending_clarify)
+        return out
 
     def to_intent(self) -> Dict[str, Any]:
         """
@@ -84,19 +180,29 @@ class ConversationState(BaseModel):
         if self.time.latest:
             intent["time"] = "latest"
         else:
-            if self.time.years:
+            if self.time.start and self.time.end:
+                intent["time"] = {"start": dict(self.time.start), "end": dict(self.time.end)}
+            elif self.time.years:
                 intent["time"]["years"] = self.time.years
             elif self.time.year:
                 intent["time"]["year"] = self.time.year
 
         # -------- filters --------
         if self.commodity and self.commodity.hscode:
-            intent["filters"]["hscode"] = self.commodity.hscode
+            intent["filters"]["hscode"] = list(self.commodity.hscode)
 
         # -------- calc from granularity --------
-        if self.time.granularity == "month":
-            intent["calc"] = "timeseries_month"
+        has_range = bool(self.time.start and self.time.end)
+        if has_range and self.time.granularity != "year":
+            intent["calc"] = "timeseries_range"
+        elif self.time.granularity == "month":
+            # ✅ олон он + сар бүр → нэг range series (он тус бүрээр request хийхгүй)
+            intent["calc"] = "timeseries_range" if self.time.years else "timeseries_month"
         elif self.time.granularity == "year":
             intent["calc"] = "timeseries_year"
 
+        # -------- window calc (time-ийг builder өөрөө хүрээ болгоно) --------
+        if self.analysis:
+            intent["calc"] = self.analysis
+
         return intent
\ No newline at end of file
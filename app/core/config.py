@@ -13,6 +13,87 @@ class Settings:
     timezone: str = os.getenv("TIMEZONE", "Asia/Ulaanbaatar").strip()
     api_key: str = os.getenv("API_KEY", "dev-key-123").strip()
 
+    # read replica-ууд (comma-separated); analytic SELECT-үүд эдгээр рүү, primary нь зөвхөн fallback
+    database_read_urls: tuple = tuple(u.strip() for u in os.getenv("DATABASE_READ_URLS", "").split(",") if u.strip())
+    read_health_seconds: float = float(os.getenv("READ_HEALTH_SECONDS", "10"))
+
+    # Postgres pool (SQLAlchemy QueuePool; connection зөвхөн query ажиллах үед checkout хийгдэнэ)
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "-1"))  # -1 = recycle хийхгүй
+
+    # NDJSON stream / export: server-side cursor chunk + мөрийн дээд хязгаар
+    stream_chunk_rows: int = int(os.getenv("STREAM_CHUNK_ROWS", "2000"))
+    stream_max_rows: int = int(os.getenv("STREAM_MAX_ROWS", "1000000"))
+    # export файлыг хэдэн byte хүртэл санах ойд, түүнээс дээш temp файлд spool хийх
+    export_spool_bytes: int = int(os.getenv("EXPORT_SPOOL_BYTES", str(16 * 1024 * 1024)))
+
+    # query cost guard: calc бүрийн statement_timeout (0 = хязгааргүй) + EXPLAIN cost босго (0 = унтраана)
+    statement_timeout_ms: int = int(os.getenv("STATEMENT_TIMEOUT_MS", "15000"))
+    statement_timeouts: str = os.getenv("STATEMENT_TIMEOUTS", "").strip()  # "calc:ms,calc:ms"
+    query_max_cost: float = float(os.getenv("QUERY_MAX_COST", "0"))
+
+    # session store: "memory" (нэг worker) | "sqlite" (олон worker, нэг машин)
+    session_backend: str = os.getenv("SESSION_BACKEND", "memory").strip().lower()
+    session_db_path: str = os.getenv("SESSION_DB_PATH", "data/sessions.sqlite3").strip()
+    session_ttl_seconds: int = int(os.getenv("SESSION_TTL_SECONDS", str(6 * 60 * 60)))
+
+    # query log (background writer + rotation)
+    query_log_path: str = os.getenv("QUERY_LOG_PATH", "logs/query_log.jsonl").strip()
+    query_log_queue_size: int = int(os.getenv("QUERY_LOG_QUEUE_SIZE", "10000"))
+    query_log_batch_size: int = int(os.getenv("QUERY_LOG_BATCH_SIZE", "200"))
+    query_log_flush_seconds: float = float(os.getenv("QUERY_LOG_FLUSH_SECONDS", "1.0"))
+    query_log_max_bytes: int = int(os.getenv("QUERY_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+    query_log_rotate_seconds: int = int(os.getenv("QUERY_LOG_ROTATE_SECONDS", str(24 * 60 * 60)))
+    query_log_backups: int = int(os.getenv("QUERY_LOG_BACKUPS", "30"))
+
+    # /chat series result-ийн default хэлбэр: "rows" (point бүр dict) | "columnar" (parallel arrays)
+    result_format: str = os.getenv("RESULT_FORMAT", "rows").strip().lower()
+
+    # response meta: "debug" (state/intent/sql_meta...) | "lean" (answer/result/suggestions/choices)
+    response_profile: str = os.getenv("RESPONSE_PROFILE", "debug").strip().lower()
+    # API key бүрийн profile: "key1:lean,key2:debug" (app.core.security)
+    api_key_profiles: str = os.getenv("API_KEY_PROFILES", "").strip()
+    # lean-ээр хэмнэсэн byte-ийг хэмжих response-ийн хувь (хэмжилт = хасагдсан meta-г дахин serialize)
+    lean_savings_sample: float = float(os.getenv("LEAN_SAVINGS_SAMPLE", "0.02"))
+    # энэнээс том response-ийг gzip/br-ээр шахна (0 бол унтраана)
+    compress_min_bytes: int = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+    # per-stage latency timings-ийг response meta-д оруулах (debug)
+    trace_in_meta: bool = os.getenv("TRACE_IN_META", "0").strip() in ("1", "true", "yes")
+
+    # slow query capture (0 бол унтраана) + EXPLAIN (ANALYZE, BUFFERS) sample rate
+    slow_query_ms: float = float(os.getenv("SLOW_QUERY_MS", "1500"))
+    slow_query_explain_sample: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.2"))
+    slow_query_log_path: str = os.getenv("SLOW_QUERY_LOG_PATH", "logs/slow_query.jsonl").strip()
+
+    # local columnar replica (python -m app.replica.sync); байхгүй/хуучирсан бол Postgres
+    replica_enabled: bool = os.getenv("REPLICA_ENABLED", "1").strip() in ("1", "true", "yes")
+    replica_dir: str = os.getenv("REPLICA_DIR", "data/replica").strip()
+    replica_reload_seconds: float = float(os.getenv("REPLICA_RELOAD_SECONDS", "30"))
+    replica_max_age_seconds: float = float(os.getenv("REPLICA_MAX_AGE_SECONDS", "0"))  # 0 = хязгааргүй
+
+    # replica + cube incremental refresh (0 бол app дотор ажиллахгүй; python -m app.replica.refresh)
+    refresh_interval_seconds: float = float(os.getenv("REFRESH_INTERVAL_SECONDS", "0"))
+
+    # trade cube: versioned .npy (mmap, worker-ууд хуваалцана); байхгүй бол startup дээр нэг worker build хийнэ
+    # ✅ default: зөвхөн app дотор refresh тохируулсан үед асна (эс бөгөөс шинэ сар орсныг мэдэхгүй)
+    cube_enabled: bool = os.getenv(
+        "CUBE_ENABLED", "1" if float(os.getenv("REFRESH_INTERVAL_SECONDS", "0")) > 0 else "0"
+    ).strip() in ("1", "true", "yes")
+    cube_dir: str = os.getenv("CUBE_DIR", "data/cube").strip()
+    cube_check_seconds: float = float(os.getenv("CUBE_CHECK_SECONDS", "10"))
+    cube_keep_versions: int = int(os.getenv("CUBE_KEEP_VERSIONS", "3"))
+    # сүүлд SQL-тэй тулгаснаас (build/refresh) хойш ийм удаан бол cube хариулахгүй (0 = хязгааргүй)
+    cube_max_age_seconds: float = float(os.getenv(
+        "CUBE_MAX_AGE_SECONDS",
+        str(3 * float(os.getenv("REFRESH_INTERVAL_SECONDS", "0")) or 24 * 60 * 60),
+    ))
+
+    # category view-уудын purpose/sub1–sub3 distinct утгууд (exact-match filter); 0 = зөвхөн startup
+    category_dim_refresh_seconds: float = float(os.getenv("CATEGORY_DIM_REFRESH_SECONDS", "3600"))
+
     def validate(self) -> None:
         if not self.database_url:
             raise RuntimeError("DATABASE_URL missing in environment")
@@ -1,19 +1,248 @@
 from __future__ import annotations
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import asyncio
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
+from app.analytics.metrics import DB_POOL_WAIT, DB_READ_LATENCY, DB_READ_QUERIES
 from app.core.config import settings
 
-engine = create_async_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    connect_args={
-        "ssl": "require",
-        "statement_cache_size": 0,  # ✅ PgBouncer(transaction) fix
-    },
-)
+log = logging.getLogger(__name__)
+
+# Postgres query_canceled (statement_timeout) — query-ийн алдаа, endpoint эвдэрсэн биш
+_TIMEOUT_SQLSTATE = "57014"
+EWMA_ALPHA = 0.2
+
+
+def _make_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args={
+            "ssl": "require",
+            "statement_cache_size": 0,  # ✅ PgBouncer(transaction) fix
+        },
+    )
+
+
+engine = _make_engine(settings.database_url)
 
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
-async def get_db() -> AsyncSession:
-    async with SessionLocal() as db:
-        yield db
\ No newline at end of file
+
+class Endpoint:
+    """
+    Нэг Postgres endpoint (primary эсвэл read replica): engine + EWMA latency + health.
+    """
+
+    def __init__(self, name: str, engine: AsyncEngine, primary: bool = False):
+        self.name = name
+        self.engine = engine
+        self.sessions = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        self.primary = primary
+        self.healthy = True
+        self.ewma_ms: Optional[float] = None
+        self.inflight = 0
+        self.failures = 0
+
+    def observe(self, ms: float) -> None:
+        self.ewma_ms = ms if self.ewma_ms is None else (1 - EWMA_ALPHA) * self.ewma_ms + EWMA_ALPHA * ms
+
+    def score(self) -> float:
+        # хэмжилтгүй endpoint-ийг эхэлж туршина; ачаалалтай нь (inflight) хүндрэнэ
+        return (self.ewma_ms or 0.0) * (1 + self.inflight)
+
+
+def endpoint_name(url: str) -> str:
+    # credential-гүй label (host:port/db)
+    try:
+        u = make_url(url)
+        return f"{u.host or 'local'}:{u.port or 5432}/{u.database or ''}"
+    except Exception:
+        return "unknown"
+
+
+def is_endpoint_failure(e: BaseException) -> bool:
+    """
+    Connection түвшний алдаа (өөр endpoint дээр дахин оролдож болно) эсэх.
+    SQL/statement_timeout алдаа бол False.
+    """
+    if isinstance(e, (OSError, asyncio.TimeoutError, exc.TimeoutError, exc.InterfaceError)):
+        return True
+    if isinstance(e, exc.DBAPIError):
+        orig = getattr(e, "orig", None)
+        if getattr(orig, "sqlstate", None) == _TIMEOUT_SQLSTATE or getattr(orig, "pgcode", None) == _TIMEOUT_SQLSTATE:
+            return False
+        return bool(e.connection_invalidated) or isinstance(e, exc.OperationalError)
+    return False
+
+
+class ReadRouter:
+    """
+    Analytic SELECT-үүдийг DATABASE_READ_URLS replica-ууд руу тараана; primary нь зөвхөн fallback.
+
+    - сонголт: healthy replica-уудаас санамсаргүй 2-ыг аваад EWMA latency × (1 + inflight) бага нь
+      (power of two choices → удаан replica бага ачаалал авна, нэг рүү бөөгнөрөхгүй)
+    - query connection алдаагаар унавал endpoint-ийг unhealthy болгож дараагийнх руу (эцэст нь primary)
+    - health_loop: READ_HEALTH_SECONDS тутам SELECT 1 → healthy/latency шинэчилнэ
+    """
+
+    def __init__(self, primary: Endpoint, replicas: Sequence[Endpoint] = ()):
+        self.primary = primary
+        self.replicas: List[Endpoint] = list(replicas)
+
+    @property
+    def endpoints(self) -> List[Endpoint]:
+        return [*self.replicas, self.primary]
+
+    def pick(self, exclude: Sequence[Endpoint] = ()) -> Endpoint:
+        live = [ep for ep in self.replicas if ep.healthy and ep not in exclude]
+        if not live:
+            return self.primary
+        if len(live) == 1:
+            return live[0]
+        a, b = random.sample(live, 2)
+        return a if a.score() <= b.score() else b
+
+    def mark_down(self, ep: Endpoint, e: BaseException) -> None:
+        ep.failures += 1
+        if not ep.primary and ep.healthy:
+            ep.healthy = False
+            log.warning("read endpoint %s marked down: %s: %s", ep.name, type(e).__name__, e)
+
+    async def check(self, ep: Endpoint, timeout: float = 2.0) -> bool:
+        t0 = time.perf_counter()
+        try:
+            async with ep.engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout)
+        except Exception as e:
+            self.mark_down(ep, e)
+            return False
+        ep.observe((time.perf_counter() - t0) * 1000.0)
+        if not ep.healthy:
+            log.info("read endpoint %s is back", ep.name)
+        ep.healthy = True
+        return True
+
+    async def health_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.gather(*(self.check(ep) for ep in self.replicas), return_exceptions=True)
+            await asyncio.sleep(interval)
+
+    def gauge(self, attr: str):
+        out = []
+        for ep in self.endpoints:
+            v = getattr(ep, attr)
+            if v is not None:
+                out.append(({"endpoint": ep.name}, float(v)))
+        return out
+
+    async def dispose(self) -> None:
+        # primary (= module-ийн engine / SessionLocal) мөн энд хаагдана — shutdown-ий ганц дуудлага
+        for ep in self.endpoints:
+            await ep.engine.dispose()
+
+
+read_router = ReadRouter(
+    Endpoint("primary", engine, primary=True),
+    [Endpoint(endpoint_name(u), _make_engine(u)) for u in settings.database_read_urls],
+)
+
+
+class LazySession:
+    """
+    Request-ийн DB handle: connection-ийг эхний execute дээр л pool-оос авч, query дууссаны
+    дараа шууд буцаана. Smalltalk/clarify/cache hit request-ууд pool slot огт эзлэхгүй,
+    SQL-тэй request ч LLM тайлбар хүлээх зуур connection барихгүй.
+
+    Query бүр read_router-оор endpoint сонгоно (replica байхгүй бол primary).
+    AsyncSession.execute-ийн Result бүрэн buffered тул session хаагдсаны дараа уншиж болно.
+    """
+
+    def __init__(self, router: ReadRouter = read_router):
+        self._router = router
+        self.queries = 0
+
+    async def _run(self, ep: Endpoint, sql: Any, params: Optional[Dict[str, Any]], timeout_ms: Optional[int]):
+        ep.inflight += 1
+        t0 = time.perf_counter()
+        try:
+            async with ep.sessions() as db:
+                await db.connection()  # pool checkout (+ pre_ping)
+                DB_POOL_WAIT.observe(time.perf_counter() - t0)
+                if timeout_ms:
+                    # SET LOCAL: энэ transaction-д л (PgBouncer transaction mode-д аюулгүй)
+                    await db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+                return await db.execute(sql, params)
+        finally:
+            ep.inflight -= 1
+            ms = (time.perf_counter() - t0) * 1000.0
+            ep.observe(ms)
+            DB_READ_LATENCY.observe(ms / 1000.0, endpoint=ep.name)
+
+    async def execute(self, sql: Any, params: Optional[Dict[str, Any]] = None, timeout_ms: Optional[int] = None):
+        tried: List[Endpoint] = []
+        while True:
+            ep = self._router.pick(exclude=tried)
+            self.queries += 1
+            try:
+                r = await self._run(ep, sql, params, timeout_ms)
+            except Exception as e:
+                failover = is_endpoint_failure(e) and not ep.primary
+                DB_READ_QUERIES.inc(endpoint=ep.name, outcome="failover" if failover else "error")
+                if not failover:
+                    raise
+                self._router.mark_down(ep, e)
+                tried.append(ep)
+                continue
+            DB_READ_QUERIES.inc(endpoint=ep.name, outcome="ok")
+            return r
+
+    async def stream(
+        self,
+        sql: Any,
+        params: Optional[Dict[str, Any]] = None,
+        timeout_ms: Optional[int] = None,
+        chunk_rows: int = 1000,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Server-side cursor: мөрүүдийг chunk_rows-оор татна → санах ой result-ийн хэмжээнээс хамаарахгүй.
+        Connection нь stream дуустал (эсвэл client тасрах хүртэл) баригдана; failover хийхгүй.
+        """
+        ep = self._router.pick()
+        ep.inflight += 1
+        self.queries += 1
+        outcome = "stream"
+        t0 = time.perf_counter()
+        try:
+            async with ep.sessions() as db:
+                await db.connection()
+                DB_POOL_WAIT.observe(time.perf_counter() - t0)
+                if timeout_ms:
+                    await db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+                result = await db.stream(sql, params)
+                async for part in result.mappings().partitions(chunk_rows):
+                    yield [dict(x) for x in part]
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            ep.inflight -= 1
+            DB_READ_QUERIES.inc(endpoint=ep.name, outcome=outcome)
+
+    async def close(self) -> None:
+        return None
+
+
+async def get_db() -> AsyncIterator[LazySession]:
+    # session/connection нээхгүй — зөвхөн lazy handle
+    yield LazySession()
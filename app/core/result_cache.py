@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.sql.derive import MonthlyAgg, filters_key
+
+# Зөвхөн харагдах байдлыг өөрчилдөг follow-up override-ууд (SQL-д нөлөөлөхгүй)
+PRESENTATION_OVERRIDES = frozenset({"scale_label", "unit"})
+
+
+def intent_key(intent: Dict[str, Any]) -> str:
+    """
+    build_sql-д орох intent-ийн тогтвортой түлхүүр (build_sql filters-ийг in-place
+    өөрчилдөг тул build_sql-ээс ӨМНӨ авна).
+    """
+    return json.dumps(intent, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def is_presentation_only(overrides: Dict[str, Any]) -> bool:
+    keys = {k for k, v in (overrides or {}).items() if v}
+    return bool(keys) and keys <= PRESENTATION_OVERRIDES
+
+
+@dataclass
+class CachedResult:
+    key: str                   # intent_key(intent) before build_sql
+    intent: Dict[str, Any]     # final intent (after build_sql)
+    sql_meta: Dict[str, Any]
+    rows: List[Dict[str, Any]]
+    ts: float
+
+
+class LastResultStore:
+    """
+    Session бүрийн хамгийн сүүлийн raw rows + sql_meta (worker-local, LRU + TTL).
+    "сая нэгжээр" гэх мэт presentation-only follow-up-ийг DB-гүйгээр дахин render хийнэ.
+    """
+
+    def __init__(self, ttl_seconds: int = 30 * 60, max_sessions: int = 2000):
+        self.ttl = ttl_seconds
+        self.max_sessions = max_sessions
+        self._data: "OrderedDict[str, CachedResult]" = OrderedDict()
+
+    def get(self, session_id: str) -> Optional[CachedResult]:
+        session_id = session_id or "default"
+        item = self._data.get(session_id)
+        if item is None:
+            return None
+
+        if time.time() - item.ts > self.ttl:
+            self._data.pop(session_id, None)
+            return None
+
+        self._data.move_to_end(session_id)
+        return item
+
+    def set(
+        self,
+        session_id: str,
+        key: str,
+        intent: Dict[str, Any],
+        sql_meta: Dict[str, Any],
+        rows: List[Dict[str, Any]],
+    ) -> None:
+        session_id = session_id or "default"
+        self._data[session_id] = CachedResult(
+            key=key, intent=intent, sql_meta=sql_meta, rows=rows, ts=time.time()
+        )
+        self._data.move_to_end(session_id)
+        while len(self._data) > self.max_sessions:
+            self._data.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class SeriesCache:
+    """
+    Session бүрт татсан бүтэн жилийн monthly series (amount/qty-тэй) → (filters_key, year).
+    derive.compute_rows() эдгээрээс year_total / ytd / timeseries_year / yoy /
+    weighted_price-ийг DB-гүй бодно.
+    """
+
+    def __init__(self, ttl_seconds: int = 30 * 60, max_sessions: int = 2000, max_series: int = 32):
+        self.ttl = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_series = max_series
+        self._data: "OrderedDict[str, Tuple[float, OrderedDict[Tuple[str, int], List[Dict[str, Any]]]]]" = OrderedDict()
+
+    def _entry(self, session_id: str, create: bool) -> Optional["OrderedDict[Tuple[str, int], List[Dict[str, Any]]]"]:
+        item = self._data.get(session_id)
+        now = time.time()
+        if item is not None and now - item[0] > self.ttl:
+            self._data.pop(session_id, None)
+            item = None
+
+        if item is None:
+            if not create:
+                return None
+            item = (now, OrderedDict())
+            self._data[session_id] = item
+            while len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+
+        self._data.move_to_end(session_id)
+        return item[1]
+
+    def put(self, session_id: str, sql_meta: Dict[str, Any], rows: List[Dict[str, Any]]) -> None:
+        if sql_meta.get("calc") != "timeseries_month":
+            return
+        if rows and not ("amount" in rows[0] and "qty" in rows[0]):
+            return
+
+        t = sql_meta.get("time") or {}
+        if t.get("latest"):
+            # latest year series: rows-оос он нь тодорхой болно
+            years = {int(r["year"]) for r in rows if r.get("year") is not None}
+            if len(years) != 1:
+                return
+            year = years.pop()
+        else:
+            if t.get("year") is None or t.get("years"):
+                return
+            year = int(t["year"])
+
+        session_id = session_id or "default"
+        entry = self._entry(session_id, create=True)
+        self._data[session_id] = (time.time(), entry)
+
+        key = (filters_key(sql_meta), year)
+        entry[key] = rows
+        entry.move_to_end(key)
+        while len(entry) > self.max_series:
+            entry.popitem(last=False)
+
+    def monthly(self, session_id: str, sql_meta: Dict[str, Any]) -> Optional[MonthlyAgg]:
+        entry = self._entry(session_id or "default", create=False)
+        if not entry:
+            return None
+
+        fkey = filters_key(sql_meta)
+        years = [y for (k, y) in entry if k == fkey]
+        if not years:
+            return None
+
+        rows: List[Dict[str, Any]] = []
+        for y in years:
+            rows.extend(entry[(fkey, y)])
+        return MonthlyAgg.from_rows(rows, years)
+
+    def size(self) -> int:
+        return sum(len(entry) for _, entry in list(self._data.values()))
@@ -0,0 +1,40 @@
+# app/core/security.py
+"""
+API key → response profile.
+
+API_KEY_PROFILES="frontend-key:lean,ops-key:debug" — энд байгаа key-үүд API_KEY-тэй адил
+зөвшөөрөгдөнө. Жагсаалтад байхгүй key (API_KEY) нь RESPONSE_PROFILE-ийг авна.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+PROFILES = ("lean", "debug")
+
+
+def _parse_profiles(raw: str) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for part in (raw or "").split(","):
+        key, _, profile = part.strip().rpartition(":")
+        profile = profile.strip().lower()
+        if key.strip() and profile in PROFILES:
+            out[key.strip()] = profile
+    return out
+
+
+key_profiles = _parse_profiles(settings.api_key_profiles)
+
+
+def is_valid_key(key: Optional[str]) -> bool:
+    return bool(key) and (key == settings.api_key or key in key_profiles)
+
+
+def resolve_profile(key: Optional[str], requested: Optional[str] = None) -> str:
+    # request дээрх profile > key-ийн profile > RESPONSE_PROFILE
+    if requested in PROFILES:
+        return requested
+    if key and key in key_profiles:
+        return key_profiles[key]
+    return settings.response_profile if settings.response_profile in PROFILES else "debug"
@@ -1,11 +1,64 @@
 from __future__ import annotations
 
+import json
+import sqlite3
+import threading
 import time
-from typing import Dict, Tuple
+import zlib
+from pathlib import Path
+from typing import Dict, Protocol, Tuple
 
 from app.conversation.models import ConversationState
+from app.core.config import settings
 
 
+# -------- Serialization (compact binary) --------
+
+# 1 byte header: raw JSON эсвэл zlib-ээр шахсан JSON
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+_COMPRESS_MIN_BYTES = 256
+
+
+def encode_state(state: ConversationState) -> bytes:
+    """
+    ConversationState -> bytes.
+    Default утгуудыг хасаж, separator-гүй JSON болгоно; том бол zlib-ээр шахна.
+    """
+    payload = json.dumps(
+        state.model_dump(exclude_defaults=True),
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    if len(payload) >= _COMPRESS_MIN_BYTES:
+        packed = zlib.compress(payload, 1)
+        if len(packed) < len(payload):
+            return _ZLIB + packed
+    return _RAW + payload
+
+
+def decode_state(blob: bytes) -> ConversationState:
+    if not blob:
+        return ConversationState()
+    head, body = blob[:1], blob[1:]
+    if head == _ZLIB:
+        body = zlib.decompress(body)
+    return ConversationState.model_validate(json.loads(body.decode("utf-8")))
+
+
+# -------- Interface --------
+
+class SessionStore(Protocol):
+    def get(self, session_id: str) -> ConversationState: ...
+
+    def set(self, session_id: str, state: ConversationState) -> None: ...
+
+    def size(self) -> int: ...
+
+
+# -------- Backends --------
+
 class InMemorySessionStore:
     def __init__(self, ttl_seconds: int = 6 * 60 * 60):
         self.ttl = ttl_seconds
@@ -28,4 +81,93 @@ class InMemorySessionStore:
 
     def set(self, session_id: str, state: ConversationState) -> None:
         session_id = session_id or "default"
-        self._data[session_id] = (time.time(), state)
\ No newline at end of file
+        self._data[session_id] = (time.time(), state)
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class SQLiteSessionStore:
+    """
+    Нэг машин дээрх олон worker-т хуваалцах session store (SQLite WAL).
+    - гадны service шаардахгүй
+    - WAL + synchronous=NORMAL → get/set нь ~10-50µs
+    - path-ийг /dev/shm дээр заавал shared-memory backend болно
+    """
+
+    # set() бүрийн N дахь удаад хугацаа нь дууссан мөрүүдийг цэвэрлэнэ
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str, ttl_seconds: int = 6 * 60 * 60):
+        self.ttl = ttl_seconds
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " sid TEXT PRIMARY KEY,"
+            " ts REAL NOT NULL,"
+            " state BLOB NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connection нь thread хооронд хуваалцахгүй → thread бүрт нэг
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> ConversationState:
+        session_id = session_id or "default"
+        row = self._conn().execute(
+            "SELECT ts, state FROM sessions WHERE sid = ?", (session_id,)
+        ).fetchone()
+        if not row:
+            return ConversationState()
+
+        ts, blob = row
+        if time.time() - ts > self.ttl:
+            self._conn().execute("DELETE FROM sessions WHERE sid = ?", (session_id,))
+            return ConversationState()
+
+        try:
+            return decode_state(blob)
+        except Exception:
+            # эвдэрсэн/хуучин format → шинэ state
+            return ConversationState()
+
+    def set(self, session_id: str, state: ConversationState) -> None:
+        session_id = session_id or "default"
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (sid, ts, state) VALUES (?, ?, ?)",
+            (session_id, now, encode_state(state)),
+        )
+
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM sessions WHERE ts < ?", (now - self.ttl,))
+
+    def size(self) -> int:
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM sessions WHERE ts >= ?", (time.time() - self.ttl,)
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+
+def build_session_store() -> SessionStore:
+    """
+    SESSION_BACKEND=memory (default) | sqlite
+    """
+    if settings.session_backend == "sqlite":
+        return SQLiteSessionStore(settings.session_db_path, ttl_seconds=settings.session_ttl_seconds)
+    return InMemorySessionStore(ttl_seconds=settings.session_ttl_seconds)
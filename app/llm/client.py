@@ -8,6 +8,7 @@ from google import genai
 from google.genai import types
 from google.genai import errors as genai_errors
 
+from app.analytics.metrics import LLM_CALLS
 from app.core.config import settings
 
 
@@ -67,7 +68,9 @@ def llm_json(prompt: str) -> Dict[str, Any]:
             raise ValueError("Gemini returned empty response (json)")
 
         try:
-            return _safe_json_loads(raw)
+            out = _safe_json_loads(raw)
+            LLM_CALLS.inc(kind="json", outcome="ok")
+            return out
         except Exception as e1:
             retry_prompt = (
                 prompt
@@ -90,7 +93,9 @@ def llm_json(prompt: str) -> Dict[str, Any]:
                 raise ValueError("Gemini returned empty response on retry (json)")
 
             try:
-                return _safe_json_loads(raw2)
+                out = _safe_json_loads(raw2)
+                LLM_CALLS.inc(kind="json", outcome="ok_retry")
+                return out
             except Exception as e2:
                 dbg1 = raw[:1200]
                 dbg2 = raw2[:1200]
@@ -103,7 +108,9 @@ def llm_json(prompt: str) -> Dict[str, Any]:
     except Exception as e:
         # quota exceeded -> chat.py дээр fallback хийхийн тулд алдааг дээш нь гаргана
         if _is_quota_error(e):
+            LLM_CALLS.inc(kind="json", outcome="quota")
             raise
+        LLM_CALLS.inc(kind="json", outcome="error")
         raise
 
 
@@ -118,9 +125,13 @@ def llm_text(prompt: str) -> str:
             contents=prompt,
             config=types.GenerateContentConfig(temperature=0.4),
         )
-        return (resp.text or "").strip()
+        out = (resp.text or "").strip()
+        LLM_CALLS.inc(kind="text", outcome=("ok" if out else "empty"))
+        return out
 
     except Exception as e:
         if _is_quota_error(e):
+            LLM_CALLS.inc(kind="text", outcome="quota")
             return ""
+        LLM_CALLS.inc(kind="text", outcome="error")
         raise
\ No newline at end of file
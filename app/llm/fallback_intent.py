@@ -89,6 +89,60 @@ def _find_years_list(q: str) -> Optional[List[int]]:
     return None
 
 
+_MONTH_RANGE_WORDS = re.compile(
+    r"(20\d{2})\D{1,8}?(\d{1,2})(?:\s*-?\s*р)?\s*сар\S*\s*[-–]?\s*(20\d{2})\D{1,8}?(\d{1,2})(?:\s*-?\s*р)?\s*сар"
+)
+_MONTH_RANGE_DASH = re.compile(r"\b(20\d{2})[-./](\d{1,2})\s*[-–]\s*(20\d{2})[-./](\d{1,2})\b")
+_MONTHLY = re.compile(r"сар\s*бүр|сар\s*сар|сараар")
+_CAGR = re.compile(r"\bcagr\b|жилийн дундаж өсөлт")
+_ROLLING = re.compile(r"\b(?:rolling|ttm)\b|сүүлийн\s*12\s*сарын\s*(?:нийлбэр|гулсах)|12\s*сарын\s*гулсах")
+_MOM = re.compile(r"\bmom\b|өмнөх сартай|сарын өөрчлөлт|сар бүрийн өөрчлөлт")
+
+
+def _find_month_range(q: str) -> Optional[Dict[str, Dict[str, int]]]:
+    """
+    Explicit сарын range:
+    - "2023 оны 3 сараас 2025 оны 6 сар хүртэл" / "2023 оны 3-р сараас ..."
+    - "2023-03 – 2025-06" / "2023.03-2025.06"
+    """
+    qn = _norm(q)
+    # ихэнх асуултад аль нь ч тохирохгүй → regex-ийг алгасна
+    m = _MONTH_RANGE_WORDS.search(qn) if qn.count("сар") >= 2 else None
+    if not m and ("-" in qn or "–" in qn):
+        m = _MONTH_RANGE_DASH.search(qn)
+    if not m:
+        return None
+
+    y1, m1, y2, m2 = (int(g) for g in m.groups())
+    if not (1 <= m1 <= 12 and 1 <= m2 <= 12):
+        return None
+    if (y1, m1) > (y2, m2):
+        y1, m1, y2, m2 = y2, m2, y1, m1
+    return {"start": {"year": y1, "month": m1}, "end": {"year": y2, "month": m2}}
+
+
+def _wants_monthly(q: str) -> bool:
+    # "сар бүрээр", "сар сараар", "сараар"
+    qn = _norm(q)
+    return "сар" in qn and bool(_MONTHLY.search(qn))
+
+
+def _find_window_calc(q: str) -> Optional[str]:
+    """
+    - "өмнөх сартай харьцуулахад", "сарын өөрчлөлт", "mom" → mom
+    - "сүүлийн 12 сарын нийлбэр", "rolling", "ttm" → rolling_12m
+    - "жилийн дундаж өсөлт", "cagr" → cagr
+    """
+    qn = _norm(q)
+    if ("cagr" in qn or "өсөлт" in qn) and _CAGR.search(qn):
+        return "cagr"
+    if ("rolling" in qn or "ttm" in qn or "гулсах" in qn or "нийлбэр" in qn) and _ROLLING.search(qn):
+        return "rolling_12m"
+    if ("mom" in qn or "өмнөх сартай" in qn or "өөрчлөлт" in qn) and _MOM.search(qn):
+        return "mom"
+    return None
+
+
 def _infer_category_filters(question: str) -> Dict[str, str]:
     qn = _norm(question)
     out: Dict[str, str] = {}
@@ -168,11 +222,19 @@ def build_intent_fallback(
         metric = "amountUSD"
         calc = "month_value"
 
-    # ✅ timeseries_year heuristic (only when explicit multi-year is present)
+    # ✅ range timeseries: explicit сарын range, эсвэл олон он + "сар бүрээр"
+    month_range = _find_month_range(question)
     years_list = _find_years_list(question)
-    if years_list:
+    if month_range:
+        calc = "timeseries_range"
+        time: Any = month_range
+    elif years_list and _wants_monthly(question):
+        calc = "timeseries_range"
+        time = {"start": {"year": years_list[0], "month": 1}, "end": {"year": years_list[-1], "month": 12}}
+    # ✅ timeseries_year heuristic (only when explicit multi-year is present)
+    elif years_list:
         calc = "timeseries_year"
-        time: Any = {"years": years_list}
+        time = {"years": years_list}
     else:
         # time (single month/year/latest)
         y, m = _find_year_month(question)
@@ -186,6 +248,11 @@ def build_intent_fallback(
         else:
             time = "latest"
 
+    # ✅ window calc: хугацааг (year / years / range / latest) builder хүрээ болгоно
+    window_calc = _find_window_calc(question)
+    if window_calc:
+        calc = window_calc
+
     # If no category filter matched, infer HS code
     if not cat_filters:
         hs = _infer_hscode(question)
@@ -47,7 +47,8 @@ def detect_followup(text: str) -> Dict[str, Any]:
         out["latest"] = True
 
     # -------- compare prev year --------
-    if re.search(r"(харьцуул|compare|өмнөх\s+он|өнгөрсөн\s+он)", t):
+    # ("өмнөх сартай харьцуулах" нь mom calc — оны харьцуулалт биш)
+    if re.search(r"(харьцуул|compare|өмнөх\s+он|өнгөрсөн\s+он)", t) and not re.search(r"өмнөх\s+сар", t):
         out["compare_prev_year"] = True
 
     return out
\ No newline at end of file
@@ -25,10 +25,14 @@ INTENT_SCHEMA = {
                 "ytd",
                 "timeseries_month",
                 "timeseries_year",   # ✅ NEW
+                "timeseries_range",  # ✅ олон он дамнасан сар сарын series (time.start/end)
                 "yoy",
                 "avg_months",
                 "avg_years",
                 "weighted_price",
+                "mom",          # ✅ өмнөх сартай харьцуулсан өөрчлөлт (сар бүрээр)
+                "rolling_12m",  # ✅ сүүлийн 12 сарын нийлбэр (сар бүрээр)
+                "cagr",         # ✅ жилийн дундаж өсөлт (эхний ба эцсийн он)
             ],
         },
 
@@ -82,6 +86,30 @@ INTENT_SCHEMA = {
                         }
                     },
                 },
+                {
+                    # ✅ Range (e.g., 2023 оны 3 сараас 2025 оны 6 сар хүртэл, "2023–2025 сар бүрээр")
+                    "type": "object",
+                    "additionalProperties": False,
+                    "required": ["start", "end"],
+                    "properties": {
+                        "start": {
+                            "type": "object",
+                            "required": ["year"],
+                            "properties": {
+                                "year": {"type": "integer", "minimum": 1900, "maximum": 2100},
+                                "month": {"type": "integer", "minimum": 1, "maximum": 12},
+                            },
+                        },
+                        "end": {
+                            "type": "object",
+                            "required": ["year"],
+                            "properties": {
+                                "year": {"type": "integer", "minimum": 1900, "maximum": 2100},
+                                "month": {"type": "integer", "minimum": 1, "maximum": 12},
+                            },
+                        },
+                    },
+                },
             ]
         },
 
@@ -93,7 +121,7 @@ INTENT_SCHEMA = {
             "minimum": 1,
             "maximum": 60,
             "default": 3,
-            "description": "avg_months / avg_years үед ашиглана",
+            "description": "avg_months / avg_years үед, мөн cagr-д нэг он өгөгдвөл хэдэн жилээр",
         },
 
         # ------------------------
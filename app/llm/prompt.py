@@ -28,13 +28,14 @@ def build_intent_prompt(question: str) -> str:
 JSON бүтэц:
 {{
   "domain": "export" | "import",
-  "calc": "month_value" | "ytd" | "yoy" | "timeseries_month" | "timeseries_year" | "year_total" | "weighted_price" | "avg_months" | "avg_years",
+  "calc": "month_value" | "ytd" | "yoy" | "timeseries_month" | "timeseries_range" | "timeseries_year" | "year_total" | "weighted_price" | "avg_months" | "avg_years" | "mom" | "rolling_12m" | "cagr",
   "metric": "amountUSD" | "quantity" | "weighted_price",
   "time":
     "latest"
     | {{"year": 2025, "month": 3}}
     | {{"year": 2025}}
-    | {{"years": [2024, 2025]}},
+    | {{"years": [2024, 2025]}}
+    | {{"start": {{"year": 2023, "month": 1}}, "end": {{"year": 2025, "month": 12}}}},
   "filters": {{
      "hscode": "2701" | ["2701","2702"],
      "country": "China",
@@ -62,6 +63,7 @@ JSON бүтэц:
 - "YYYY онд" гэвэл time={{"year":YYYY}}
 - "YYYY, YYYY" (ж: "2024, 2025") эсвэл "YYYY-YYYY" (ж: "2024-2025") эсвэл "хоёр жил", "2 жил" гэвэл:
   time={{"years":[YYYY,YYYY]}} хэлбэрээр тавь
+- "YYYY оны M сараас YYYY оны M сар хүртэл" гэвэл time={{"start":{{"year":YYYY,"month":M}},"end":{{"year":YYYY,"month":M}}}}
 - огноо/он/сар дурдагдаагүй бол time="latest"
 
 3) CATEGORY (АНГИЛАЛ) — HS-ЭЭС ӨӨР
@@ -73,6 +75,7 @@ JSON бүтэц:
   - "хүнс" -> filters.sub2 = "Хүнс"
   - "тамхи" -> filters.sub3 = "Тамхи"
 ЖИЧ: filters.sub* / purpose дээр exact биш, түлхүүр үг ("Тамхи" гэх мэт) тавихад болно.
+Ангилал экспорт, импорт аль алинд ажиллана — domain-оо асуултаас ав.
 
 4) HS CODE / PRODUCT MAPPING (HS4)
 - "нийт экспорт", "нийт импорт", "бүх экспорт", "нийт дүн" гэвэл filters.hscode БИТГИЙ тавь
@@ -98,10 +101,19 @@ JSON бүтэц:
 - "сар сараар", "явц", "timeline" гэвэл calc="timeseries_month" ба time={{"year":YYYY}} хэлбэрийг сонго
 - "жилээр", "жилийн", "2024, 2025", "2024-2025", "хоёр жил", "2 жил", "хүснэгтээр" (жилүүдийг харьцуулж) гэвэл:
   calc="timeseries_year" ба time={{"years":[...]}}
+- олон он + "сар бүрээр"/"сар сараар" (ж: "2023–2025 сар бүрээр") эсвэл "... сараас ... сар хүртэл" гэвэл:
+  calc="timeseries_range" ба time={{"start":{{"year":2023,"month":1}},"end":{{"year":2025,"month":12}}}}
+  (сар заагаагүй бол start.month=1, end.month=12)
 
 - "YYYY онд ... нийт" гэвэл calc="year_total" + time={{"year":YYYY}}
 - "YYYY оны M сар" бол calc="month_value"
 
+- "өмнөх сартай харьцуулахад", "сарын өөрчлөлт", "MoM" гэвэл calc="mom"
+  (time нь year / start-end / "latest" байж болно; сар бүрийн өөрчлөлтийг %-иар гаргана)
+- "сүүлийн 12 сарын нийлбэр", "12 сарын гулсах", "rolling", "TTM" гэвэл calc="rolling_12m"
+- "жилийн дундаж өсөлт", "CAGR" гэвэл calc="cagr" ба time={{"years":[эхний он, эцсийн он]}}
+  (нэг он л өгсөн бол time={{"year":YYYY}}, window=жилийн тоо)
+
 7) AVG
 - "сүүлийн N сар(ын) дундаж" -> calc="avg_months", window=N
 - "сүүлийн N жил(ийн) дундаж" -> calc="avg_years", window=N
@@ -1,9 +1,25 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.chat import router as chat_router
+from app.api.compression import CompressionMiddleware
+from app.api.metrics import router as metrics_router
+from app.api.export import router as export_router
+from app.api.stream import router as stream_router
+from app.analytics.metrics import HTTP_LATENCY, HTTP_REQUESTS
+from app.analytics.query_log import writer as query_log_writer
+from app.analytics.slow_query import slow_writer
+from app.core.config import settings
+from app.core.database import read_router
+from app.replica.cube import cubes
+from app.replica.refresh import refresh_loop
+from app.sql.categories import category_dims
 
 # ✅ Truststore: optional (dev/VPN дээр хэрэгтэй байж болно), production дээр байхгүй байсан ч асна
 try:
@@ -27,6 +43,74 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # /export-ийн мөрийн тоо / хязгаарт хүрсэн эсэхийг frontend уншина
+    expose_headers=["X-Row-Count", "X-Truncated"],
 )
 
-app.include_router(chat_router)
\ No newline at end of file
+# ✅ том JSON response-ийг gzip/br (brotli optional)-ээр шахна
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compress_min_bytes)
+
+app.include_router(chat_router)
+app.include_router(metrics_router)
+app.include_router(stream_router)
+app.include_router(export_router)
+
+
+@app.middleware("http")
+async def _http_metrics(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # route template (/chat) ашиглана → path-аар label тэсрэхгүй
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        HTTP_REQUESTS.inc(route=path, method=request.method, status=str(status))
+        HTTP_LATENCY.observe(time.perf_counter() - t0, route=path)
+
+
+_cube_task: Optional[asyncio.Task] = None
+_refresh_task: Optional[asyncio.Task] = None
+_health_task: Optional[asyncio.Task] = None
+_category_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def _start_local_data() -> None:
+    # startup-ийг хүлээлгэхгүй: mmap version байхгүй бол build; бэлэн болтол replica/Postgres хариулна
+    global _cube_task, _refresh_task
+    if settings.cube_enabled:
+        _cube_task = asyncio.create_task(cubes.ensure_safe())
+    if settings.refresh_interval_seconds > 0:
+        _refresh_task = asyncio.create_task(refresh_loop(settings.refresh_interval_seconds))
+
+
+@app.on_event("startup")
+async def _start_read_health() -> None:
+    # read replica-ууд тохируулсан үед л health check (SELECT 1) ажиллана
+    global _health_task
+    if read_router.replicas:
+        _health_task = asyncio.create_task(read_router.health_loop(settings.read_health_seconds))
+
+
+@app.on_event("startup")
+async def _start_category_dims() -> None:
+    # ачаалагдтал category filter-үүд ILIKE-аар ажиллана
+    global _category_task
+    _category_task = asyncio.create_task(category_dims.refresh_loop(settings.category_dim_refresh_seconds))
+
+
+@app.on_event("shutdown")
+async def _flush_query_log() -> None:
+    # queue-д үлдсэн log-уудыг бичээд writer thread-ээ зогсооно
+    query_log_writer.close()
+    slow_writer.close()
+    # build/refresh дундуур бол lock + connection-оо суллатал хүлээнэ (engine dispose-оос өмнө)
+    tasks = [t for t in (_cube_task, _refresh_task, _health_task, _category_task) if t is not None]
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await read_router.dispose()
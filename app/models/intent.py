@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Literal, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -16,10 +16,14 @@ class Calc(str, Enum):
     ytd = "ytd"                            # он эхнээс (sum)
     yoy = "yoy"                            # өмнөх оны мөн үе (month vs prev year same month)
     timeseries_month = "timeseries_month"  # жил дотор сар сараар (series)
+    timeseries_range = "timeseries_range"  # (start_year, start_month) → (end_year, end_month) сар сараар
     year_total = "year_total"              # тухайн жилийн нийлбэр
     avg_months = "avg_months"              # сүүлийн N сарын дундаж (month_value-ийн average)
     avg_years = "avg_years"                # сүүлийн N жилийн дундаж (year_total-ийн average)
     weighted_price = "weighted_price"      # sum(amountUSD)/sum(quantity)
+    mom = "mom"                            # өмнөх сартай харьцуулсан өөрчлөлт (series, LAG)
+    rolling_12m = "rolling_12m"            # сүүлийн 12 сарын нийлбэр сар бүрээр (series)
+    cagr = "cagr"                          # жилийн дундаж өсөлт (compound), эхний/эцсийн оны нийлбэрээр
 
 
 class Metric(str, Enum):
@@ -37,7 +41,12 @@ class TimeYear(BaseModel):
     year: int = Field(..., ge=1900, le=2100)
 
 
-TimeField = Union[str, TimeMonth, TimeYear]  # "latest" | {year,month} | {year}
+class TimeRange(BaseModel):
+    start: TimeMonth
+    end: TimeMonth
+
+
+TimeField = Union[str, TimeMonth, TimeYear, TimeRange]  # "latest" | {year,month} | {year} | {start,end}
 
 
 class Intent(BaseModel):
@@ -56,6 +65,25 @@ class Intent(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = None
+    # "columnar": series-ийг parallel array-аар (label/value/value_scaled) буцаана; default RESULT_FORMAT
+    format: Optional[Literal["rows", "columnar"]] = None
+    # "lean": debug meta-гүй (state/intent/sql_meta...); default нь API key-ийн profile
+    profile: Optional[Literal["lean", "debug"]] = None
+
+
+class StreamRequest(BaseModel):
+    # structured intent (state.to_intent() хэлбэр); байхгүй бол session-ий сүүлийн result-ийн intent
+    intent: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
+    # True: view-ийн бүх багана (aggregate биш)
+    detail: bool = False
+    max_rows: Optional[int] = Field(default=None, ge=1)
+
+
+class ExportRequest(StreamRequest):
+    format: Literal["csv", "parquet", "xlsx"] = "csv"
+    # export default нь view-ийн бүх багана
+    detail: bool = True
 
 
 class AskRequest(BaseModel):
@@ -0,0 +1,602 @@
+# app/replica/cube.py
+"""
+In-process trade cube: (hscode, country, year-month) түвшний amount / qty / мөрийн тоо.
+
+  - dense:  hs × month, country × month, нийт × month (жижиг, slice+sum нь µs)
+  - sparse: (hs, country, month) cell-үүд hs-ээр эрэмбэлэгдсэн (CSR-маягийн hs_ptr)
+            → hscode + country хоёулаа байхад зөвхөн тухайн hs-үүдийн slice-ийг уншина
+
+Evaluator нь MonthlyAgg үүсгээд derive.compute_rows-оор SQL-тэй ижил rows гаргана.
+Зөвхөн hscode / country filter-тэй HS view-ууд (export, import); бусад нь None → replica/Postgres.
+
+Cube-ууд data/cube/<version>/ доор .npy болгон бичигдэж, бүх worker read-only mmap хийнэ
+(нэг host дээр page cache-ийг хуваалцана). Шинэ сар орсны дараа:
+
+  python -m app.replica.cube        # build → шинэ version → CURRENT swap (build хугацаа + санах ой)
+
+Ажиллаж буй worker-ууд CURRENT-ийг CUBE_CHECK_SECONDS тутам шалгаж remap хийнэ.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import secrets
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.replica.engine import predicates
+from app.replica.store import parse_part_key, part_key, view_dirname
+from app.sql.derive import MonthlyAgg, compute_rows
+from app.sql.templates import VIEW_EXPORT, VIEW_IMPORT
+
+log = logging.getLogger(__name__)
+
+CUBE_VIEWS = (VIEW_EXPORT, VIEW_IMPORT)
+CUBE_COLUMNS = frozenset({"hscode", "country"})
+
+
+def cube_sql(view: str, where: str = "") -> str:
+    return f"""
+SELECT year::int AS year, month::int AS month, hscode, country,
+       SUM(COALESCE(amountUSD,0)) AS amount, SUM(COALESCE(quantity,0)) AS qty, COUNT(*) AS n
+FROM {view}
+{where}
+GROUP BY 1, 2, 3, 4
+""".strip()
+
+
+def _dense(rows_idx: np.ndarray, t: np.ndarray, size: int, T: int, weights: np.ndarray) -> np.ndarray:
+    flat = np.bincount(rows_idx.astype(np.int64) * T + t, weights=weights, minlength=size * T)
+    return flat.reshape(size, T)
+
+
+class Cube:
+    """
+    Нэг view-ийн cube. arrays нь numpy массивууд (санах ойд эсвэл mmap).
+    """
+
+    ARRAYS = (
+        "c_hs", "c_country", "c_t", "c_amount", "c_qty", "c_count", "hs_ptr",
+        "hs_amount", "hs_qty", "hs_count",
+        "country_amount", "country_qty", "country_count",
+        "total_amount", "total_qty", "total_count",
+    )
+
+    def __init__(self, view: str, t0: int, hs: List[Optional[str]], countries: List[Optional[str]], arrays: Dict[str, np.ndarray]):
+        self.view = view
+        self.t0 = t0
+        self.hs = hs
+        self.countries = countries
+        self.arrays = arrays
+        self.T = int(arrays["total_count"].shape[0])
+        self.hs_index = {h: i for i, h in enumerate(hs)}
+        self._country_matches: Dict[str, np.ndarray] = {}
+        self.build_seconds = 0.0
+
+        present = np.nonzero(arrays["total_count"])[0]
+        self.latest: Optional[Tuple[int, int]] = self._ym(int(present[-1])) if present.size else None
+        self.years = {self._ym(int(i))[0] for i in present}
+
+    def _ym(self, t: int) -> Tuple[int, int]:
+        y, m0 = divmod(self.t0 + t, 12)
+        return y, m0 + 1
+
+    # -------- build --------
+
+    @classmethod
+    def from_rows(cls, view: str, rows: Iterable[Dict[str, Any]]) -> "Cube":
+        """
+        (year, month, hscode, country, amount, qty, n) aggregated rows → cube
+        """
+        rows = [r for r in rows if r.get("year") is not None and r.get("month") is not None]
+        hs_dict: Dict[Optional[str], int] = {}
+        c_dict: Dict[Optional[str], int] = {}
+
+        n = len(rows)
+        tt = np.fromiter((int(r["year"]) * 12 + int(r["month"]) - 1 for r in rows), dtype=np.int64, count=n)
+        h = np.fromiter(
+            (hs_dict.setdefault(None if r.get("hscode") is None else str(r["hscode"]), len(hs_dict)) for r in rows),
+            dtype=np.int32, count=n,
+        )
+        c = np.fromiter(
+            (c_dict.setdefault(None if r.get("country") is None else str(r["country"]), len(c_dict)) for r in rows),
+            dtype=np.int32, count=n,
+        )
+        amount = np.fromiter((float(r.get("amount") or 0) for r in rows), dtype=np.float64, count=n)
+        qty = np.fromiter((float(r.get("qty") or 0) for r in rows), dtype=np.float64, count=n)
+        count = np.fromiter((int(r.get("n") or 0) for r in rows), dtype=np.int64, count=n)
+
+        t0 = int(tt.min()) if n else 0
+        return cls.from_cells(view, t0, list(hs_dict), list(c_dict), h, c, (tt - t0).astype(np.int32), amount, qty, count)
+
+    @classmethod
+    def from_cells(
+        cls,
+        view: str,
+        t0: int,
+        hs: List[Optional[str]],
+        countries: List[Optional[str]],
+        h: np.ndarray,
+        c: np.ndarray,
+        t: np.ndarray,
+        amount: np.ndarray,
+        qty: np.ndarray,
+        count: np.ndarray,
+    ) -> "Cube":
+        T = int(t.max()) + 1 if t.size else 0
+        H, C = len(hs), len(countries)
+
+        order = np.lexsort((t, c, h))
+        h, c, t = h[order], c[order], t[order]
+        amount, qty, count = amount[order], qty[order], count[order]
+
+        count_f = count.astype(np.float64)
+        arrays = {
+            "c_hs": h, "c_country": c, "c_t": t,
+            "c_amount": amount, "c_qty": qty, "c_count": count,
+            "hs_ptr": np.searchsorted(h, np.arange(H + 1)).astype(np.int64),
+            "hs_amount": _dense(h, t, H, T, amount),
+            "hs_qty": _dense(h, t, H, T, qty),
+            "hs_count": _dense(h, t, H, T, count_f),
+            "country_amount": _dense(c, t, C, T, amount),
+            "country_qty": _dense(c, t, C, T, qty),
+            "country_count": _dense(c, t, C, T, count_f),
+            "total_amount": np.bincount(t, weights=amount, minlength=T),
+            "total_qty": np.bincount(t, weights=qty, minlength=T),
+            "total_count": np.bincount(t, weights=count_f, minlength=T),
+        }
+        return cls(view, t0, hs, countries, arrays)
+
+    # -------- evaluate --------
+
+    def _country_codes(self, needle: str) -> np.ndarray:
+        hit = self._country_matches.get(needle)
+        if hit is None:
+            n = needle.lower()
+            hit = np.asarray(
+                [i for i, v in enumerate(self.countries) if v is not None and n in v.lower()], dtype=np.int64
+            )
+            self._country_matches[needle] = hit
+        return hit
+
+    def monthly(self, sql_meta: Dict[str, Any]) -> Optional[MonthlyAgg]:
+        preds = predicates(sql_meta.get("filters") or {}, bool(sql_meta.get("need_company")))
+        if preds is None or any(not CUBE_COLUMNS.issuperset(cols) for cols, _, _ in preds):
+            return None
+
+        hs_idx: Optional[np.ndarray] = None
+        c_idx: Optional[np.ndarray] = None
+        for cols, op, value in preds:
+            if cols[0] == "hscode":
+                values = value if op == "in" else (value,)
+                hs_idx = np.asarray(sorted(self.hs_index[v] for v in values if v in self.hs_index), dtype=np.int64)
+            else:
+                c_idx = self._country_codes(value)
+
+        a = self.arrays
+        if hs_idx is None and c_idx is None:
+            amount, qty, count = a["total_amount"], a["total_qty"], a["total_count"]
+        elif c_idx is None:
+            amount, qty, count = (a[k][hs_idx].sum(axis=0) for k in ("hs_amount", "hs_qty", "hs_count"))
+        elif hs_idx is None:
+            amount, qty, count = (a[k][c_idx].sum(axis=0) for k in ("country_amount", "country_qty", "country_count"))
+        else:
+            amount, qty, count = self._cells(hs_idx, c_idx)
+
+        present = np.nonzero(np.asarray(count))[0]
+        ym = self.t0 + present
+        return MonthlyAgg(
+            year=(ym // 12).astype(np.int32),
+            month=(ym % 12 + 1).astype(np.int32),
+            amount=np.asarray(amount)[present],
+            qty=np.asarray(qty)[present],
+            years=set(self.years),
+            complete=True,
+            latest=self.latest,
+        )
+
+    def _cells(self, hs_idx: np.ndarray, c_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        a = self.arrays
+        ptr = a["hs_ptr"]
+        parts = [np.arange(ptr[i], ptr[i + 1]) for i in hs_idx]
+        sel = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        sel = sel[np.isin(a["c_country"][sel], c_idx)]
+        t = a["c_t"][sel]
+        return (
+            np.bincount(t, weights=a["c_amount"][sel], minlength=self.T),
+            np.bincount(t, weights=a["c_qty"][sel], minlength=self.T),
+            np.bincount(t, weights=a["c_count"][sel].astype(np.float64), minlength=self.T),
+        )
+
+    # -------- incremental --------
+
+    def month_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Сар бүрийн мөрийн тоо + нийлбэр (sync.month_stats_sql-тэй ижил watermark).
+        """
+        a = self.arrays
+        out = {}
+        for t in np.nonzero(a["total_count"])[0]:
+            y, m = self._ym(int(t))
+            out[part_key(y, m)] = {
+                "rows": int(a["total_count"][t]),
+                "amount": float(a["total_amount"][t]),
+                "qty": float(a["total_qty"][t]),
+            }
+        return out
+
+    def replace_months(self, rows: Iterable[Dict[str, Any]], months: Iterable[str]) -> "Cube":
+        """
+        months-ийн cell-үүдийг хасаад rows (тэдгээр сарын шинэ aggregated мөрүүд)-ийг нэмнэ.
+        Dictionary code-ууд тогтвортой: шинэ hscode/country-г төгсгөлд нь залгана.
+        """
+        a = self.arrays
+        drop = np.asarray(
+            [y * 12 + m - 1 - self.t0 for y, m in (parse_part_key(k) for k in months)], dtype=np.int64
+        )
+        keep = ~np.isin(a["c_t"], drop)
+
+        hs_dict = {h: i for i, h in enumerate(self.hs)}
+        c_dict = {c: i for i, c in enumerate(self.countries)}
+        rows = [r for r in rows if r.get("year") is not None and r.get("month") is not None]
+        n = len(rows)
+        tt = np.fromiter((int(r["year"]) * 12 + int(r["month"]) - 1 for r in rows), dtype=np.int64, count=n)
+        h_new = np.fromiter(
+            (hs_dict.setdefault(None if r.get("hscode") is None else str(r["hscode"]), len(hs_dict)) for r in rows),
+            dtype=np.int32, count=n,
+        )
+        c_new = np.fromiter(
+            (c_dict.setdefault(None if r.get("country") is None else str(r["country"]), len(c_dict)) for r in rows),
+            dtype=np.int32, count=n,
+        )
+
+        t_old = a["c_t"][keep].astype(np.int64) + self.t0
+        t_all = np.concatenate([t_old, tt])
+        t0 = int(t_all.min()) if t_all.size else 0
+        return Cube.from_cells(
+            self.view,
+            t0,
+            list(hs_dict),
+            list(c_dict),
+            np.concatenate([a["c_hs"][keep], h_new]),
+            np.concatenate([a["c_country"][keep], c_new]),
+            (t_all - t0).astype(np.int32),
+            np.concatenate([a["c_amount"][keep], np.fromiter((float(r.get("amount") or 0) for r in rows), dtype=np.float64, count=n)]),
+            np.concatenate([a["c_qty"][keep], np.fromiter((float(r.get("qty") or 0) for r in rows), dtype=np.float64, count=n)]),
+            np.concatenate([a["c_count"][keep], np.fromiter((int(r.get("n") or 0) for r in rows), dtype=np.int64, count=n)]),
+        )
+
+    # -------- files --------
+
+    def save(self, path: Path) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(path / f"{name}.npy", np.ascontiguousarray(self.arrays[name]))
+        meta = {
+            "view": self.view,
+            "t0": self.t0,
+            "hs": self.hs,
+            "countries": self.countries,
+            "build_seconds": self.build_seconds,
+        }
+        with (path / "meta.json").open("w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "Cube":
+        with (path / "meta.json").open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in cls.ARRAYS}
+        cube = cls(meta["view"], int(meta["t0"]), meta["hs"], meta["countries"], arrays)
+        cube.build_seconds = float(meta.get("build_seconds") or 0.0)
+        return cube
+
+    # -------- stats --------
+
+    def nbytes(self) -> int:
+        arr = sum(int(x.nbytes) for x in self.arrays.values())
+        dicts = sum(len(s.encode("utf-8")) for s in self.hs + self.countries if s)
+        return arr + dicts
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "view": self.view,
+            "cells": int(self.arrays["c_t"].shape[0]),
+            "hscodes": len(self.hs),
+            "countries": len(self.countries),
+            "months": self.T,
+            "latest": self.latest,
+            "bytes": self.nbytes(),
+            "build_seconds": round(self.build_seconds, 3),
+        }
+
+
+# -------- versioned files (worker-ууд нэг mmap-ийг хуваалцана) --------
+#
+#   data/cube/
+#     CURRENT                     # идэвхтэй version-ий нэр (os.replace-ээр atomically солигдоно)
+#     CHECKED                     # mtime = сүүлд SQL watermark-тай тулгасан хугацаа (build/publish/refresh)
+#     20260301-020000123-ab12cd34/
+#       v_export_monthly_hs/{meta.json, c_hs.npy, hs_amount.npy, ...}
+#
+# Version dir-ууд хэзээ ч өөрчлөгдөхгүй (immutable) → read-only mmap аюулгүй.
+
+CURRENT = "CURRENT"
+CHECKED = "CHECKED"
+LOCK = ".build.lock"
+
+
+def read_current(root: Path) -> Optional[str]:
+    try:
+        name = (root / CURRENT).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return name if name and (root / name).is_dir() else None
+
+
+def mark_checked(root: Path) -> None:
+    # бүх cube view SQL-тэй тулгагдсан (өөрчлөлтгүй ч) → max-age тоолуур шинэчлэгдэнэ
+    root.mkdir(parents=True, exist_ok=True)
+    (root / CHECKED).write_text(str(time.time()), encoding="utf-8")
+
+
+def checked_at(root: Path) -> Optional[float]:
+    try:
+        return (root / CHECKED).stat().st_mtime
+    except OSError:
+        return None
+
+
+def save_version(root: Path, cubes: Dict[str, Cube], keep: int = 3, reuse: Optional[Dict[str, Path]] = None) -> str:
+    """
+    Шинэ version бичээд CURRENT-ийг заана. Хуучин version-уудыг keep хүртэл цэвэрлэнэ
+    (mmap хийсэн worker-ууд unlink хийгдсэн файлаа remap хүртэл уншсаар байна).
+    reuse: өөрчлөгдөөгүй view → өмнөх version-ий dir (файлуудыг hardlink хийнэ, хуулахгүй).
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    version = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{int(now * 1000) % 1000:03d}-{secrets.token_hex(4)}"
+    tmp = root / f".{version}.tmp"
+    for view, cube in cubes.items():
+        cube.save(tmp / view_dirname(view))
+    for view, src in (reuse or {}).items():
+        if view not in cubes:
+            _link_dir(src, tmp / view_dirname(view))
+    os.replace(tmp, root / version)
+
+    pointer = root / f".{CURRENT}.{secrets.token_hex(4)}.tmp"
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, root / CURRENT)
+
+    _prune_versions(root, version, keep)
+    return version
+
+
+def _link_dir(src: Path, dst: Path) -> None:
+    dst.mkdir(parents=True, exist_ok=True)
+    for f in src.iterdir():
+        try:
+            os.link(f, dst / f.name)
+        except OSError:
+            shutil.copy2(f, dst / f.name)
+
+
+def _prune_versions(root: Path, current: str, keep: int) -> None:
+    # үүссэн дарааллаар (нэг секундэд хэд хэдэн version гарч болно)
+    dirs = [d for d in root.iterdir() if d.is_dir() and not d.name.startswith(".")]
+    dirs.sort(key=lambda d: (d.stat().st_mtime, d.name))
+    for old in dirs[: max(0, len(dirs) - max(1, keep))]:
+        if old.name == current:
+            continue
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def load_version(root: Path, version: str) -> Dict[str, Cube]:
+    out: Dict[str, Cube] = {}
+    for d in sorted((root / version).iterdir()):
+        if (d / "meta.json").exists():
+            cube = Cube.load(d)
+            out[cube.view] = cube
+    return out
+
+
+class _BuildLock:
+    """
+    Нэг host дээр нэг л worker SQL-ээс build хийнэ (O_EXCL lock файл; platform-independent).
+    """
+
+    def __init__(self, root: Path, stale_seconds: float = 600.0):
+        self.path = root / LOCK
+        self.stale_seconds = stale_seconds
+        self.acquired = False
+
+    def __enter__(self) -> "_BuildLock":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if time.time() - self.path.stat().st_mtime > self.stale_seconds:
+                self.path.unlink()
+        except OSError:
+            pass
+        try:
+            os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            self.acquired = True
+        except FileExistsError:
+            self.acquired = False
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.acquired:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+def _cube_from_result(view: str, result: Any) -> Cube:
+    # buffered result → RowMapping-уудыг dict болгохгүйгээр шууд уншина (thread дээр)
+    return Cube.from_rows(view, result.mappings().all())
+
+
+class CubeSet:
+    """
+    Идэвхтэй cube version (read-only mmap). CURRENT-ийг check_seconds тутам шалгаж,
+    шинэ version гарвал remap хийнэ — worker бүр дахин build хийхгүй.
+    max_age_seconds: CHECKED-ээс хойш хэт удсан бол (refresh зогссон) хариулахгүй → replica/SQL.
+    """
+
+    def __init__(
+        self, root: Path, check_seconds: float = 10.0, keep_versions: int = 3, max_age_seconds: float = 0.0
+    ) -> None:
+        self.root = Path(root)
+        self.check_seconds = check_seconds
+        self.keep_versions = keep_versions
+        self.max_age_seconds = max_age_seconds
+        self.cubes: Dict[str, Cube] = {}
+        self.version: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self._checked = 0.0
+
+    def remap(self, force: bool = False) -> bool:
+        """
+        CURRENT өөрчлөгдсөн бол шинэ version-ийг map хийнэ. Идэвхтэй version байгаа эсэхийг буцаана.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.check_seconds:
+            return self.version is not None
+        self._checked = now
+        self.checked_at = checked_at(self.root)
+
+        version = read_current(self.root)
+        if version is None or version == self.version:
+            return self.version is not None
+        try:
+            cubes = load_version(self.root, version)
+        except Exception as e:
+            log.warning("trade cube %s map failed: %s: %s", version, type(e).__name__, e)
+            return self.version is not None
+
+        # нэг assignment → request-ууд хуучин эсвэл шинэ dict-ийн аль нэгийг бүтнээр нь харна
+        self.cubes, self.version = cubes, version
+        log.info("trade cube version %s mapped (%d views)", version, len(cubes))
+        return True
+
+    def stale(self) -> bool:
+        if self.max_age_seconds <= 0:
+            return False
+        return self.checked_at is None or time.time() - self.checked_at > self.max_age_seconds
+
+    def rows(self, sql_meta: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        self.remap()
+        cube = self.cubes.get(str(sql_meta.get("view") or ""))
+        if cube is None or self.stale():
+            return None
+        try:
+            return compute_rows(sql_meta, cube.monthly(sql_meta))
+        except Exception:
+            return None
+
+    async def build(self, views: Iterable[str] = CUBE_VIEWS) -> List[Dict[str, Any]]:
+        """
+        SQL-ээс бүтээгээд шинэ version болгон publish хийж, өөрөө map хийнэ.
+        Query нь read_router-оор (replica; байхгүй бол primary); мөр → cube болон disk write нь
+        thread дээр (startup build-ийн үед app request-ууд аль хэдийн үйлчлэгдэж байна).
+        """
+        from app.core.database import LazySession, read_router
+
+        db = LazySession(read_router)
+        built: Dict[str, Cube] = {}
+        for view in views:
+            t0 = time.perf_counter()
+            r = await db.execute(text(cube_sql(view)))
+            cube = await asyncio.to_thread(_cube_from_result, view, r)
+            cube.build_seconds = time.perf_counter() - t0
+            built[view] = cube
+
+        mark_checked(self.root)
+        await asyncio.to_thread(self.publish, built)
+        out = []
+        for view in built:
+            st = (self.cubes.get(view) or built[view]).stats()
+            log.info(
+                "trade cube %s: %d cells, %d months, %.1f MiB, built in %.2fs",
+                view, st["cells"], st["months"], st["bytes"] / 2**20, st["build_seconds"],
+            )
+            out.append(st)
+        return out
+
+    def publish(self, built: Dict[str, Cube], keep_others: bool = False) -> str:
+        """
+        keep_others=True: built-д ороогүй view-уудыг идэвхтэй version-оос hardlink-ээр авна.
+        """
+        reuse: Dict[str, Path] = {}
+        if keep_others and self.version:
+            reuse = {v: self.root / self.version / view_dirname(v) for v in self.cubes if v not in built}
+        version = save_version(self.root, built, keep=self.keep_versions, reuse=reuse)
+        self.remap(force=True)
+        return version
+
+    async def ensure(self) -> None:
+        """
+        Startup: version байвал map хийнэ; байхгүй (эсвэл max-age-аас хэтэрсэн) бол нэг worker
+        build хийж publish хийнэ, бусад нь CURRENT гарч ирэхэд remap-аар авна.
+        """
+        if self.remap(force=True) and not self.stale():
+            return
+        with _BuildLock(self.root) as lock:
+            if not lock.acquired or (self.remap(force=True) and not self.stale()):
+                return
+            await self.build()
+
+    async def ensure_safe(self) -> None:
+        try:
+            await self.ensure()
+        except Exception as e:
+            # cube-гүй ч app ажиллана (replica/Postgres)
+            log.warning("trade cube build failed: %s: %s", type(e).__name__, e)
+
+    def gauge(self, key: str) -> List[Tuple[Dict[str, str], float]]:
+        return [({"view": v}, float(c.stats()[key])) for v, c in self.cubes.items()]
+
+    def ages(self) -> List[Tuple[Dict[str, str], float]]:
+        if self.checked_at is None:
+            return []
+        age = time.time() - self.checked_at
+        return [({"view": v}, age) for v in self.cubes]
+
+
+cubes = CubeSet(
+    Path(settings.cube_dir),
+    check_seconds=settings.cube_check_seconds,
+    keep_versions=settings.cube_keep_versions,
+    max_age_seconds=settings.cube_max_age_seconds,
+)
+
+
+def main() -> int:
+    async def _run() -> List[Dict[str, Any]]:
+        from app.core.database import engine
+
+        try:
+            return await cubes.build()
+        finally:
+            await engine.dispose()
+
+    for st in asyncio.run(_run()):
+        print(
+            f"{st['view']}: {st['cells']} cells ({st['hscodes']} hs × {st['countries']} countries × {st['months']} months), "
+            f"{st['bytes'] / 2**20:.1f} MiB, build {st['build_seconds']}s, latest={st['latest']}"
+        )
+    print(f"published version {cubes.version} → {cubes.root / CURRENT}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,261 @@
+# app/replica/engine.py
+"""
+Local replica execution engine: build_sql-ийн sql_meta-г replica файлууд дээр
+vectorized (dictionary code mask + sum) байдлаар бодно.
+
+Partition (сар) бүрийн amount/qty нийлбэрээс MonthlyAgg үүсгээд derive.compute_rows-оор
+SQL-тэй ижил хэлбэрийн rows гаргана. Бодож чадахгүй (replica байхгүй, хуучирсан,
+дэмжигдээгүй filter) бол None → Postgres.
+"""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.replica.store import FORMAT_VERSION, Partition, load_manifest, parse_part_key, view_dirname
+from app.sql.derive import LOOKBACK_MONTHS, MonthlyAgg, compute_rows
+
+AMOUNT_COL = "amountusd"
+QTY_COL = "quantity"
+
+# builder._where_filters-тэй ижил утга: filter → (columns (OR), op)
+# Postgres unquoted identifier-ууд lowercase болдог тул replica column-ууд lowercase.
+FILTER_COLUMNS: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "country": (("country",), "ilike"),
+    "senderReceiver": (("senderreceiver",), "eq"),
+    "customs": (("customs",), "ilike"),
+    "purpose": (("purpose",), "ilike"),
+    "sub1": (("sub1",), "ilike"),
+    "sub2": (("sub2",), "ilike"),
+    "sub3": (("sub3",), "ilike"),
+    "company": (("companyname", "companyregnum"), "ilike"),
+}
+
+Predicate = Tuple[Tuple[str, ...], str, Any]
+
+
+def predicates(
+    filters: Dict[str, Any],
+    need_company: bool,
+    exact: Optional[Dict[str, List[str]]] = None,
+) -> Optional[List[Predicate]]:
+    """
+    sql_meta["filters"] → [(columns, op, value)] ; SQL-тэй яг ижилхэн бодож
+    чадахгүй бол None (жишээ нь ILIKE wildcard).
+    exact: sql_meta["category_exact"] — builder equality ашигласан category field-үүд.
+    """
+    out: List[Predicate] = []
+    exact = exact or {}
+
+    hs = filters.get("hscode")
+    if hs:
+        if isinstance(hs, list):
+            out.append((("hscode",), "in", frozenset(str(x).strip() for x in hs)))
+        else:
+            out.append((("hscode",), "eq", str(hs).strip()))
+
+    for key, (cols, op) in FILTER_COLUMNS.items():
+        value = filters.get(key)
+        if not value or (key == "company" and not need_company):
+            continue
+        if exact.get(key):
+            out.append((cols, "in", frozenset(exact[key])))
+            continue
+        value = str(value).strip()
+        if op == "ilike" and ("%" in value or "_" in value):
+            return None
+        out.append((cols, op, value))
+    return out
+
+
+def needed_years(sql_meta: Dict[str, Any], latest: Optional[Tuple[int, int]]) -> Optional[Set[int]]:
+    """
+    compute_rows-д хэрэгтэй онууд (зөвхөн тэдгээрийн partition-уудыг уншина).
+    """
+    t = sql_meta.get("time") or {}
+    calc = sql_meta.get("calc")
+    window = int(sql_meta.get("window") or 3)
+    lookback = LOOKBACK_MONTHS.get(calc, 0)
+    if t.get("start") and t.get("end"):
+        if calc == "cagr":
+            return {int(t["start"]["year"]), int(t["end"]["year"])}
+        first = (int(t["start"]["year"]) * 12 + int(t["start"].get("month") or 1) - 1 - lookback) // 12
+        return set(range(first, int(t["end"]["year"]) + 1))
+    if t.get("years"):
+        return {int(y) for y in t["years"]}
+
+    year = latest[0] if t.get("latest") and latest else t.get("year")
+    if year is None:
+        return None
+    year = int(year)
+
+    if calc in LOOKBACK_MONTHS:
+        return {year - 1, year}
+    if calc == "cagr":
+        # latest: өмнөх бүтэн он хүртэл байж болно
+        return set(range(year - window, year + 1))
+    if calc == "yoy":
+        return {year, year - 1}
+    if calc == "avg_years":
+        return set(range(year - window + 1, year + 1))
+    if calc == "avg_months":
+        return set(range(year - (window - 1) // 12 - 1, year + 1))
+    return {year}
+
+
+class _View:
+    def __init__(self, path: Path, manifest: Dict[str, Any], mtime: float, previous: Optional["_View"]):
+        self.path = path
+        self.manifest = manifest
+        self.mtime = mtime
+        self.columns: Dict[str, str] = manifest.get("columns") or {}
+        latest = manifest.get("latest")
+        self.latest: Optional[Tuple[int, int]] = tuple(latest) if latest else None  # type: ignore[assignment]
+
+        # өөрчлөгдөөгүй partition-уудын mmap/dictionary cache-ийг дахин ашиглана
+        old = {p.path.name: p for p in previous.partitions.values()} if previous else {}
+        self.partitions: Dict[Tuple[int, int], Partition] = {}
+        for key, info in (manifest.get("partitions") or {}).items():
+            if not info.get("rows"):
+                continue
+            p = old.get(info["dir"]) or Partition(path / info["dir"], int(info["rows"]), info.get("types") or {})
+            self.partitions[parse_part_key(key)] = p
+
+    def monthly(self, sql_meta: Dict[str, Any]) -> Optional[MonthlyAgg]:
+        preds = predicates(
+            sql_meta.get("filters") or {}, bool(sql_meta.get("need_company")), sql_meta.get("category_exact")
+        )
+        if preds is None:
+            return None
+        for cols, _, _ in preds:
+            if any(self.columns.get(c) != "str" for c in cols):
+                return None
+        if self.columns.get(AMOUNT_COL) != "num" or self.columns.get(QTY_COL) != "num":
+            return None
+
+        years = needed_years(sql_meta, self.latest)
+        keys = sorted(k for k in self.partitions if years is None or k[0] in years)
+
+        ys: List[int] = []
+        ms: List[int] = []
+        amounts: List[float] = []
+        qtys: List[float] = []
+        for key in keys:
+            part = self.partitions[key]
+            # partition-ий encoding manifest-ийн columns-оос зөрвөл (re-type хийгдээгүй) SQL руу унана
+            if any(part.types.get(c) != "str" for cols, _, _ in preds for c in cols):
+                return None
+            if part.types.get(AMOUNT_COL) != "num" or part.types.get(QTY_COL) != "num":
+                return None
+            mask: Optional[np.ndarray] = None
+            for cols, op, value in preds:
+                m = part.mask(cols[0], op, value)
+                for c in cols[1:]:
+                    m = m | part.mask(c, op, value)
+                mask = m if mask is None else (mask & m)
+
+            amount = part.num(AMOUNT_COL)
+            qty = part.num(QTY_COL)
+            if mask is not None:
+                # SQL GROUP BY: row байхгүй сар огт гарахгүй
+                if not mask.any():
+                    continue
+                amount, qty = amount[mask], qty[mask]
+
+            ys.append(key[0])
+            ms.append(key[1])
+            amounts.append(float(np.nansum(amount)))
+            qtys.append(float(np.nansum(qty)))
+
+        return MonthlyAgg(
+            year=np.asarray(ys, dtype=np.int32),
+            month=np.asarray(ms, dtype=np.int32),
+            amount=np.asarray(amounts, dtype=np.float64),
+            qty=np.asarray(qtys, dtype=np.float64),
+            years=set(years or ()),
+            # шаардлагатай онуудын бүх partition уншигдсан
+            complete=True,
+            latest=self.latest,
+        )
+
+
+class Replica:
+    """
+    data/replica/-г уншдаг engine. manifest-ийн mtime-ийг reload_seconds тутам шалгаж,
+    sync/refresh дараа шинэ хувилбарыг (blocking-гүй) авна.
+    """
+
+    def __init__(self, root: Path, reload_seconds: float = 30.0, max_age_seconds: float = 0.0):
+        self.root = Path(root)
+        self.reload_seconds = reload_seconds
+        self.max_age_seconds = max_age_seconds
+        self._views: Dict[str, Optional[_View]] = {}
+        self._checked: Dict[str, float] = {}
+
+    def view(self, view: str) -> Optional[_View]:
+        now = time.monotonic()
+        if view in self._views and now - self._checked.get(view, 0.0) < self.reload_seconds:
+            return self._views[view]
+        self._checked[view] = now
+
+        path = self.root / view_dirname(view)
+        current = self._views.get(view)
+        try:
+            mtime = (path / "manifest.json").stat().st_mtime
+        except OSError:
+            self._views[view] = None
+            return None
+        if current is not None and current.mtime == mtime:
+            return current
+
+        manifest = load_manifest(path)
+        # өөр format-ын manifest-ийг (sync дахин бичих хүртэл) уншихгүй
+        ok = manifest is not None and manifest.get("format") == FORMAT_VERSION
+        self._views[view] = _View(path, manifest, mtime, current) if ok else None
+        return self._views[view]
+
+    def monthly(self, sql_meta: Dict[str, Any]) -> Optional[MonthlyAgg]:
+        v = self.view(str(sql_meta.get("view") or ""))
+        if v is None or v.latest is None:
+            return None
+        if self.max_age_seconds > 0 and time.time() - float(v.manifest.get("synced_at") or 0) > self.max_age_seconds:
+            return None
+        return v.monthly(sql_meta)
+
+    def rows(self, sql_meta: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        try:
+            return compute_rows(sql_meta, self.monthly(sql_meta))
+        except Exception:
+            # replica эвдэрсэн/дутуу бол Postgres руу унана
+            return None
+
+    def stats(self) -> List[Tuple[Dict[str, str], float]]:
+        out = []
+        for name, v in self._views.items():
+            if v is None:
+                continue
+            out.append(({"view": name}, float(len(v.partitions))))
+        return out
+
+    def ages(self) -> List[Tuple[Dict[str, str], float]]:
+        now = time.time()
+        return [
+            ({"view": name}, now - float(v.manifest.get("synced_at") or 0))
+            for name, v in self._views.items()
+            if v is not None
+        ]
+
+
+replica: Optional[Replica] = (
+    Replica(
+        Path(settings.replica_dir),
+        reload_seconds=settings.replica_reload_seconds,
+        max_age_seconds=settings.replica_max_age_seconds,
+    )
+    if settings.replica_enabled
+    else None
+)
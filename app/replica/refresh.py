@@ -0,0 +1,182 @@
+# app/replica/refresh.py
+"""
+Incremental refresh: view бүрийн (year, month) watermark (мөрийн тоо + amount/qty нийлбэр)-ийг
+local бүтэцтэй харьцуулж, зөвхөн шинэ/өөрчлөгдсөн/устсан саруудыг татна.
+
+- replica: тухайн сарын partition-уудыг дахин бичээд manifest swap (sync.sync_view)
+- cube: тухайн саруудын aggregated cell-үүдийг татаж, хуучин cube дээр сольж шинэ version
+  publish хийнэ (өөрчлөгдөөгүй view-ууд hardlink), CURRENT swap
+
+Уншигчид хэзээ ч блоклогдохгүй: remap/reload хүртэл хуучин manifest/version-оо уншина.
+Зардал нь өөрчлөлтийн хэмжээтэй пропорциональ (watermark query нь view бүрт нэг GROUP BY).
+
+Run:
+  python -m app.replica.refresh                 # incremental (cron: шинэ сар орсны дараа)
+  python -m app.replica.refresh --full
+  python -m app.replica.refresh --no-replica    # зөвхөн cube
+
+REFRESH_INTERVAL_SECONDS > 0 бол app дотор нэг worker (lock) үе үе ажиллуулна.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.replica.cube import CUBE_VIEWS, Cube, CubeSet, _BuildLock, cube_sql, cubes, mark_checked
+from app.replica.store import parse_part_key
+from app.replica.sync import VIEWS, changed_months, fetch_month_stats, sync_view
+
+log = logging.getLogger(__name__)
+
+
+async def fetch_cube_rows(conn: Any, view: str, months: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    if months is None:
+        r = await conn.execute(text(cube_sql(view)))
+    else:
+        ym = [y * 100 + m for y, m in (parse_part_key(k) for k in months)]
+        where = "WHERE (year::int * 100 + month::int) = ANY(CAST(:ym AS int[]))"
+        r = await conn.execute(text(cube_sql(view, where)), {"ym": ym})
+    return [dict(x) for x in r.mappings().all()]
+
+
+async def refresh_cube(conn: Any, view: str, cubeset: CubeSet, stats: Dict[str, Dict[str, Any]], full: bool) -> Dict[str, Any]:
+    """
+    Шинэ cube (өөрчлөлтгүй бол None) + report.
+    """
+    t0 = time.perf_counter()
+    old = cubeset.cubes.get(view)
+    if full or old is None:
+        rows = await fetch_cube_rows(conn, view)
+        cube: Optional[Cube] = await asyncio.to_thread(Cube.from_rows, view, rows)
+        changed, removed = sorted(stats), []
+    else:
+        changed, removed = changed_months(old.month_stats(), stats)
+        cube = None
+        rows = []
+        if changed or removed:
+            rows = await fetch_cube_rows(conn, view, changed) if changed else []
+            cube = await asyncio.to_thread(old.replace_months, rows, changed + removed)
+
+    if cube is not None:
+        cube.build_seconds = time.perf_counter() - t0
+    return {
+        "cube": cube,
+        "changed": len(changed),
+        "removed": len(removed),
+        "cells_fetched": len(rows),
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+
+
+async def refresh(
+    conn: Any,
+    views: Sequence[str] = VIEWS,
+    replica_root: Optional[Path] = None,
+    cubeset: Optional[CubeSet] = None,
+    full: bool = False,
+) -> List[Dict[str, Any]]:
+    if cubeset is not None:
+        cubeset.remap(force=True)
+
+    reports: List[Dict[str, Any]] = []
+    built: Dict[str, Cube] = {}
+    for view in views:
+        # view бүрт нэг watermark query; replica/cube хоёулаа үүнийг ашиглана
+        stats = await fetch_month_stats(conn, view)
+        rep: Dict[str, Any] = {"view": view, "months": len(stats)}
+
+        if replica_root is not None:
+            rep["replica"] = await sync_view(conn, view, replica_root, full=full, stats=stats)
+
+        if cubeset is not None and view in CUBE_VIEWS:
+            res = await refresh_cube(conn, view, cubeset, stats, full)
+            cube = res.pop("cube")
+            if cube is not None:
+                built[view] = cube
+            rep["cube"] = res
+        reports.append(rep)
+
+    if cubeset is not None and all(v in views for v in CUBE_VIEWS):
+        # бүх cube view тулгагдсан (өөрчлөлтгүй ч) → max-age тоолуур шинэчлэгдэнэ
+        mark_checked(cubeset.root)
+    if cubeset is not None and built:
+        version = await asyncio.to_thread(cubeset.publish, built, True)
+        for rep in reports:
+            if rep["view"] in built:
+                rep["cube"]["version"] = version
+    return reports
+
+
+async def refresh_loop(interval: float) -> None:
+    """
+    App дотор: interval тутам нэг worker (build lock) incremental refresh хийнэ.
+    """
+    from app.core.database import engine
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            with _BuildLock(cubes.root) as lock:
+                if not lock.acquired:
+                    continue
+                async with engine.connect() as conn:
+                    reports = await refresh(
+                        conn,
+                        replica_root=Path(settings.replica_dir) if settings.replica_enabled else None,
+                        cubeset=cubes if settings.cube_enabled else None,
+                    )
+            for rep in reports:
+                log.info("refresh %s: replica=%s cube=%s", rep["view"], rep.get("replica"), rep.get("cube"))
+        except Exception as e:
+            log.warning("refresh failed: %s: %s", type(e).__name__, e)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Incremental refresh of the local replica and trade cube")
+    ap.add_argument("--view", action="append", choices=VIEWS, help="default: бүх view")
+    ap.add_argument("--full", action="store_true", help="watermark-ийг үл тоож бүгдийг дахин татна")
+    ap.add_argument("--no-replica", action="store_true")
+    ap.add_argument("--no-cube", action="store_true")
+    args = ap.parse_args(argv)
+
+    async def _run() -> List[Dict[str, Any]]:
+        from app.core.database import engine
+
+        try:
+            with _BuildLock(cubes.root) as lock:
+                if not lock.acquired:
+                    raise SystemExit(f"өөр refresh/build ажиллаж байна ({cubes.root / '.build.lock'})")
+                async with engine.connect() as conn:
+                    return await refresh(
+                        conn,
+                        views=args.view or list(VIEWS),
+                        replica_root=None if args.no_replica else Path(settings.replica_dir),
+                        cubeset=None if args.no_cube else cubes,
+                        full=args.full,
+                    )
+        finally:
+            await engine.dispose()
+
+    for rep in asyncio.run(_run()):
+        line = f"{rep['view']}: {rep['months']} months"
+        if rep.get("replica"):
+            r = rep["replica"]
+            line += f" | replica {r['changed']} changed, {r['removed']} removed, {r['rows']} rows ({r['seconds']}s)"
+        if rep.get("cube"):
+            c = rep["cube"]
+            line += f" | cube {c['changed']} changed, {c['removed']} removed, {c['cells_fetched']} cells ({c['seconds']}s)"
+            if c.get("version"):
+                line += f" → {c['version']}"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
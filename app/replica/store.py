@@ -0,0 +1,256 @@
+# app/replica/store.py
+"""
+Local columnar replica-ийн disk format (NumPy .npy, mmap-аар уншина).
+
+  data/replica/
+    v_export_monthly_hs/
+      manifest.json              # columns, observed, partitions {"2025-03": {dir, rows, amount, qty, types}}, latest
+      2025-03.<token>/
+        amountusd.npy            # float64 (NULL → NaN)
+        hscode.codes.npy         # int32 dictionary code (NULL → -1)
+        hscode.dict.json         # ["2701", ...]
+
+Partition (нэг сар) бүр өөрийн dictionary-тэй, бие даасан → нэг сарыг дахин бичихэд
+бусдад хүрэхгүй. manifest-ийг os.replace-ээр солино: уншигч хагас бичигдсэн төлөв
+хэзээ ч харахгүй, хуучин partition dir-ууд grace хугацааны дараа устана.
+
+Column-ийн төрөл (num/str) partition бүрийн "types"-д бичигдэнэ (уншигч тэрийг л ашиглана).
+"observed" нь NULL биш утгаас тогтоосон төрөл; manifest-ийн "columns"-оос зөрсөн partition-ийг
+sync дахин бичнэ (жишээ нь эхний сарууд бүгд NULL байгаад дараа нь тоо ирсэн).
+"""
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import shutil
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 2  # 2: partition бүр өөрийн types-тай
+
+# partition key-ээр илэрхийлэгдэх тул мөр бүрт хадгалахгүй
+PARTITION_COLUMNS = ("year", "month")
+
+
+def view_dirname(view: str) -> str:
+    # "public.v_export_monthly_hs" → "v_export_monthly_hs"
+    return view.rsplit(".", 1)[-1]
+
+
+def part_key(year: int, month: int) -> str:
+    return f"{int(year):04d}-{int(month):02d}"
+
+
+def parse_part_key(key: str) -> Tuple[int, int]:
+    y, m = key.split("-")
+    return int(y), int(m)
+
+
+# -------- manifest --------
+
+def load_manifest(vdir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with (vdir / MANIFEST).open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_manifest(vdir: Path, manifest: Dict[str, Any]) -> None:
+    vdir.mkdir(parents=True, exist_ok=True)
+    tmp = vdir / f".{MANIFEST}.{secrets.token_hex(4)}.tmp"
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, vdir / MANIFEST)
+
+
+def new_manifest(view: str) -> Dict[str, Any]:
+    return {
+        "format": FORMAT_VERSION,
+        "view": view,
+        "columns": {},
+        "observed": {},
+        "partitions": {},
+        "latest": None,
+        "synced_at": None,
+    }
+
+
+def manifest_latest(partitions: Dict[str, Dict[str, Any]]) -> Optional[List[int]]:
+    keys = [k for k, p in partitions.items() if p.get("rows")]
+    if not keys:
+        return None
+    return list(parse_part_key(max(keys)))
+
+
+# -------- write --------
+
+def _is_num(v: Any) -> bool:
+    return isinstance(v, (int, float, Decimal)) and not isinstance(v, bool)
+
+
+def observed_types(rows: Sequence[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """
+    column → "num" | "str" | None (бүгд NULL; төрөл тодорхойгүй).
+    """
+    out: Dict[str, Optional[str]] = {}
+    cols = list(rows[0].keys()) if rows else []
+    for col in cols:
+        if col in PARTITION_COLUMNS:
+            continue
+        kind = None
+        for r in rows:
+            v = r.get(col)
+            if v is None:
+                continue
+            kind = "num" if _is_num(v) else "str"
+            if kind == "str":
+                break
+        out[col] = kind
+    return out
+
+
+def merge_observed(observed: Dict[str, str], types: Dict[str, Optional[str]]) -> Dict[str, str]:
+    """
+    Partition-уудын observed төрлийг нэгтгэнэ; num/str зөрвөл str (аль ч утгыг хадгалж чадна).
+    """
+    out = dict(observed)
+    for col, kind in types.items():
+        if kind is None:
+            continue
+        prev = out.get(col)
+        out[col] = kind if prev is None or prev == kind else "str"
+    return out
+
+
+def write_partition(vdir: Path, key: str, rows: Sequence[Dict[str, Any]], types: Dict[str, str]) -> str:
+    """
+    rows (column нэр lowercase) → <key>.<token>/ ; dir нэрийг буцаана.
+    """
+    name = f"{key}.{secrets.token_hex(4)}"
+    tmp = vdir / f".{name}.tmp"
+    tmp.mkdir(parents=True)
+
+    n = len(rows)
+    for col, kind in types.items():
+        if kind == "num":
+            arr = np.fromiter(
+                (np.nan if r.get(col) is None else float(r[col]) for r in rows), dtype=np.float64, count=n
+            )
+            np.save(tmp / f"{col}.npy", arr)
+            continue
+
+        dictionary: Dict[str, int] = {}
+        codes = np.fromiter(
+            (-1 if r.get(col) is None else dictionary.setdefault(str(r[col]), len(dictionary)) for r in rows),
+            dtype=np.int32,
+            count=n,
+        )
+        np.save(tmp / f"{col}.codes.npy", codes)
+        with (tmp / f"{col}.dict.json").open("w", encoding="utf-8") as f:
+            json.dump(list(dictionary), f, ensure_ascii=False)
+
+    os.replace(tmp, vdir / name)
+    return name
+
+
+def prune(vdir: Path, manifest: Dict[str, Any], grace_seconds: float = 600.0) -> int:
+    """
+    manifest-д заагдаагүй (хуучирсан) partition dir-уудыг устгана. Уншиж байгаа
+    worker-ууд хуучин manifest-ээ reload хийх хүртэл grace хугацаа үлдээнэ.
+    """
+    live = {p["dir"] for p in manifest.get("partitions", {}).values()}
+    now = time.time()
+    removed = 0
+    for d in vdir.iterdir():
+        if not d.is_dir() or d.name in live:
+            continue
+        try:
+            if now - d.stat().st_mtime < grace_seconds:
+                continue
+            shutil.rmtree(d)
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+# -------- read --------
+
+class Partition:
+    """
+    Нэг (year, month) partition: column-уудыг анх хэрэглэх үед mmap хийнэ.
+    """
+
+    def __init__(self, path: Path, rows: int, types: Dict[str, str]):
+        self.path = path
+        self.rows = rows
+        self.types = types
+        self._num: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, np.ndarray] = {}
+        self._dict: Dict[str, List[str]] = {}
+        self._matches: Dict[Tuple[str, str, Any], np.ndarray] = {}
+
+    def num(self, col: str) -> np.ndarray:
+        arr = self._num.get(col)
+        if arr is None:
+            arr = self._num[col] = np.load(self.path / f"{col}.npy", mmap_mode="r")
+        return arr
+
+    def codes(self, col: str) -> np.ndarray:
+        arr = self._codes.get(col)
+        if arr is None:
+            arr = self._codes[col] = np.load(self.path / f"{col}.codes.npy", mmap_mode="r")
+        return arr
+
+    def dictionary(self, col: str) -> List[str]:
+        d = self._dict.get(col)
+        if d is None:
+            with (self.path / f"{col}.dict.json").open("r", encoding="utf-8") as f:
+                d = self._dict[col] = json.load(f)
+        return d
+
+    def matching_codes(self, col: str, op: str, value: Any) -> np.ndarray:
+        """
+        Predicate-ийг dictionary дээр нэг удаа бодно (мөр бүр дээр биш).
+        op: "eq" | "in" | "ilike" (substring, case-insensitive)
+        """
+        key = (col, op, value)
+        hit = self._matches.get(key)
+        if hit is not None:
+            return hit
+
+        d = self.dictionary(col)
+        if op == "eq":
+            idx = [i for i, v in enumerate(d) if v == value]
+        elif op == "in":
+            idx = [i for i, v in enumerate(d) if v in value]
+        else:
+            needle = str(value).lower()
+            idx = [i for i, v in enumerate(d) if needle in v.lower()]
+
+        hit = self._matches[key] = np.asarray(idx, dtype=np.int32)
+        return hit
+
+    def mask(self, col: str, op: str, value: Any) -> np.ndarray:
+        codes = self.codes(col)
+        hit = self.matching_codes(col, op, value)
+        if hit.size == 0:
+            return np.zeros(codes.shape, dtype=bool)
+        if hit.size == 1:
+            return codes == hit[0]
+        return np.isin(codes, hit)
+
+
+def iter_views(root: Path) -> Iterable[Path]:
+    if not root.exists():
+        return []
+    return sorted(d for d in root.iterdir() if (d / MANIFEST).exists())
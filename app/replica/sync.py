@@ -0,0 +1,194 @@
+# app/replica/sync.py
+"""
+Trade view-уудын local columnar snapshot (data/replica/) үүсгэнэ.
+
+View бүрийн (year, month) watermark-ийг (мөрийн тоо + нийлбэр) manifest-тэй харьцуулж,
+зөвхөн шинэ/өөрчлөгдсөн сарын partition-уудыг татаж .npy болгон бичээд,
+эцэст нь manifest-ийг atomically солино (ажиллаж буй worker-ууд тасалдахгүй).
+
+Run:
+  python -m app.replica.sync            # incremental
+  python -m app.replica.sync --full     # бүгдийг дахин
+  python -m app.replica.sync --view public.v_export_monthly_hs --root data/replica
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.replica.store import (
+    FORMAT_VERSION,
+    PARTITION_COLUMNS,
+    load_manifest,
+    manifest_latest,
+    merge_observed,
+    new_manifest,
+    observed_types,
+    parse_part_key,
+    part_key,
+    prune,
+    view_dirname,
+    write_manifest,
+    write_partition,
+)
+from app.sql.templates import (
+    VIEW_EXPORT,
+    VIEW_EXPORT_CATEGORY,
+    VIEW_EXPORT_COMPANY,
+    VIEW_IMPORT,
+    VIEW_IMPORT_CATEGORY,
+)
+
+VIEWS = (VIEW_EXPORT, VIEW_EXPORT_COMPANY, VIEW_EXPORT_CATEGORY, VIEW_IMPORT, VIEW_IMPORT_CATEGORY)
+
+
+def month_stats_sql(view: str) -> str:
+    # partition бүрийн мөрийн тоо + нийлбэрүүд (watermark)
+    return f"""
+SELECT year::int AS year, month::int AS month, COUNT(*) AS rows,
+       SUM(COALESCE(amountUSD,0)) AS amount, SUM(COALESCE(quantity,0)) AS qty
+FROM {view}
+GROUP BY 1, 2
+ORDER BY 1, 2
+""".strip()
+
+
+async def fetch_month_stats(conn: Any, view: str) -> Dict[str, Dict[str, Any]]:
+    r = await conn.execute(text(month_stats_sql(view)))
+    return {
+        part_key(x["year"], x["month"]): {"rows": int(x["rows"]), "amount": float(x["amount"] or 0), "qty": float(x["qty"] or 0)}
+        for x in r.mappings().all()
+    }
+
+
+async def fetch_partition(conn: Any, view: str, year: int, month: int) -> List[Dict[str, Any]]:
+    r = await conn.execute(text(f"SELECT * FROM {view} WHERE year = :year AND month = :month"), {"year": year, "month": month})
+    return [{str(k).lower(): v for k, v in row.items()} for row in r.mappings().all()]
+
+
+def changed_months(
+    old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]
+) -> Tuple[List[str], List[str]]:
+    """
+    Per-month watermark (мөрийн тоо + amount/qty нийлбэр) харьцуулна → (шинэ/өөрчлөгдсөн, устсан).
+    """
+    changed = []
+    for key, st in new.items():
+        prev = old.get(key)
+        if (
+            prev is None
+            or int(prev.get("rows") or 0) != int(st["rows"])
+            or not math.isclose(float(prev.get("amount") or 0), st["amount"], rel_tol=1e-9, abs_tol=1e-6)
+            or not math.isclose(float(prev.get("qty") or 0), st["qty"], rel_tol=1e-9, abs_tol=1e-6)
+        ):
+            changed.append(key)
+    removed = [key for key in old if key not in new]
+    return sorted(changed), sorted(removed)
+
+
+async def sync_view(
+    conn: Any,
+    view: str,
+    root: Path,
+    full: bool = False,
+    stats: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Зөвхөн шинэ/өөрчлөгдсөн сарын partition-уудыг татаж бичнэ (full=True бол бүгдийг).
+    Өөрчлөгдөөгүй partition-ууд manifest-д хэвээр үлдэж, уншигчид шинэ manifest-ийг
+    дараагийн reload дээр авна.
+    """
+    t0 = time.perf_counter()
+    vdir = root / view_dirname(view)
+    vdir.mkdir(parents=True, exist_ok=True)
+
+    old = load_manifest(vdir) or new_manifest(view)
+    if old.get("format") != FORMAT_VERSION:
+        # хуучин format: partition-ий types бичигдээгүй → бүгдийг дахин бичнэ
+        full = True
+    if stats is None:
+        stats = await fetch_month_stats(conn, view)
+
+    old_parts: Dict[str, Dict[str, Any]] = {} if full else dict(old.get("partitions") or {})
+    changed, removed = changed_months(old_parts, stats)
+
+    manifest = new_manifest(view)
+    if not full:
+        manifest["columns"] = dict(old.get("columns") or {})
+        manifest["observed"] = dict(old.get("observed") or {})
+    manifest["partitions"] = {k: v for k, v in old_parts.items() if k in stats and k not in changed}
+
+    rows_written = writes = 0
+    pending = changed
+    for _ in range(3):
+        for key in pending:
+            year, month = parse_part_key(key)
+            rows = await fetch_partition(conn, view, year, month)
+            manifest["observed"] = merge_observed(manifest["observed"], observed_types(rows))
+            cols = [*manifest["columns"], *(c for c in (rows[0] if rows else ()) if c not in PARTITION_COLUMNS)]
+            # бүгд NULL байсан column → str (төрөл нь дараа тодорвол доорх давталт дахин бичнэ)
+            manifest["columns"] = {c: manifest["observed"].get(c, "str") for c in cols}
+            types = dict(manifest["columns"])
+            # disk write-ийг event loop-оос гаргана (app дотор refresh хийх үед request-ууд хүлээхгүй)
+            d = await asyncio.to_thread(write_partition, vdir, key, rows, types)
+            manifest["partitions"][key] = {**stats[key], "rows": len(rows), "dir": d, "types": types}
+            rows_written += len(rows)
+            writes += 1
+
+        # column-ийн төрөл өөрчлөгдсөн / шинэ column нэмэгдсэн → өөр encoding-тэй partition-уудыг дахин бичнэ
+        pending = sorted(k for k, p in manifest["partitions"].items() if p.get("types") != manifest["columns"])
+        if not pending:
+            break
+
+    manifest["latest"] = manifest_latest(manifest["partitions"])
+    manifest["synced_at"] = time.time()
+    write_manifest(vdir, manifest)
+    prune(vdir, manifest, grace_seconds=settings.replica_reload_seconds * 2)
+
+    return {
+        "view": view,
+        "partitions": len(manifest["partitions"]),
+        "changed": len(changed),
+        "removed": len(removed),
+        "retyped": writes - len(changed),
+        "rows": rows_written,
+        "latest": manifest["latest"],
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+
+
+async def run(views: List[str], root: Path, full: bool = False) -> List[Dict[str, Any]]:
+    from app.core.database import engine
+
+    out = []
+    async with engine.connect() as conn:
+        for view in views:
+            out.append(await sync_view(conn, view, root, full=full))
+    await engine.dispose()
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Snapshot trade views into the local columnar replica")
+    ap.add_argument("--view", action="append", choices=VIEWS, help="default: бүх view")
+    ap.add_argument("--root", default=settings.replica_dir)
+    ap.add_argument("--full", action="store_true", help="watermark-ийг үл тоож бүх partition-ийг дахин татна")
+    args = ap.parse_args(argv)
+
+    for rep in asyncio.run(run(args.view or list(VIEWS), Path(args.root), full=args.full)):
+        print(
+            f"{rep['view']}: {rep['partitions']} partitions ({rep['changed']} changed, {rep['removed']} removed, {rep['retyped']} retyped), "
+            f"{rep['rows']} rows written, latest={rep['latest']} ({rep['seconds']}s)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
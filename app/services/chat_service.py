@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from app.core.session_store import InMemorySessionStore
+from app.analytics.tracing import Trace
+from app.core.session_store import build_session_store
 
 from app.conversation.models import ConversationState, Intent as IntentModel
 from app.conversation.merge import merge_intent, apply_compare_prev_year
@@ -22,10 +23,10 @@ except Exception:
     extract_intent = None  # type: ignore
 
 
-store = InMemorySessionStore()
+store = build_session_store()
 
 
-def handle_chat(message: str, session_id: str) -> Dict[str, Any]:
+def handle_chat(message: str, session_id: str, trace: Optional[Trace] = None) -> Dict[str, Any]:
     """
     Conversation layer only:
     - session_id -> state load/store
@@ -33,15 +34,19 @@ def handle_chat(message: str, session_id: str) -> Dict[str, Any]:
     - clarification decision
     - suggestions
     Энэ функц SQL ажиллуулахгүй.
+    trace өгөгдвөл "convo.*" stage-уудыг хэмжинэ.
     """
+    trace = trace or Trace()
     sid = (session_id or "default").strip() or "default"
     q_raw = (message or "").strip()
 
-    prev: ConversationState = store.get(sid)
+    with trace.span("convo.session_get"):
+        prev: ConversationState = store.get(sid)
 
     # 0) Empty question -> ask user
     if not q_raw:
-        store.set(sid, prev)
+        with trace.span("convo.session_set"):
+            store.set(sid, prev)
         return {
             "mode": "clarify",
             "answer": "Асуултаа бичнэ үү.",
@@ -49,7 +54,7 @@ def handle_chat(message: str, session_id: str) -> Dict[str, Any]:
                 "needs_clarification": True,
                 "choices": [],
                 "suggestions": build_suggestions(prev),
-                "state": prev.model_dump(),
+                "state": prev.dump(),
                 "intent": {},
                 "overrides": {},
             },
@@ -80,25 +85,27 @@ def handle_chat(message: str, session_id: str) -> Dict[str, Any]:
 
     # 1) intent (LLM schema dict) + fallback
     intent_dict: Dict[str, Any] = {}
-    if extract_intent is not None:
-        try:
-            intent_dict = extract_intent(q_final) or {}
-            intent_dict = sanitize_intent(intent_dict, q_final)
-        except Exception:
-            # ✅ LLM extractor failed -> fallback with prev_state
+    with trace.span("convo.intent"):
+        if extract_intent is not None:
+            try:
+                intent_dict = extract_intent(q_final) or {}
+                intent_dict = sanitize_intent(intent_dict, q_final)
+            except Exception:
+                # ✅ LLM extractor failed -> fallback with prev_state
+                intent_dict = build_intent_fallback(q_final, prev_state=prev_intent)
+                intent_dict = sanitize_intent(intent_dict, q_final)
+        else:
+            # ✅ extractor not available -> always fallback with prev_state
             intent_dict = build_intent_fallback(q_final, prev_state=prev_intent)
             intent_dict = sanitize_intent(intent_dict, q_final)
-    else:
-        # ✅ extractor not available -> always fallback with prev_state
-        intent_dict = build_intent_fallback(q_final, prev_state=prev_intent)
-        intent_dict = sanitize_intent(intent_dict, q_final)
 
     # 2) Follow-up overrides
     overrides: Dict[str, Any] = {}
-    try:
-        overrides = detect_followup(q_final) or {}
-    except Exception:
-        overrides = {}
+    with trace.span("convo.followup"):
+        try:
+            overrides = detect_followup(q_final) or {}
+        except Exception:
+            overrides = {}
 
     # 3) dict -> IntentModel (safe)
     try:
@@ -107,7 +114,8 @@ def handle_chat(message: str, session_id: str) -> Dict[str, Any]:
         intent_model = IntentModel()
 
     # 4) merge state
-    state = merge_intent(prev, intent_model, overrides)
+    with trace.span("convo.merge"):
+        state = merge_intent(prev, intent_model, overrides)
 
     # 5) If we just consumed a pending clarify, clear pending flags NOW
     if awaiting:
@@ -130,7 +138,8 @@ def handle_chat(message: str, session_id: str) -> Dict[str, Any]:
         state.pending_question = base_q
         state.pending_clarify = clar
 
-        store.set(sid, state)
+        with trace.span("convo.session_set"):
+            store.set(sid, state)
         return {
             "mode": "clarify",
             "answer": clar["question"],
@@ -138,7 +147,7 @@ def handle_chat(message: str, session_id: str) -> Dict[str, Any]:
                 "needs_clarification": True,
                 "choices": clar.get("choices", []),
                 "suggestions": build_suggestions(state),
-                "state": state.model_dump(),
+                "state": state.dump(),
                 "intent": intent_dict,
                 "overrides": overrides,
                 # ✅ debug helpers (remove later if you want)
@@ -152,14 +161,15 @@ def handle_chat(message: str, session_id: str) -> Dict[str, Any]:
         }
 
     # ✅ ready
-    store.set(sid, state)
+    with trace.span("convo.session_set"):
+        store.set(sid, state)
     return {
         "mode": "ready",
         "answer": "",
         "meta": {
             "needs_clarification": False,
             "suggestions": build_suggestions(state),
-            "state": state.model_dump(),
+            "state": state.dump(),
             "intent": intent_dict,
             "overrides": overrides,
             # ✅ debug helpers
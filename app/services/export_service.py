@@ -0,0 +1,178 @@
+# app/services/export_service.py
+"""
+Export writer-ууд: server-side cursor-ын chunk бүрийг шууд bytes болгон гаргана (санах ой ~ нэг chunk).
+
+- csv: utf-8-sig (Excel Монгол үсгийг зөв уншина)
+- parquet: pyarrow (optional) — chunk бүр нэг row group
+- xlsx: openpyxl write_only (optional) — мөрүүд temp файл руу урсаж, эцэст нь файлыг chunk-аар уншина
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+import tempfile
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+try:
+    from openpyxl import Workbook  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    Workbook = None
+
+XLSX_MAX_ROWS = 1_048_575  # Excel sheet limit (header-ийг хасаад)
+READ_BLOCK = 256 * 1024
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def missing_dependency(fmt: str) -> Optional[str]:
+    if fmt == "parquet" and pa is None:
+        return "pyarrow"
+    if fmt == "xlsx" and Workbook is None:
+        return "openpyxl"
+    return None
+
+
+class _Sink:
+    # pyarrow-ийн бичсэн bytes-ийг цуглуулж, chunk бүрийн дараа drain хийнэ
+    def __init__(self) -> None:
+        self._parts: List[bytes] = []
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        b = bytes(data)
+        self._parts.append(b)
+        return len(b)
+
+    def flush(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+class CsvWriter:
+    def __init__(self) -> None:
+        self.columns: Optional[List[str]] = None
+
+    def write(self, rows: List[Dict[str, Any]]) -> bytes:
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        prefix = b""
+        if self.columns is None:
+            self.columns = list(rows[0].keys()) if rows else []
+            w.writerow(self.columns)
+            prefix = "\ufeff".encode("utf-8")
+        for row in rows:
+            w.writerow(["" if row.get(c) is None else row.get(c) for c in self.columns])
+        return prefix + buf.getvalue().encode("utf-8")
+
+    def close(self) -> Iterator[bytes]:
+        if self.columns is None:
+            yield "\ufeff".encode("utf-8")
+
+
+class ParquetWriter:
+    def __init__(self) -> None:
+        self._sink = _Sink()
+        self._writer = None
+        self._schema = None
+        self._as_text: List[str] = []
+
+    @staticmethod
+    def _plain(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # numeric → float64 (эхний chunk-аас decimal precision тааварлавал дараагийнх нь overflow болно)
+        return [{k: float(v) if isinstance(v, Decimal) else v for k, v in r.items()} for r in rows]
+
+    def _init_schema(self, rows: List[Dict[str, Any]]) -> None:
+        schema = pa.Table.from_pylist(rows).schema
+        # эхний chunk-д бүгд NULL байсан багана → string (дараагийн chunk-уудад төрөл зөрөхгүй)
+        fields = []
+        for f in schema:
+            if pa.types.is_null(f.type):
+                self._as_text.append(f.name)
+                fields.append(pa.field(f.name, pa.string()))
+            else:
+                fields.append(f)
+        self._schema = pa.schema(fields)
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+
+    def write(self, rows: List[Dict[str, Any]]) -> bytes:
+        if not rows:
+            return b""
+        rows = self._plain(rows)
+        if self._writer is None:
+            self._init_schema(rows)
+        if self._as_text:
+            rows = [
+                {**r, **{c: (None if r.get(c) is None else str(r.get(c))) for c in self._as_text}}
+                for r in rows
+            ]
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self._schema))
+        return self._sink.drain()
+
+    def close(self) -> Iterator[bytes]:
+        if self._writer is None:
+            self._schema = pa.schema([])
+            self._writer = pq.ParquetWriter(self._sink, self._schema)
+        self._writer.close()
+        yield self._sink.drain()
+
+
+class XlsxWriter:
+    def __init__(self, sheet: str = "data") -> None:
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(sheet)
+        self.columns: Optional[List[str]] = None
+        self.rows = 0
+
+    def write(self, rows: List[Dict[str, Any]]) -> bytes:
+        if self.columns is None and rows:
+            self.columns = list(rows[0].keys())
+            self._ws.append(self.columns)
+        for row in rows:
+            if self.rows >= XLSX_MAX_ROWS:
+                break
+            self._ws.append([float(v) if isinstance(v, Decimal) else v for v in (row.get(c) for c in self.columns)])
+            self.rows += 1
+        # write_only: мөрүүд openpyxl-ийн temp файл руу урсана; zip нь зөвхөн save дээр үүснэ
+        return b""
+
+    def close(self) -> Iterator[bytes]:
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            self._wb.save(path)
+            with open(path, "rb") as f:
+                while True:
+                    block = f.read(READ_BLOCK)
+                    if not block:
+                        break
+                    yield block
+        finally:
+            os.unlink(path)
+
+
+def make_writer(fmt: str):
+    if fmt == "parquet":
+        return ParquetWriter()
+    if fmt == "xlsx":
+        return XlsxWriter()
+    return CsvWriter()
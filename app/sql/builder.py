@@ -4,6 +4,8 @@ import re
 from typing import Any, Dict, Tuple, Optional, List
 
 from sqlalchemy import text
+from app.sql.categories import category_dims
+from app.sql.derive import LOOKBACK_MONTHS, WINDOW_SERIES_CALCS
 from app.sql.templates import resolve_view
 
 HS_CODE_MAP = {
@@ -92,8 +94,44 @@ def _time_years(intent_time: Any) -> Optional[List[int]]:
         return years if years else None
     return None
 
-def _where_filters(filters: Dict[str, Any], params: Dict[str, Any], need_company: bool) -> str:
+def _ym(x: Any, default_month: int) -> Optional[Tuple[int, int]]:
+    if isinstance(x, dict) and x.get("year") is not None:
+        return int(x["year"]), int(x.get("month") or default_month)
+    if isinstance(x, (list, tuple)) and x:
+        return int(x[0]), int(x[1] if len(x) > 1 and x[1] else default_month)
+    return None
+
+
+def _time_range(intent_time: Any) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    {"start": {"year","month"}, "end": {"year","month"}} → ((sy, sm), (ey, em)), эсвэл None
+    (сар өгөөгүй бол start=1, end=12; эхлэл > төгсгөл бол солино)
+    """
+    if not isinstance(intent_time, dict):
+        return None
+    try:
+        start = _ym(intent_time.get("start"), 1)
+        end = _ym(intent_time.get("end"), 12)
+    except (TypeError, ValueError):
+        return None
+    if start is None or end is None:
+        return None
+    if not (1 <= start[1] <= 12 and 1 <= end[1] <= 12):
+        return None
+    return (start, end) if start <= end else (end, start)
+
+
+def _where_filters(
+    filters: Dict[str, Any],
+    params: Dict[str, Any],
+    need_company: bool,
+    exact: Optional[Dict[str, List[str]]] = None,
+) -> str:
+    """
+    exact: category field → view дээрх яг утгууд (category_dims); байвал ILIKE-ийн оронд equality.
+    """
     clauses = []
+    exact = exact or {}
 
     # hscode: string эсвэл list
     if filters.get("hscode"):
@@ -118,22 +156,20 @@ def _where_filters(filters: Dict[str, Any], params: Dict[str, Any], need_company
         params["customs"] = f"%{str(filters['customs']).strip()}%"
         clauses.append("customs ILIKE :customs")
 
-        # --- Category filters (for v_*_monthly_category) ---
-    if filters.get("purpose"):
-        params["purpose"] = f"%{str(filters['purpose']).strip()}%"
-        clauses.append("purpose ILIKE :purpose")
-
-    if filters.get("sub1"):
-        params["sub1"] = f"%{str(filters['sub1']).strip()}%"
-        clauses.append("sub1 ILIKE :sub1")
-
-    if filters.get("sub2"):
-        params["sub2"] = f"%{str(filters['sub2']).strip()}%"
-        clauses.append("sub2 ILIKE :sub2")
-
-    if filters.get("sub3"):
-        params["sub3"] = f"%{str(filters['sub3']).strip()}%"
-        clauses.append("sub3 ILIKE :sub3")
+    # --- Category filters (for v_*_monthly_category) ---
+    for field in ("purpose", "sub1", "sub2", "sub3"):
+        if not filters.get(field):
+            continue
+        values = exact.get(field)
+        if values and len(values) == 1:
+            params[field] = values[0]
+            clauses.append(f"{field} = :{field}")
+        elif values:
+            params[field] = list(values)
+            clauses.append(f"{field} = ANY(CAST(:{field} AS text[]))")
+        else:
+            params[field] = f"%{str(filters[field]).strip()}%"
+            clauses.append(f"{field} ILIKE :{field}")
 
     # export company view only
     if need_company and filters.get("company"):
@@ -184,7 +220,33 @@ def build_sql(intent: Dict[str, Any], question: str) -> Tuple[Any, Dict[str, Any
     year, month, is_latest = _time_parts(intent.get("time", "latest"))
     years_list = _time_years(intent.get("time"))
 
-    # ✅ HARD RULE: multi-year => timeseries_year only
+    # ✅ range timeseries: {"start","end"} эсвэл years + calc=timeseries_range → нэг monthly series
+    time_range = _time_range(intent.get("time"))
+    if time_range is None and calc == "timeseries_range":
+        if years_list:
+            time_range = ((years_list[0], 1), (years_list[-1], 12))
+        else:
+            calc = "timeseries_month"
+
+    # ✅ window calc (mom / rolling_12m / cagr): хугацааг нэг (start, end) хүрээ болгоно
+    # (year/years байхгүй бол latest хэвээр)
+    if calc in ("mom", "rolling_12m", "cagr") and time_range is None:
+        if calc == "cagr" and years_list and len(years_list) == 1:
+            year, years_list = years_list[0], None
+        if years_list:
+            time_range = ((years_list[0], 1), (years_list[-1], 12))
+        elif calc == "cagr" and year is not None:
+            # нэг он → window жилийн CAGR (тухайн он хүртэл)
+            time_range = ((year - (window - 1), 1), (year, 12))
+        elif year is not None:
+            time_range = ((year, month or 1), (year, month or 12))
+
+    if time_range is not None:
+        if calc not in ("mom", "rolling_12m", "cagr"):
+            calc = "timeseries_range"
+        year, month, is_latest, years_list = None, None, False, None
+
+    # ✅ HARD RULE: multi-year => timeseries_year only (range-ээс бусад)
     if years_list:
         calc = "timeseries_year"
 
@@ -203,13 +265,15 @@ def build_sql(intent: Dict[str, Any], question: str) -> Tuple[Any, Dict[str, Any
     # ✅ 5) Resolve view AFTER filters are stable
     # -------------------------------------------------
     need_company = bool(filters.get("company")) and domain == "export"
-    view, view_type = resolve_view(domain, need_company, filters)
+    view, view_type = resolve_view(domain, need_company, filters, category_dims.available())
 
     # -------------------------------------------------
     # ✅ 6) Params + where
     # -------------------------------------------------
     params: Dict[str, Any] = {"topn": topn, "window": window}
-    w = _where_filters(filters, params, need_company)
+    # ✅ category түлхүүр үг → cached dimension-ий яг утгууд (олдохгүй бол ILIKE)
+    category_exact = category_dims.exact_filters(view, filters) if view_type == "category" else {}
+    w = _where_filters(filters, params, need_company, category_exact)
 
     # metric expr (aggregate level)
     if metric == "amountUSD":
@@ -222,6 +286,9 @@ def build_sql(intent: Dict[str, Any], question: str) -> Tuple[Any, Dict[str, Any
             "/ NULLIF(SUM(COALESCE(quantity,0)) / 1000, 0)"
         )
 
+    # ✅ monthly series дээр amount/qty-г хамт авна → derive.py жил/нэгж үнийг DB-гүй гаргана
+    components_expr = "SUM(COALESCE(amountUSD,0)) AS amount, SUM(COALESCE(quantity,0)) AS qty"
+
     meta = {
         "view": view,
         "view_type": view_type,
@@ -230,13 +297,22 @@ def build_sql(intent: Dict[str, Any], question: str) -> Tuple[Any, Dict[str, Any
         "calc": calc,
         "metric": metric,
         "window": window,
-        "is_timeseries": calc.startswith("timeseries"),
+        "is_timeseries": calc.startswith("timeseries") or calc in WINDOW_SERIES_CALCS,
         "granularity": (
             "year" if calc == "timeseries_year"
-            else "month" if calc == "timeseries_month"
+            else "month" if calc in ("timeseries_month", "timeseries_range", *WINDOW_SERIES_CALCS)
             else "single"
         ),
+        # ✅ resolved filters/time (derive/cache layer-д ашиглана)
+        "filters": dict(filters),
+        "time": {"year": year, "month": month, "years": years_list, "latest": is_latest},
     }
+    if category_exact:
+        meta["category_exact"] = category_exact
+    if time_range is not None:
+        (sy, sm), (ey, em) = time_range
+        meta["time"]["start"] = {"year": sy, "month": sm}
+        meta["time"]["end"] = {"year": ey, "month": em}
 
     # latest month CTE body (no leading WITH)
     latest_cte = f"""
@@ -307,7 +383,7 @@ latest_parts AS (
                 base = w + (" AND year = :year" if w else "WHERE year = :year")
 
                 sql_body = f"""
-    SELECT year, month, {metric_expr} AS value
+    SELECT year, month, {metric_expr} AS value, {components_expr}
     FROM {view}
     {base}
     GROUP BY year, month
@@ -406,7 +482,7 @@ FROM {view}
             base = w.replace("WHERE ", "")
             extra = f" AND {base}" if base else ""
             sql_body = f"""
-SELECT year, month, {metric_expr} AS value
+SELECT year, month, {metric_expr} AS value, {components_expr}
 FROM {view}
 WHERE year = (SELECT y FROM latest_parts){extra}
 GROUP BY year, month
@@ -419,7 +495,7 @@ ORDER BY year, month
         params["year"] = year
         base = w + (" AND year = :year" if w else "WHERE year = :year")
         sql_body = f"""
-SELECT year, month, {metric_expr} AS value
+SELECT year, month, {metric_expr} AS value, {components_expr}
 FROM {view}
 {base}
 GROUP BY year, month
@@ -427,6 +503,174 @@ ORDER BY year, month
 """
         return text(sql_body), params, meta
 
+    if calc == "timeseries_range":
+        (sy, sm), (ey, em) = time_range
+        params.update({"start_year": sy, "start_month": sm, "end_year": ey, "end_month": em})
+        # row comparison → (year, month) index-ээр range scan
+        range_clause = (
+            "(year, month) >= (CAST(:start_year AS int), CAST(:start_month AS int)) "
+            "AND (year, month) <= (CAST(:end_year AS int), CAST(:end_month AS int))"
+        )
+        base = w + f" AND {range_clause}" if w else f"WHERE {range_clause}"
+        sql_body = f"""
+SELECT year, month, {metric_expr} AS value, {components_expr}
+FROM {view}
+{base}
+GROUP BY year, month
+ORDER BY year, month
+"""
+        return text(sql_body), params, meta
+
+    if calc in WINDOW_SERIES_CALCS:
+        # mom / rolling_12m: (year, month) нийлбэр → window function (LAG / 12 сарын RANGE frame)
+        # хүрээний өмнөх LOOKBACK_MONTHS сарыг нэмж уншаад, гаралтаас нь хасна
+        lookback = LOOKBACK_MONTHS[calc]
+
+        def _value(a: str, q: str) -> str:
+            if metric == "quantity":
+                return q
+            if metric == "weighted_price":
+                return f"{a} / NULLIF({q} / 1000, 0)"
+            return a
+
+        if is_latest:
+            params["lookback"] = lookback
+            scope = (
+                "year >= (SELECT y FROM latest_parts) - 1 "
+                "AND year * 12 + month - 1 >= (SELECT y * 12 + m - 1 FROM latest_parts) - CAST(:lookback AS int)"
+            )
+            out_where = "idx = (SELECT y * 12 + m - 1 FROM latest_parts)"
+        else:
+            (sy, sm), (ey, em) = time_range
+            lb = sy * 12 + (sm - 1) - lookback
+            params.update(
+                {
+                    "lb_year": lb // 12, "lb_month": lb % 12 + 1,
+                    "end_year": ey, "end_month": em,
+                    "start_idx": sy * 12 + (sm - 1),
+                }
+            )
+            scope = (
+                "(year, month) >= (CAST(:lb_year AS int), CAST(:lb_month AS int)) "
+                "AND (year, month) <= (CAST(:end_year AS int), CAST(:end_month AS int))"
+            )
+            out_where = "idx >= CAST(:start_idx AS int)"
+        base = w + f" AND {scope}" if w else f"WHERE {scope}"
+
+        monthly_cte = f"""
+monthly AS (
+  SELECT
+    year::int AS year,
+    month::int AS month,
+    year::int * 12 + month::int - 1 AS idx,
+    SUM(COALESCE(amountUSD,0)) AS amount,
+    SUM(COALESCE(quantity,0)) AS qty
+  FROM {view}
+  {base}
+  GROUP BY 1, 2, 3
+)""".strip()
+
+        if calc == "mom":
+            # өмнөх сар өгөгдөлгүй (row байхгүй) бол LAG нь түүнээс өмнөх сарыг өгнө → idx-ээр шалгана
+            sql_body = f"""
+{monthly_cte},
+pairs AS (
+  SELECT
+    year, month, idx,
+    {_value("amount", "qty")} AS value,
+    CASE WHEN LAG(idx) OVER w = idx - 1
+      THEN {_value("LAG(amount) OVER w", "LAG(qty) OVER w")}
+    END AS previous
+  FROM monthly
+  WINDOW w AS (ORDER BY idx)
+)
+SELECT
+  year, month, value, previous,
+  CASE
+    WHEN previous IS NULL OR previous = 0 THEN NULL
+    ELSE (value - previous) / previous * 100.0
+  END AS pct
+FROM pairs
+WHERE {out_where}
+ORDER BY idx
+""".strip()
+        else:
+            # RANGE frame (idx дээр) → дутуу сар байсан ч яг 12 хуанлийн сар; months = өгөгдөлтэй сарын тоо
+            sql_body = f"""
+{monthly_cte},
+rolling AS (
+  SELECT
+    year, month, idx,
+    SUM(amount) OVER w AS r_amount,
+    SUM(qty) OVER w AS r_qty,
+    COUNT(*) OVER w AS months
+  FROM monthly
+  WINDOW w AS (ORDER BY idx RANGE BETWEEN {lookback} PRECEDING AND CURRENT ROW)
+)
+SELECT
+  year, month,
+  {_value("r_amount", "r_qty")} AS value,
+  months
+FROM rolling
+WHERE {out_where}
+ORDER BY idx
+""".strip()
+
+        if is_latest:
+            return text("WITH " + latest_cte + ",\n" + sql_body), params, meta
+        return text("WITH " + sql_body), params, meta
+
+    if calc == "cagr":
+        # compound annual growth: (эцсийн он / эхний он)^(1 / жилийн зөрүү) - 1, он бүрийн нийлбэрээр
+        if is_latest:
+            # сүүлийн сар 12 биш бол тухайн он дутуу → өмнөх бүтэн оноор төгсгөнө
+            params["window"] = window
+            bounds = """
+bounds AS (
+  SELECT y1 - (CAST(:window AS int) - 1) AS y0, y1
+  FROM (SELECT CASE WHEN m = 12 THEN y ELSE y - 1 END AS y1 FROM latest_parts) t
+)""".strip()
+        else:
+            (sy, _), (ey, _) = time_range
+            params.update({"start_year": sy, "end_year": ey})
+            bounds = """
+bounds AS (
+  SELECT CAST(:start_year AS int) AS y0, CAST(:end_year AS int) AS y1
+)""".strip()
+
+        yearly_where = "year IN ((SELECT y0 FROM bounds), (SELECT y1 FROM bounds))"
+        base = w + f" AND {yearly_where}" if w else f"WHERE {yearly_where}"
+        sql_body = f"""
+{bounds},
+yearly AS (
+  SELECT year::int AS y, {metric_expr} AS v
+  FROM {view}
+  {base}
+  GROUP BY 1
+),
+ends AS (
+  SELECT
+    b.y0, b.y1,
+    (SELECT v FROM yearly WHERE y = b.y0) AS start_value,
+    (SELECT v FROM yearly WHERE y = b.y1) AS end_value
+  FROM bounds b
+)
+SELECT
+  y0 AS start_year,
+  y1 AS end_year,
+  start_value,
+  end_value,
+  y1 - y0 AS periods,
+  CASE
+    WHEN y1 <= y0 OR start_value IS NULL OR start_value <= 0 OR end_value IS NULL OR end_value < 0 THEN NULL
+    ELSE (POWER(CAST(end_value AS float8) / CAST(start_value AS float8), 1.0 / (y1 - y0)) - 1) * 100.0
+  END AS pct
+FROM ends
+""".strip()
+        if is_latest:
+            return text("WITH " + latest_cte + ",\n" + sql_body), params, meta
+        return text("WITH " + sql_body), params, meta
+
     if calc == "timeseries_year":
         # years_list байх ёстой
         if not years_list:
@@ -682,4 +926,56 @@ SELECT
 FROM {view}
 {where2}
 """
-    return text(sql_body), params, meta
\ No newline at end of file
+    return text(sql_body), params, meta
+
+def with_row_limit(sql: Any, params: Dict[str, Any], limit: int) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Мөрийн хязгаарыг SQL руу түлхэнэ (Python-д бүгдийг татаад slice хийхгүй).
+    build_sql-ийн query бүр top-level SELECT-ээр төгсдөг тул төгсгөлд нь LIMIT залгана.
+    """
+    body = str(getattr(sql, "text", sql)).rstrip().rstrip(";")
+    return text(body + "\nLIMIT :_row_limit"), {**params, "_row_limit": int(limit)}
+
+
+def build_detail_sql(intent: Dict[str, Any], question: str = "") -> Tuple[Any, Dict[str, Any], Dict[str, Any]]:
+    """
+    Aggregate биш — view-ийн бүх багана, build_sql-тэй ижил view/filter/time resolution.
+    (NDJSON stream / export-д; server-side cursor-оор уншина)
+    """
+    _, _, meta = build_sql(intent, question)
+    view = meta["view"]
+    t = meta["time"]
+
+    params: Dict[str, Any] = {}
+    where = _where_filters(dict(meta["filters"]), params, meta["need_company"], meta.get("category_exact"))
+    clauses = [where[len("WHERE "):]] if where else []
+
+    if t.get("start") and t.get("end"):
+        params.update({
+            "start_year": t["start"]["year"], "start_month": t["start"]["month"],
+            "end_year": t["end"]["year"], "end_month": t["end"]["month"],
+        })
+        clauses.append(
+            "(year, month) >= (CAST(:start_year AS int), CAST(:start_month AS int)) "
+            "AND (year, month) <= (CAST(:end_year AS int), CAST(:end_month AS int))"
+        )
+    elif t.get("years"):
+        params["years"] = list(t["years"])
+        clauses.append("year = ANY(CAST(:years AS int[]))")
+    elif t.get("year") is not None and not t.get("latest"):
+        params["year"] = int(t["year"])
+        clauses.append("year = :year")
+        if t.get("month") is not None:
+            params["month"] = int(t["month"])
+            clauses.append("month = :month")
+    else:
+        # latest сар (row comparison → (year, month) index ашиглагдана)
+        clauses.append(f"(year, month) = (SELECT year, month FROM {view} ORDER BY year DESC, month DESC LIMIT 1)")
+
+    sql_body = f"""
+SELECT *
+FROM {view}
+WHERE {" AND ".join(clauses)}
+ORDER BY year, month
+"""
+    return text(sql_body), params, {**meta, "detail": True}
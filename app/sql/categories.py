@@ -0,0 +1,131 @@
+# app/sql/categories.py
+"""
+Category dimension cache: category view бүрийн purpose/sub1–sub3 distinct утгууд.
+
+Асуултын түлхүүр үг ("тамхи") → тухайн view дээр яг байгаа утгууд ("Тамхи, тамхины орлуулагч" г.м.)
+→ builder ILIKE '%тамхи%'-ийн оронд `sub3 = :sub3` / `sub3 = ANY(...)` ашиглана (equality/index).
+
+- export category view зөвхөн ачаалагдсан (DB дээр байгаа) үед ашиглагдана, үгүй бол HS view
+  (DDL: app/sql/views/v_export_monthly_category.sql)
+- cache ачаалагдаагүй, эсвэл тохирох утга олдоогүй (шинэ утга нэмэгдсэн байж болно) бол ILIKE хэвээр
+- CATEGORY_DIM_REFRESH_SECONDS тутам дахин ачаална (0 = зөвхөн startup)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.sql.templates import VIEW_EXPORT_CATEGORY, VIEW_IMPORT_CATEGORY
+
+log = logging.getLogger(__name__)
+
+CATEGORY_FIELDS = ("purpose", "sub1", "sub2", "sub3")
+# match memo-ийн түлхүүр нь хэрэглэгчийн чөлөөт текст → LRU-аар хязгаарлана
+MATCH_CACHE_SIZE = 4096
+
+
+def dim_sql(view: str) -> str:
+    return f"SELECT DISTINCT {', '.join(CATEGORY_FIELDS)} FROM {view}"
+
+
+class CategoryDims:
+    """
+    view → field → [(утга, casefold утга)]. Match-ууд (view, field, needle)-ээр memoize хийгдэнэ
+    (сүүлд ашигласан max_matches хүртэл).
+    """
+
+    def __init__(self, views: Iterable[str], max_matches: int = MATCH_CACHE_SIZE):
+        self.views = tuple(views)
+        self.max_matches = max_matches
+        self._values: Dict[str, Dict[str, Tuple[Tuple[str, str], ...]]] = {}
+        self._matches: "OrderedDict[Tuple[str, str, str], Optional[List[str]]]" = OrderedDict()
+        self.loaded_at: Dict[str, float] = {}
+
+    def set(self, view: str, rows: Iterable[Dict[str, Any]]) -> None:
+        values: Dict[str, set] = {f: set() for f in CATEGORY_FIELDS}
+        for r in rows:
+            for f in CATEGORY_FIELDS:
+                v = r.get(f)
+                if v is not None and str(v).strip():
+                    values[f].add(str(v))
+        self._values[view] = {f: tuple((v, v.casefold()) for v in sorted(vs)) for f, vs in values.items()}
+        self._matches = OrderedDict((k, v) for k, v in self._matches.items() if k[0] != view)
+        self.loaded_at[view] = time.time()
+
+    def available(self) -> frozenset:
+        # dimension-ууд нь амжилттай ачаалагдсан view-ууд (view байхгүй / load алдаатай бол орохгүй)
+        return frozenset(self._values)
+
+    def match(self, view: str, field: str, term: Any) -> Optional[List[str]]:
+        """
+        ILIKE '%term%'-тэй ижил (case-insensitive substring) утгууд; бодож чадахгүй бол None.
+        """
+        values = self._values.get(view, {}).get(field)
+        if values is None:
+            return None
+        needle = str(term).strip().casefold()
+        # хоосон / wildcard-тэй бол ILIKE-ийн утга өөр болно
+        if not needle or "%" in needle or "_" in needle:
+            return None
+
+        key = (view, field, needle)
+        if key in self._matches:
+            self._matches.move_to_end(key)
+            return self._matches[key]
+        hit = [v for v, folded in values if needle in folded] or None
+        self._matches[key] = hit
+        if len(self._matches) > self.max_matches:
+            self._matches.popitem(last=False)
+        return hit
+
+    def exact_filters(self, view: str, filters: Dict[str, Any]) -> Dict[str, List[str]]:
+        out: Dict[str, List[str]] = {}
+        if view not in self._values:
+            return out
+        for f in CATEGORY_FIELDS:
+            if filters.get(f):
+                hit = self.match(view, f, filters[f])
+                if hit:
+                    out[f] = hit
+        return out
+
+    async def load(self, views: Optional[Iterable[str]] = None) -> None:
+        from app.core.database import LazySession, read_router
+
+        # бусад analytic read-ийн адил replica руу (primary зөвхөн fallback); query бүр тусдаа connection
+        db = LazySession(read_router)
+        for view in views or self.views:
+            try:
+                r = await db.execute(text(dim_sql(view)))
+                rows = [dict(x) for x in r.mappings().all()]
+            except Exception as e:
+                # view байхгүй/алдаатай бол тухайн view ILIKE-аар үргэлжилнэ
+                log.warning("category dims %s: %s: %s", view, type(e).__name__, e)
+                continue
+            self.set(view, rows)
+            log.info("category dims %s: %s", view, {f: len(v) for f, v in self._values[view].items()})
+
+    async def refresh_loop(self, interval: float) -> None:
+        while True:
+            try:
+                await self.load()
+            except Exception as e:
+                log.warning("category dims load failed: %s: %s", type(e).__name__, e)
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+    def gauge(self) -> List[Tuple[Dict[str, str], float]]:
+        return [
+            ({"view": view, "field": f}, float(len(vals)))
+            for view, fields in self._values.items()
+            for f, vals in fields.items()
+        ]
+
+
+category_dims = CategoryDims((VIEW_IMPORT_CATEGORY, VIEW_EXPORT_CATEGORY))
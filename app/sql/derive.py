@@ -0,0 +1,323 @@
+# app/sql/derive.py
+"""
+Derivation layer: build_sql-ийн intent-ийг аль хэдийн байгаа (year, month)
+түвшний нийлбэрүүдээс DB-гүйгээр (numpy vectorized) бодно.
+
+Оролт нь MonthlyAgg: row байгаа сар бүрийн amount/qty нийлбэр.
+Гаралт нь тухайн calc-ийн SQL-ийн буцаадаг мөрүүдтэй ЯГ ИЖИЛ хэлбэртэй rows.
+Бодож чадахгүй (хамрагдаагүй он, тодорхойгүй хугацаа) бол None буцаана → SQL.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# window calc-ууд: хүрээний эхнээс өмнө хэдэн сар хэрэгтэй (builder-ийн SQL ч үүнийг ашиглана)
+LOOKBACK_MONTHS = {"mom": 1, "rolling_12m": 11}
+WINDOW_SERIES_CALCS = tuple(LOOKBACK_MONTHS)
+
+
+def filters_key(sql_meta: Dict[str, Any]) -> str:
+    """
+    Нэг ижил өгөгдлийн "зүсэлт" (view + domain + эцсийн filters) → түлхүүр.
+    metric/calc/time орохгүй: нэг monthly series-ээс бүгдийг нь бодно.
+    """
+    return json.dumps(
+        {
+            "view": sql_meta.get("view"),
+            "domain": sql_meta.get("domain"),
+            "filters": sql_meta.get("filters") or {},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+
+
+@dataclass
+class MonthlyAgg:
+    """
+    (year, month) түвшний нийлбэрүүд, (year, month)-аар эрэмбэлэгдсэн.
+    - years: бүх сар нь бүрэн хамрагдсан онууд
+    - complete: бүх түүх хамрагдсан эсэх (avg_months/avg_years-д шаардлагатай)
+    - latest: view-ийн хамгийн сүүлийн (year, month) (filter-ээс үл хамаарна)
+    """
+
+    year: np.ndarray
+    month: np.ndarray
+    amount: np.ndarray
+    qty: np.ndarray
+    years: Set[int]
+    complete: bool = False
+    latest: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]], years: Iterable[int]) -> "MonthlyAgg":
+        rows = [r for r in rows if r.get("year") is not None and r.get("month") is not None]
+        y = np.fromiter((int(r["year"]) for r in rows), dtype=np.int32, count=len(rows))
+        m = np.fromiter((int(r["month"]) for r in rows), dtype=np.int32, count=len(rows))
+        a = np.fromiter((float(r.get("amount") or 0) for r in rows), dtype=np.float64, count=len(rows))
+        q = np.fromiter((float(r.get("qty") or 0) for r in rows), dtype=np.float64, count=len(rows))
+
+        order = np.lexsort((m, y))
+        return cls(year=y[order], month=m[order], amount=a[order], qty=q[order], years=set(years))
+
+    def covers(self, *years: int) -> bool:
+        return self.complete or all(y in self.years for y in years)
+
+
+# -------- helpers --------
+
+def _metric_values(metric: str, amount: np.ndarray, qty: np.ndarray) -> np.ndarray:
+    if metric == "quantity":
+        return qty
+    if metric == "weighted_price":
+        # SQL: SUM(amount) / NULLIF(SUM(qty) / 1000, 0)
+        out = np.full(amount.shape, np.nan)
+        nz = qty != 0
+        out[nz] = amount[nz] / (qty[nz] / 1000.0)
+        return out
+    return amount
+
+
+def _num(x: Any) -> Optional[float]:
+    if x is None:
+        return None
+    x = float(x)
+    return None if np.isnan(x) else x
+
+
+def _reduce(agg: MonthlyAgg, metric: str, mask: np.ndarray) -> Optional[float]:
+    # SQL-тэй адил: row байхгүй бол SUM → NULL
+    if not mask.any():
+        return None
+    a = np.array([agg.amount[mask].sum()])
+    q = np.array([agg.qty[mask].sum()])
+    return _num(_metric_values(metric, a, q)[0])
+
+
+def _group_by_year(agg: MonthlyAgg, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ys = agg.year[mask]
+    uniq, idx = np.unique(ys, return_inverse=True)
+    a = np.bincount(idx, weights=agg.amount[mask], minlength=len(uniq))
+    q = np.bincount(idx, weights=agg.qty[mask], minlength=len(uniq))
+    return uniq, a, q
+
+
+def _month_scope(t: Dict[str, Any], latest: Optional[Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+    # (эхний idx, сүүлийн idx), idx = year * 12 + month - 1
+    start, end = t.get("start"), t.get("end")
+    if start and end:
+        return int(start["year"]) * 12 + int(start["month"]) - 1, int(end["year"]) * 12 + int(end["month"]) - 1
+    if t.get("latest") and latest is not None:
+        i = latest[0] * 12 + latest[1] - 1
+        return i, i
+    return None
+
+
+def _window_series(
+    agg: MonthlyAgg, calc: str, metric: str, scope: Tuple[int, int]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    mom / rolling_12m — builder-ийн LAG / RANGE frame SQL-тэй ижил (row байхгүй сар = NULL / тоологдохгүй).
+    """
+    sidx, eidx = scope
+    lb = sidx - LOOKBACK_MONTHS[calc]
+    if not agg.covers(*range(lb // 12, eidx // 12 + 1)):
+        return None
+
+    idx_all = agg.year.astype(np.int64) * 12 + (agg.month - 1)
+    sel = (idx_all >= lb) & (idx_all <= eidx)
+    idx, a, q = idx_all[sel], agg.amount[sel], agg.qty[sel]
+    out = idx >= sidx
+    years, months = agg.year[sel][out], agg.month[sel][out]
+
+    if calc == "mom":
+        has_prev = np.r_[False, idx[1:] == idx[:-1] + 1]
+        prev_a = np.where(has_prev, np.r_[np.nan, a[:-1]], np.nan)
+        prev_q = np.where(has_prev, np.r_[np.nan, q[:-1]], np.nan)
+        cur = _metric_values(metric, a, q)[out]
+        prev = _metric_values(metric, prev_a, prev_q)[out]
+        pct = np.full(cur.shape, np.nan)
+        ok = ~np.isnan(cur) & ~np.isnan(prev) & (prev != 0)
+        pct[ok] = (cur[ok] - prev[ok]) / prev[ok] * 100.0
+        return [
+            {"year": int(y), "month": int(m), "value": _num(v), "previous": _num(p), "pct": _num(c)}
+            for y, m, v, p, c in zip(years, months, cur, prev, pct)
+        ]
+
+    # rolling_12m: [idx - 11, idx] доторх row-уудын нийлбэр (cumsum + searchsorted)
+    left = np.searchsorted(idx, idx - LOOKBACK_MONTHS[calc], side="left")
+    pos = np.arange(len(idx))
+    ca = np.r_[0.0, np.cumsum(a)]
+    cq = np.r_[0.0, np.cumsum(q)]
+    r_a = (ca[pos + 1] - ca[left])[out]
+    r_q = (cq[pos + 1] - cq[left])[out]
+    n = (pos + 1 - left)[out]
+    vals = _metric_values(metric, r_a, r_q)
+    return [
+        {"year": int(y), "month": int(m), "value": _num(v), "months": int(k)}
+        for y, m, v, k in zip(years, months, vals, n)
+    ]
+
+
+def _cagr(agg: MonthlyAgg, metric: str, t: Dict[str, Any], window: int) -> Optional[List[Dict[str, Any]]]:
+    start, end = t.get("start"), t.get("end")
+    if start and end:
+        y0, y1 = int(start["year"]), int(end["year"])
+    elif t.get("latest") and agg.latest is not None:
+        # builder: сүүлийн сар 12 биш бол өмнөх бүтэн он
+        ly, lm = agg.latest
+        y1 = ly if lm == 12 else ly - 1
+        y0 = y1 - (window - 1)
+    else:
+        return None
+    if not agg.covers(y0, y1):
+        return None
+
+    v0 = _reduce(agg, metric, agg.year == y0)
+    v1 = _reduce(agg, metric, agg.year == y1)
+    pct = None
+    if y1 > y0 and v0 is not None and v0 > 0 and v1 is not None and v1 >= 0:
+        pct = ((v1 / v0) ** (1.0 / (y1 - y0)) - 1) * 100.0
+    return [
+        {"start_year": y0, "end_year": y1, "start_value": v0, "end_value": v1, "periods": y1 - y0, "pct": pct}
+    ]
+
+
+def _nanmean(values: np.ndarray) -> Optional[float]:
+    # SQL AVG: NULL-уудыг алгасна, бүгд NULL/хоосон бол NULL
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return None
+    return float(values.mean())
+
+
+# -------- public --------
+
+def compute_rows(sql_meta: Dict[str, Any], agg: Optional[MonthlyAgg]) -> Optional[List[Dict[str, Any]]]:
+    """
+    sql_meta (build_sql-ийн meta) + MonthlyAgg → SQL-тэй ижил rows, эсвэл None.
+    """
+    if agg is None:
+        return None
+
+    calc = sql_meta.get("calc") or "month_value"
+    metric = sql_meta.get("metric") or "amountUSD"
+    if calc == "weighted_price":
+        metric = "weighted_price"
+
+    t = sql_meta.get("time") or {}
+    years_list = t.get("years")
+    if t.get("latest"):
+        if agg.latest is None:
+            return None
+        year, month = agg.latest
+    else:
+        year, month = t.get("year"), t.get("month")
+
+    # -------- series --------
+    if calc == "timeseries_year":
+        ys = [int(y) for y in (years_list or ([year] if year is not None else []))]
+        if not ys or not agg.covers(*ys):
+            return None
+        uniq, a, q = _group_by_year(agg, np.isin(agg.year, ys))
+        vals = _metric_values(metric, a, q)
+        return [{"year": int(y), "value": _num(v)} for y, v in zip(uniq, vals)]
+
+    if calc == "timeseries_range":
+        start, end = t.get("start"), t.get("end")
+        if not (start and end):
+            return None
+        sy, sm, ey, em = int(start["year"]), int(start["month"]), int(end["year"]), int(end["month"])
+        if not agg.covers(*range(sy, ey + 1)):
+            return None
+        idx = agg.year.astype(np.int64) * 12 + (agg.month - 1)
+        mask = (idx >= sy * 12 + sm - 1) & (idx <= ey * 12 + em - 1)
+        a, q = agg.amount[mask], agg.qty[mask]
+        vals = _metric_values(metric, a, q)
+        return [
+            {"year": int(y), "month": int(m), "value": _num(v), "amount": float(aa), "qty": float(qq)}
+            for y, m, v, aa, qq in zip(agg.year[mask], agg.month[mask], vals, a, q)
+        ]
+
+    if calc in WINDOW_SERIES_CALCS:
+        scope = _month_scope(t, agg.latest)
+        return _window_series(agg, calc, metric, scope) if scope else None
+
+    if calc == "cagr":
+        return _cagr(agg, metric, t, int(sql_meta.get("window") or 3))
+
+    if year is None or years_list:
+        return None
+    year = int(year)
+
+    if calc == "timeseries_month":
+        if not agg.covers(year):
+            return None
+        mask = agg.year == year
+        a, q = agg.amount[mask], agg.qty[mask]
+        vals = _metric_values(metric, a, q)
+        return [
+            {"year": year, "month": int(m), "value": _num(v), "amount": float(aa), "qty": float(qq)}
+            for m, v, aa, qq in zip(agg.month[mask], vals, a, q)
+        ]
+
+    # -------- single values --------
+    if calc == "year_total":
+        if not agg.covers(year):
+            return None
+        return [{"year": year, "month": None, "value": _reduce(agg, metric, agg.year == year)}]
+
+    if calc == "ytd":
+        if not agg.covers(year):
+            return None
+        mmax = int(month or 12)
+        mask = (agg.year == year) & (agg.month <= mmax)
+        return [{"year": year, "month": mmax, "value": _reduce(agg, metric, mask)}]
+
+    if calc == "yoy":
+        if month is None:
+            # builder: сар байхгүй yoy → тухайн оны нийлбэр
+            if not agg.covers(year):
+                return None
+            return [{"year": year, "month": None, "value": _reduce(agg, metric, agg.year == year)}]
+
+        if not agg.covers(year, year - 1):
+            return None
+        month = int(month)
+        cur = _reduce(agg, metric, (agg.year == year) & (agg.month == month))
+        prev = _reduce(agg, metric, (agg.year == year - 1) & (agg.month == month))
+        pct = None
+        if cur is not None and prev:
+            pct = (cur - prev) / prev * 100.0
+        return [{"year": year, "month": month, "current": cur, "previous": prev, "pct": pct}]
+
+    if calc == "avg_months":
+        if not agg.complete:
+            return None
+        window = int(sql_meta.get("window") or 3)
+        ref_m = int(month or 1)
+        ref_idx = year * 12 + (ref_m - 1)
+        idx = agg.year.astype(np.int64) * 12 + (agg.month - 1)
+        mask = (idx <= ref_idx) & (idx >= ref_idx - (window - 1))
+        vals = _metric_values(metric, agg.amount[mask], agg.qty[mask])
+        return [{"year": year, "month": ref_m, "value": _nanmean(vals)}]
+
+    if calc == "avg_years":
+        if not agg.complete:
+            return None
+        window = int(sql_meta.get("window") or 3)
+        mask = (agg.year <= year) & (agg.year >= year - (window - 1))
+        _, a, q = _group_by_year(agg, mask)
+        return [{"year": year, "month": None, "value": _nanmean(_metric_values(metric, a, q))}]
+
+    # month_value / weighted_price / fallback → (year, month) нэг утга
+    if month is None or not agg.covers(year):
+        return None
+    month = int(month)
+    mask = (agg.year == year) & (agg.month == month)
+    return [{"year": year, "month": month, "value": _reduce(agg, metric, mask)}]
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Tuple
+from typing import Container, Optional, Tuple
 
 
 # HS-level views
@@ -7,10 +7,9 @@ VIEW_EXPORT = "public.v_export_monthly_hs"
 VIEW_EXPORT_COMPANY = "public.v_export_company_monthly_hs"
 VIEW_IMPORT = "public.v_import_monthly_hs"
 
-# Category-level views
+# Category-level views (purpose / sub1 / sub2 / sub3 шатлал)
 VIEW_IMPORT_CATEGORY = "public.v_import_monthly_category"
-# (ирээдүйд хэрэгтэй бол)
-# VIEW_EXPORT_CATEGORY = "public.v_export_monthly_category"
+VIEW_EXPORT_CATEGORY = "public.v_export_monthly_category"
 
 
 def _need_category(filters: dict | None) -> bool:
@@ -23,10 +22,12 @@ def resolve_view(
     domain: str,
     need_company: bool,
     filters: dict | None = None,
+    category_views: Optional[Container[str]] = None,
 ) -> Tuple[str, str]:
     """
     Returns: (view_name, view_type)
     view_type: "hs" | "category"
+    category_views: ачаалагдсан (DB дээр байгаа нь батлагдсан) category view-ууд; None бол шалгахгүй.
     """
     need_category = _need_category(filters)
 
@@ -39,8 +40,9 @@ def resolve_view(
     if need_company:
         return VIEW_EXPORT_COMPANY, "hs"
 
-    # Future hook:
-    # if need_category:
-    #     return VIEW_EXPORT_CATEGORY, "category"
+    # ✅ ангиллын асуулт HS view дээр ILIKE-аар юу ч олохгүй → category view
+    # (view үүсгэгдээгүй / dims ачаалагдаагүй бол SQL алдааны оронд HS view — хуучин зан төлөв)
+    if need_category and (category_views is None or VIEW_EXPORT_CATEGORY in category_views):
+        return VIEW_EXPORT_CATEGORY, "category"
 
     return VIEW_EXPORT, "hs"
@@ -0,0 +1,38 @@
+-- app/sql/views/v_export_monthly_category.sql
+--
+-- Экспортын ангиллын view: v_import_monthly_category-тэй ижил багана
+-- (year, month, purpose, sub1, sub2, sub3, country, customs, senderReceiver, amountUSD, quantity),
+-- экспортын HS өгөгдөл (v_export_monthly_hs) дээр HS → ангилал хүснэгтээр бодогдоно.
+--
+-- public.hs_category: импортын ангиллын view-ийн ашигладаг HS код → purpose/sub1–sub3 шатлал.
+-- Хүснэгт байхгүй бол хоосноор үүсгэнэ → view алдаагүй, мөргүй (дүүргэсний дараа шууд ажиллана).
+--
+--   psql "$DATABASE_URL" -f app/sql/views/v_export_monthly_category.sql
+
+CREATE TABLE IF NOT EXISTS public.hs_category (
+  hscode  text PRIMARY KEY,
+  purpose text,
+  sub1    text,
+  sub2    text,
+  sub3    text
+);
+
+CREATE OR REPLACE VIEW public.v_export_monthly_category AS
+SELECT
+  e.year,
+  e.month,
+  c.purpose,
+  c.sub1,
+  c.sub2,
+  c.sub3,
+  e.country,
+  e.customs,
+  e.senderReceiver,
+  SUM(COALESCE(e.amountUSD, 0)) AS amountUSD,
+  SUM(COALESCE(e.quantity, 0)) AS quantity
+FROM public.v_export_monthly_hs e
+JOIN public.hs_category c ON c.hscode = e.hscode
+GROUP BY e.year, e.month, c.purpose, c.sub1, c.sub2, c.sub3, e.country, e.customs, e.senderReceiver;
+
+-- category_dims (DISTINCT purpose, sub1–sub3) болон builder-ийн equality filter-т
+CREATE INDEX IF NOT EXISTS hs_category_sub3_idx ON public.hs_category (sub3);
@@ -0,0 +1,95 @@
+# bench/state_overhead.py
+"""
+Per-turn ConversationState overhead benchmark.
+
+Нэг turn дээр state-тэй холбоотой хийгддэг ажил:
+  merge_intent (copy) -> handle_chat meta (dump) -> chat() explain_payload (dump)
+
+Хоёр зам яг ижил merge_intent-ийг ажиллуулна; ялгаа нь зөвхөн copy (deep copy vs cow_copy)
+болон dump (model_dump ×2 vs cached dump).
+
+Run:
+  python -m bench.state_overhead [--turns 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable, Dict, List, Type
+
+from app.conversation.merge import merge_intent
+from app.conversation.models import Commodity, ConversationState, Intent
+
+
+class _LegacyState(ConversationState):
+    # өмнөх хэрэгжилт: merge_intent-ийн copy нь бүтэн deep copy
+    def cow_copy(self) -> "ConversationState":
+        return self.model_copy(deep=True)
+
+
+def _prev_state(cls: Type[ConversationState] = ConversationState) -> ConversationState:
+    s = cls(
+        domain="export",
+        metric="amountUSD",
+        commodity=Commodity(label="нүүрс", hscode=["2701", "2702"]),
+        scale_label="сая",
+    )
+    s.time.year = 2025
+    s.time.granularity = "month"
+    s.pending_clarify = {
+        "question": "Аль оны мэдээлэл вэ?",
+        "choices": [{"label": "2025 он", "prompt": "2025 он"}],
+    }
+    return s
+
+
+# follow-up turn-ууд: зөвхөн override, intent+override, хоосон
+TURNS = [
+    (Intent(), {"scale_label": "мянга"}),
+    (Intent(domain="export", metric="quantity", time={"year": 2024}), {"granularity": "year"}),
+    (Intent(), {}),
+]
+
+
+def _legacy_turn(prev: ConversationState, intent: Intent, overrides: dict) -> None:
+    # өмнөх хэрэгжилт: deep copy (_LegacyState) + 2 удаа model_dump
+    s = merge_intent(prev, intent, overrides)
+    s.model_dump()
+    s.model_dump()
+
+
+def _current_turn(prev: ConversationState, intent: Intent, overrides: dict) -> None:
+    s = merge_intent(prev, intent, overrides)
+    s.dump()
+    s.dump()
+
+
+def _run(fn: Callable[[ConversationState, Intent, dict], None], turns: int) -> float:
+    prev = _prev_state(_LegacyState if fn is _legacy_turn else ConversationState)
+    t0 = time.perf_counter()
+    for i in range(turns):
+        intent, overrides = TURNS[i % len(TURNS)]
+        fn(prev, intent, overrides)
+    return (time.perf_counter() - t0) / turns * 1e6
+
+
+def main(argv: List[str] | None = None) -> Dict[str, float]:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--turns", type=int, default=20000)
+    args = ap.parse_args(argv)
+
+    # warmup
+    _run(_legacy_turn, 500)
+    _run(_current_turn, 500)
+
+    out = {
+        "legacy_us_per_turn": _run(_legacy_turn, args.turns),
+        "current_us_per_turn": _run(_current_turn, args.turns),
+    }
+    for k, v in out.items():
+        print(f"{k:>22}: {v:8.2f} µs")
+    return out
+
+
+if __name__ == "__main__":
+    main()
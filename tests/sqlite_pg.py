@@ -0,0 +1,157 @@
+# tests/sqlite_pg.py
+"""
+Postgres-гүй тест: builder-ийн SQL-ийг sqlite дээр ажиллуулж, derive / cube / replica-гийн
+rows-той харьцуулна.
+
+sqlite руу хөрвүүлэх нь зөвхөн builder-ийн ашигладаг Postgres хэлбэрүүд:
+  - make_date(y, m, 1) → сарын индекс (y * 12 + m - 1), INTERVAL '1 month' → 1
+  - EXTRACT(YEAR|MONTH FROM x) → pg_year / pg_month
+  - x = ANY(CAST(:p AS text[])) → x IN (SELECT value FROM json_each(:p))
+  - ::int / ::float8 cast, ILIKE → LIKE
+
+StreamSession: LazySession-ийн оронд endpoint-ууд руу dependency override-оор өгнө.
+"""
+from __future__ import annotations
+
+import json
+import math
+import random
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+VIEW = "public.v_export_monthly_hs"
+LATEST = (2025, 8)
+# бүх мөргүй сар (view-ийн хэмжээнд) — LAG / RANGE frame-ийн gap шалгана
+EMPTY_MONTHS = {(2024, 5), (2022, 11)}
+
+_ANY = re.compile(r"=\s*ANY\(CAST\(:(\w+) AS \w+\[\]\)\)")
+_CAST = re.compile(r"::(int|float8)\b")
+
+
+def pg_to_sqlite(sql: str) -> str:
+    sql = _ANY.sub(r"IN (SELECT value FROM json_each(:\1))", sql)
+    sql = _CAST.sub("", sql)
+    sql = sql.replace("INTERVAL '1 month'", "1")
+    sql = re.sub(r"EXTRACT\(YEAR FROM ", "pg_year(", sql)
+    sql = re.sub(r"EXTRACT\(MONTH FROM ", "pg_month(", sql)
+    return sql.replace(" ILIKE ", " LIKE ")
+
+
+def _month_index(y: Any, m: Any, d: Any) -> Optional[int]:
+    if y is None or m is None:
+        return None
+    return int(y) * 12 + int(m) - 1
+
+
+def _power(a: Any, b: Any) -> Optional[float]:
+    if a is None or b is None:
+        return None
+    return float(a) ** float(b)
+
+
+def _connect() -> sqlite3.Connection:
+    # TestClient app-ийг өөр thread дээр ажиллуулна (query-ууд дараалсан)
+    con = sqlite3.connect(":memory:", check_same_thread=False)
+    con.execute("ATTACH DATABASE ':memory:' AS public")
+    con.create_function("make_date", 3, _month_index, deterministic=True)
+    con.create_function("pg_year", 1, lambda i: None if i is None else int(i) // 12, deterministic=True)
+    con.create_function("pg_month", 1, lambda i: None if i is None else int(i) % 12 + 1, deterministic=True)
+    con.create_function("POWER", 2, _power, deterministic=True)
+    return con
+
+
+def _trade_rows(seed: int = 7) -> List[Tuple[Any, ...]]:
+    rnd = random.Random(seed)
+    rows = []
+    for y in range(2019, LATEST[0] + 1):
+        for m in range(1, 13):
+            if (y, m) > LATEST or (y, m) in EMPTY_MONTHS:
+                continue
+            for hs in ("2701", "2603", "8703"):
+                # HS тус бүрт санамсаргүй дутуу сарууд (filter-тэй series-ийн gap)
+                if hs != "2701" and rnd.random() < 0.15:
+                    continue
+                for country in ("CN", "RU", "KR"):
+                    if rnd.random() < 0.3:
+                        continue
+                    qty = 0.0 if hs == "8703" and rnd.random() < 0.2 else round(rnd.uniform(1, 1e3), 3)
+                    rows.append((y, m, hs, country, round(rnd.uniform(1e3, 1e6), 2), qty))
+    return rows
+
+
+class TradeDB:
+    """
+    sqlite дээрх public.v_export_monthly_hs (year, month, hscode, country, amountUSD, quantity).
+    """
+
+    def __init__(self) -> None:
+        self.con = _connect()
+        self.con.execute(
+            f"CREATE TABLE {VIEW} (year INTEGER, month INTEGER, hscode TEXT, country TEXT, "
+            "amountUSD REAL, quantity REAL)"
+        )
+        self.con.executemany(f"INSERT INTO {VIEW} VALUES (?, ?, ?, ?, ?, ?)", _trade_rows())
+
+    def rows(self, sql: Any, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        p = {k: json.dumps(v) if isinstance(v, (list, tuple)) else v for k, v in (params or {}).items()}
+        cur = self.con.execute(pg_to_sqlite(str(getattr(sql, "text", sql))), p)
+        cols = [d[0] for d in cur.description]
+        return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+    def conn(self) -> "AsyncConn":
+        return AsyncConn(self)
+
+
+class _Result:
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self._rows = rows
+
+    def mappings(self) -> "_Result":
+        return self
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._rows
+
+
+class AsyncConn:
+    # sync/refresh-ийн ашигладаг AsyncConnection-ий execute-ийг дуурайна
+    def __init__(self, db: TradeDB):
+        self.db = db
+
+    async def execute(self, sql: Any, params: Optional[Dict[str, Any]] = None) -> _Result:
+        return _Result(self.db.rows(sql, params))
+
+
+def close(a: Any, b: Any) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(float(a), float(b), rel_tol=1e-7, abs_tol=1e-6)
+    return a == b
+
+
+def assert_same_rows(got: Sequence[Dict[str, Any]], expected: Sequence[Dict[str, Any]]) -> None:
+    assert len(got) == len(expected), (got[:3], expected[:3])
+    for g, e in zip(got, expected):
+        for k, v in e.items():
+            assert close(g.get(k), v), (k, g, e)
+
+
+class StreamSession:
+    # LazySession-ийн execute / stream-ийг дуурайна (/query/stream, /export endpoint-ын тестэд)
+    def __init__(self, db: TradeDB):
+        self.db = db
+        self.queries = 0
+
+    async def execute(self, sql: Any, params: Optional[Dict[str, Any]] = None, timeout_ms: Optional[int] = None) -> _Result:
+        self.queries += 1
+        return _Result(self.db.rows(sql, params))
+
+    async def stream(
+        self, sql: Any, params: Optional[Dict[str, Any]] = None, timeout_ms: Optional[int] = None, chunk_rows: int = 1000
+    ):
+        self.queries += 1
+        rows = self.db.rows(sql, params)
+        for i in range(0, len(rows), chunk_rows):
+            yield rows[i : i + chunk_rows]
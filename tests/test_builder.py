@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import pytest
+
+from app.sql import builder
+from app.sql.builder import build_sql
+from app.sql.categories import CategoryDims, dim_sql
+from app.sql.templates import VIEW_EXPORT_CATEGORY
+from tests.sqlite_pg import EMPTY_MONTHS, LATEST, TradeDB, assert_same_rows
+
+
+def _build(calc, time, **kw):
+    intent = {"domain": "export", "calc": calc, "metric": "amountUSD", "time": time, "filters": {"hscode": ["2701"]}, **kw}
+    sql, params, meta = build_sql(intent, "")
+    return str(sql), params, meta
+
+
+# ---------------- timeseries_range ----------------
+
+
+def test_range_spans_years_in_one_monthly_series(trade_db):
+    sql, params, meta = _build("timeseries_month", {"start": {"year": 2023, "month": 11}, "end": {"year": 2024, "month": 6}})
+
+    assert meta["calc"] == "timeseries_range" and meta["is_timeseries"] and meta["granularity"] == "month"
+    assert meta["time"]["start"] == {"year": 2023, "month": 11} and meta["time"]["end"] == {"year": 2024, "month": 6}
+    assert params["start_year"] == 2023 and params["start_month"] == 11
+    assert params["end_year"] == 2024 and params["end_month"] == 6
+    assert "(year, month) >=" in sql and "GROUP BY year, month" in sql
+
+    # олон оны нэг series == он тус бүрийн monthly series-ийг хүрээгээр тасалсан
+    per_year = []
+    for year in (2023, 2024):
+        s, p, _ = _build("timeseries_month", {"year": year})
+        per_year += [r for r in trade_db.rows(s, p) if (2023, 11) <= (r["year"], r["month"]) <= (2024, 6)]
+    rows = trade_db.rows(sql, params)
+    assert_same_rows(rows, per_year)
+    assert not EMPTY_MONTHS & {(r["year"], r["month"]) for r in rows}
+
+
+def test_years_list_with_range_calc_covers_whole_years():
+    _, params, meta = _build("timeseries_range", {"years": [2022, 2023, 2024]})
+    assert meta["calc"] == "timeseries_range"
+    assert (params["start_year"], params["start_month"], params["end_year"], params["end_month"]) == (2022, 1, 2024, 12)
+
+
+def test_years_list_without_range_stays_yearly():
+    _, _, meta = _build("timeseries_month", {"years": [2022, 2023]})
+    assert meta["calc"] == "timeseries_year" and meta["granularity"] == "year"
+
+
+def test_range_calc_without_years_falls_back_to_month_series():
+    _, _, meta = _build("timeseries_range", {"year": 2023})
+    assert meta["calc"] == "timeseries_month"
+
+
+# ---------------- mom / rolling_12m / cagr ----------------
+
+
+def _value(db, calc, time):
+    sql, params, _ = _build(calc, time)
+    return db.rows(sql, params)[0]["value"]
+
+
+@pytest.mark.parametrize(
+    "calc, marker",
+    (("mom", "LAG(amount) OVER w"), ("rolling_12m", "RANGE BETWEEN 11 PRECEDING AND CURRENT ROW")),
+)
+def test_window_calcs_are_monthly_series(calc, marker):
+    sql, params, meta = _build(calc, {"year": 2024, "month": 6})
+    assert marker in sql
+    assert meta["is_timeseries"] and meta["granularity"] == "month"
+    # нэг сар → (start, end) хүрээ, lookback сарууд scope-д орно
+    assert meta["time"]["start"] == meta["time"]["end"] == {"year": 2024, "month": 6}
+    lb = 2024 * 12 + 5 - (1 if calc == "mom" else 11)
+    assert params["start_idx"] == 2024 * 12 + 5
+    assert (params["lb_year"], params["lb_month"]) == (lb // 12, lb % 12 + 1)
+
+
+def test_mom_skips_empty_previous_month(trade_db):
+    # 2024-05 мөргүй → LAG 2024-04-ийг өгөх ёсгүй
+    sql, params, _ = _build("mom", {"year": 2024, "month": 6})
+    (row,) = trade_db.rows(sql, params)
+    assert (row["year"], row["month"]) == (2024, 6)
+    assert row["previous"] is None and row["pct"] is None
+
+
+def test_rolling_12m_december_equals_year_total(trade_db):
+    sql, params, _ = _build("rolling_12m", {"year": 2023})
+    rows = trade_db.rows(sql, params)
+    assert rows[-1]["month"] == 12
+    assert rows[-1]["value"] == pytest.approx(_value(trade_db, "year_total", {"year": 2023}))
+
+
+def test_window_calcs_latest(trade_db):
+    for calc in ("mom", "rolling_12m"):
+        sql, params, meta = _build(calc, "latest")
+        assert "latest_parts" in sql and meta["time"]["latest"]
+        (row,) = trade_db.rows(sql, params)
+        assert (row["year"], row["month"]) == LATEST
+
+
+@pytest.mark.parametrize(
+    "time, bounds",
+    (({"years": [2020, 2024]}, (2020, 2024)), ({"year": 2024}, (2022, 2024)), ({"years": [2023]}, (2021, 2023))),
+    ids=str,
+)
+def test_cagr_bounds_and_value(trade_db, time, bounds):
+    sql, params, meta = _build("cagr", time)
+    assert "POWER(" in sql and meta["calc"] == "cagr"
+    assert (params["start_year"], params["end_year"]) == bounds
+
+    (row,) = trade_db.rows(sql, params)
+    y0, y1 = bounds
+    start, end = (_value(trade_db, "year_total", {"year": y}) for y in bounds)
+    assert row["periods"] == y1 - y0
+    assert row["pct"] == pytest.approx(((end / start) ** (1 / (y1 - y0)) - 1) * 100)
+
+
+def test_cagr_latest_ends_at_last_full_year(trade_db):
+    sql, params, _ = _build("cagr", "latest")
+    (row,) = trade_db.rows(sql, params)
+    # LATEST = 2025-08 → 2025 дутуу тул 2024 хүртэл
+    assert (row["start_year"], row["end_year"]) == (2022, 2024)
+
+
+# ---------------- export category view ----------------
+
+CATEGORY_ROWS = [
+    (2024, 1, "Хэрэглээний бүтээгдэхүүн", "Түргэн эдэлгээтэй", "Хүнс", "Тамхи, тамхины орлуулагч", 100.0, 2.0),
+    (2024, 1, "Хэрэглээний бүтээгдэхүүн", "Түргэн эдэлгээтэй", "Хүнс", "Навчин тамхи", 50.0, 1.0),
+    (2024, 1, "Хэрэглээний бүтээгдэхүүн", "Түргэн эдэлгээтэй", "Хүнс", "Гурил", 70.0, 7.0),
+    (2024, 2, "Хэрэглээний бүтээгдэхүүн", "Түргэн эдэлгээтэй", "Хүнс", "Навчин тамхи", 30.0, 1.0),
+]
+
+
+@pytest.fixture
+def dims(monkeypatch):
+    d = CategoryDims((VIEW_EXPORT_CATEGORY,))
+    monkeypatch.setattr(builder, "category_dims", d)
+    return d
+
+
+@pytest.fixture(scope="module")
+def category_db() -> TradeDB:
+    db = TradeDB()
+    db.con.execute(
+        f"CREATE TABLE {VIEW_EXPORT_CATEGORY} (year INTEGER, month INTEGER, purpose TEXT, sub1 TEXT, sub2 TEXT, "
+        "sub3 TEXT, amountUSD REAL, quantity REAL)"
+    )
+    db.con.executemany(f"INSERT INTO {VIEW_EXPORT_CATEGORY} VALUES (?, ?, ?, ?, ?, ?, ?, ?)", CATEGORY_ROWS)
+    return db
+
+
+def _category(question, filters=None):
+    intent = {"domain": "export", "calc": "timeseries_month", "metric": "amountUSD", "time": {"year": 2024}, "filters": filters or {}}
+    sql, params, meta = build_sql(intent, question)
+    return str(sql), params, meta
+
+
+def test_export_category_falls_back_to_hs_view_until_dims_load(dims):
+    # view байхгүй / dims ачаалагдаагүй → category view руу SQL алдаа гаргахын оронд HS view
+    _, _, meta = _category("2024 онд тамхи экспорт", {"hscode": ["2402"]})
+    assert meta["view"] == "public.v_export_monthly_hs" and meta["view_type"] == "hs"
+
+
+def test_export_category_question_routes_to_category_view(dims):
+    dims.set(VIEW_EXPORT_CATEGORY, [])
+    sql, params, meta = _category("2024 онд тамхи экспорт", {"hscode": ["2402"]})
+    assert meta["view"] == VIEW_EXPORT_CATEGORY and meta["view_type"] == "category"
+    assert "hscode" not in meta["filters"] and "hscode" not in params
+    # тохирох утга алга → ILIKE
+    assert "sub3 ILIKE :sub3" in sql and params["sub3"] == "%тамхи%"
+    assert "category_exact" not in meta
+
+
+def test_cached_dims_give_exact_match(dims, category_db):
+    dims.set(VIEW_EXPORT_CATEGORY, category_db.rows(dim_sql(VIEW_EXPORT_CATEGORY)))
+
+    sql, params, meta = _category("тамхи")
+    assert "sub3 = ANY(CAST(:sub3 AS text[]))" in sql
+    assert sorted(params["sub3"]) == ["Навчин тамхи", "Тамхи, тамхины орлуулагч"]
+    assert meta["category_exact"] == {"sub3": params["sub3"]}
+
+    sql, params, _ = _category("", {"sub3": "гурил"})
+    assert "sub3 = :sub3" in sql and params["sub3"] == "Гурил"
+
+
+@pytest.mark.parametrize("term", ("архи", "там%", "там_и"))
+def test_unmatched_or_wildcard_terms_keep_ilike(dims, category_db, term):
+    dims.set(VIEW_EXPORT_CATEGORY, category_db.rows(dim_sql(VIEW_EXPORT_CATEGORY)))
+    sql, params, meta = _category("", {"sub3": term})
+    assert "sub3 ILIKE :sub3" in sql and params["sub3"] == f"%{term}%"
+    assert "category_exact" not in meta
+
+
+def test_exact_match_returns_same_rows_as_ilike(dims, category_db):
+    dims.set(VIEW_EXPORT_CATEGORY, [])
+    ilike_sql, ilike_params, _ = _category("тамхи")
+    dims.set(VIEW_EXPORT_CATEGORY, category_db.rows(dim_sql(VIEW_EXPORT_CATEGORY)))
+    exact_sql, exact_params, _ = _category("тамхи")
+
+    expected = category_db.rows(ilike_sql, ilike_params)
+    assert [r["value"] for r in expected] == [150.0, 30.0]
+    assert_same_rows(category_db.rows(exact_sql, exact_params), expected)
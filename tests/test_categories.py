@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.core import database
+from app.sql.categories import CategoryDims
+from app.sql.templates import VIEW_EXPORT_CATEGORY, VIEW_IMPORT_CATEGORY
+
+ROWS = [{"purpose": "Хэрэглээ", "sub1": "Хүнс", "sub2": "Бусад", "sub3": f"Бараа {i}"} for i in range(10)]
+
+
+def test_match_memo_is_bounded():
+    dims = CategoryDims((VIEW_EXPORT_CATEGORY,), max_matches=3)
+    dims.set(VIEW_EXPORT_CATEGORY, ROWS)
+    for term in ("бараа 1", "бараа 2", "бараа 3", "бараа 1", "бараа 4"):
+        dims.match(VIEW_EXPORT_CATEGORY, "sub3", term)
+    # "бараа 1" дахин ашиглагдсан тул "бараа 2" нь хамгийн хуучин → гарна
+    assert [k[2] for k in dims._matches] == ["бараа 3", "бараа 1", "бараа 4"]
+    assert dims.match(VIEW_EXPORT_CATEGORY, "sub3", "бараа 2") == ["Бараа 2"]
+
+
+def test_load_goes_through_read_router_and_skips_missing_views(monkeypatch):
+    seen = []
+
+    class Session:
+        def __init__(self, router):
+            seen.append(router)
+
+        async def execute(self, sql, params=None):
+            if VIEW_EXPORT_CATEGORY in str(sql):
+                raise RuntimeError("relation does not exist")
+
+            class R:
+                def mappings(self):
+                    return self
+
+                def all(self):
+                    return ROWS
+
+            return R()
+
+    monkeypatch.setattr(database, "LazySession", Session)
+    dims = CategoryDims((VIEW_IMPORT_CATEGORY, VIEW_EXPORT_CATEGORY))
+    asyncio.run(dims.load())
+
+    assert seen == [database.read_router]
+    assert dims.available() == frozenset({VIEW_IMPORT_CATEGORY})
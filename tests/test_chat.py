@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import chat
+from app.conversation.models import Commodity, ConversationState
+from app.core.database import get_db
+from app.core.result_cache import LastResultStore, SeriesCache
+from tests.sqlite_pg import StreamSession
+
+
+class Chat:
+    # handle_chat-ийн оронд: дараагийн хариуны state/overrides-ийг тест өөрөө тогтооно
+    def __init__(self, db: StreamSession):
+        self.db = db
+        self.state = ConversationState(domain="export", commodity=Commodity(label="нүүрс", hscode=["2701"]))
+        self.state.time.year = 2024
+        self.state.time.granularity = "month"
+        self.overrides = {}
+        self.events = []
+        app = FastAPI()
+        app.include_router(chat.router)
+        app.dependency_overrides[chat.require_key] = lambda: "test"
+        app.dependency_overrides[get_db] = lambda: db
+        self.client = TestClient(app)
+
+    def handle(self, q, session_id, trace=None):
+        return {"mode": "answer", "state": self.state.cow_copy(), "overrides": self.overrides, "meta": {}}
+
+    def ask(self, message: str):
+        r = self.client.post("/chat", json={"message": message, "session_id": "chat-s1", "profile": "debug"})
+        assert r.status_code == 200
+        return r.json(), self.events[-1]
+
+
+@pytest.fixture
+def convo(trade_db, monkeypatch) -> Chat:
+    c = Chat(StreamSession(trade_db))
+    monkeypatch.setattr(chat, "handle_chat", c.handle)
+    monkeypatch.setattr(chat, "llm_text", lambda prompt: "")
+    monkeypatch.setattr(chat, "log_query", c.events.append)
+    monkeypatch.setattr(chat, "last_results", LastResultStore())
+    monkeypatch.setattr(chat, "series_cache", SeriesCache())
+    return c
+
+
+def test_presentation_only_followup_reuses_last_rows(convo):
+    first, ev = convo.ask("2024 оны нүүрсний экспорт сараар")
+    assert ev["cache"] is None and convo.db.queries == 1 and first["result"]["series"]
+
+    convo.state.scale_label = "мянга"
+    convo.overrides = {"scale_label": "мянга"}
+    again, ev = convo.ask("мянга нэгжээр")
+    assert ev["cache"] == "last_result" and convo.db.queries == 1
+    assert again["result"]["scale_label"] == "мянга" and again["result"]["scale"] == 1_000.0
+    assert [p["value"] for p in again["result"]["series"]] == [p["value"] for p in first["result"]["series"]]
+
+
+def test_followup_that_changes_sql_is_not_reused(convo):
+    convo.ask("2024 оны нүүрсний экспорт сараар")
+
+    convo.state.time.year = 2023
+    convo.overrides = {"scale_label": "сая"}
+    _, ev = convo.ask("2023 он сая нэгжээр")
+    assert ev["cache"] != "last_result" and convo.db.queries == 2
+
+
+def test_statement_timeout_asks_to_narrow(convo, monkeypatch):
+    async def timeout(sql, params=None, timeout_ms=None):
+        convo.db.queries += 1
+        raise RuntimeError("canceling statement due to statement timeout")
+
+    monkeypatch.setattr(convo.db, "execute", timeout)
+    body, ev = convo.ask("2024 оны нүүрсний экспорт сараар")
+
+    assert body["result"] is None and body["meta"]["needs_clarification"]
+    assert [c["prompt"] for c in body["meta"]["choices"]] == ["2024 он", "2023, 2024 он", "Хятад улсаар", "ОХУ-аар"]
+    assert ev["status"] == "timeout" and ev["guard"]["decision"] == "timeout"
+    # татгалзсан query-г дахин ашиглахгүй
+    assert chat.last_results.get("chat-s1") is None
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from app.api.compression import CompressionMiddleware, is_binary
+
+JSON = b'{"rows": [' + b",".join(b'{"year": 2024, "month": %d, "value": 1234.5}' % (i % 12) for i in range(200)) + b"]}"
+NOISE = os.urandom(8192)
+
+
+@pytest.fixture(scope="module")
+def client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/json")
+    def _json():
+        return Response(JSON, media_type="application/json")
+
+    @app.get("/noise")
+    def _noise():
+        return Response(NOISE, media_type="application/json")
+
+    @app.get("/parquet")
+    def _parquet():
+        return Response(JSON, media_type="application/vnd.apache.parquet")
+
+    @app.get("/small")
+    def _small():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def _get(client, path):
+    return client.get(path, headers={"accept-encoding": "gzip"})
+
+
+def test_json_is_compressed(client):
+    r = _get(client, "/json")
+    assert r.headers["content-encoding"] == "gzip" and r.content == JSON
+
+
+def test_incompressible_body_stays_identity(client):
+    r = _get(client, "/noise")
+    assert "content-encoding" not in r.headers
+    assert int(r.headers["content-length"]) == len(NOISE) and r.content == NOISE
+
+
+@pytest.mark.parametrize("path", ("/parquet", "/small"))
+def test_binary_and_small_bodies_are_not_compressed(client, path):
+    assert "content-encoding" not in _get(client, path).headers
+
+
+def test_binary_media_types():
+    assert is_binary("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    assert is_binary("image/png")
+    assert not is_binary("text/csv; charset=utf-8") and not is_binary("application/json")
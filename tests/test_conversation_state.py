@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import pytest
+from pydantic import ValidationError
+
+from app.conversation.merge import merge_intent
+from app.conversation.models import Commodity, ConversationState, Intent
+
+
+def _state() -> ConversationState:
+    s = ConversationState(domain="export", commodity=Commodity(label="нүүрс", hscode=["2701"]))
+    s.time.years = [2023, 2024]
+    s.pending_clarify = {"question": "Аль сар вэ?", "choices": [{"label": "1 сар"}]}
+    return s
+
+
+def test_cow_copy_does_not_share_mutable_fields():
+    prev = _state()
+    before = prev.model_dump()
+
+    s = prev.cow_copy()
+    s.time.years.append(2025)
+    s.pending_clarify["choices"].append({"label": "2 сар"})
+    s.time.granularity = "month"
+
+    assert prev.model_dump() == before
+
+
+def test_commodity_is_immutable():
+    s = _state()
+    with pytest.raises(AttributeError):
+        s.commodity.hscode.append("2702")
+    with pytest.raises(ValidationError):
+        s.commodity.label = "зэс"
+
+
+def test_dump_is_cached_and_invalidated():
+    s = _state()
+    d = s.dump()
+    assert s.dump() is d
+
+    s.time.year = 2025
+    assert s.dump() is not d and s.dump()["time"]["year"] == 2025
+
+    s.commodity = Commodity(label="зэс", hscode=["2603"])
+    assert s.dump()["commodity"]["hscode"] == ("2603",)
+
+
+def test_merge_leaves_previous_state_untouched():
+    prev = _state()
+    before = prev.model_dump()
+    out = merge_intent(prev, Intent(time={"year": 2020}, filters={"hscode": ["2603"]}), {"granularity": "month"})
+
+    assert prev.model_dump() == before
+    assert out.to_intent()["filters"]["hscode"] == ["2603"]
+    assert out.to_intent()["time"] == {"year": 2020}
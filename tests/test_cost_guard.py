@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+
+import pytest
+
+from app.analytics import cost_guard
+from app.analytics.cost_guard import QueryRejected, guarded_rows
+from app.sql.builder import build_sql
+from tests.sqlite_pg import StreamSession, _Result
+
+
+class Planned(StreamSession):
+    # EXPLAIN (FORMAT JSON)-д тогтмол cost буцаана, бусдыг sqlite дээр ажиллуулна
+    def __init__(self, db, cost):
+        super().__init__(db)
+        self.cost = cost
+
+    async def execute(self, sql, params=None, timeout_ms=None):
+        if str(sql).startswith("EXPLAIN"):
+            return _Result([(json.dumps([{"Plan": {"Total Cost": self.cost, "Plan Rows": 10}}]),)])
+        self.timeout_ms = timeout_ms
+        return await super().execute(sql, params, timeout_ms)
+
+
+@pytest.fixture
+def max_cost(monkeypatch):
+    monkeypatch.setattr(cost_guard, "settings", dataclasses.replace(cost_guard.settings, query_max_cost=1000.0))
+
+
+def _query():
+    return build_sql({"domain": "export", "calc": "timeseries_month", "metric": "amountUSD", "time": {"year": 2024}}, "")
+
+
+def test_too_expensive_query_is_rejected_before_running(trade_db, max_cost):
+    sql, params, meta = _query()
+    db = Planned(trade_db, cost=5000.0)
+    with pytest.raises(QueryRejected) as e:
+        asyncio.run(guarded_rows(db, sql, params, meta))
+
+    assert e.value.reason == "too_expensive" and db.queries == 0
+    assert e.value.decision["cost"] == 5000.0 and e.value.decision["max_cost"] == 1000.0
+
+
+def test_cheap_query_runs_with_calc_timeout(trade_db, max_cost, monkeypatch):
+    monkeypatch.setitem(cost_guard.calc_timeouts, "timeseries_month", 30000)
+    sql, params, meta = _query()
+    db = Planned(trade_db, cost=10.0)
+    rows, decision = asyncio.run(guarded_rows(db, sql, params, meta))
+
+    assert rows and decision["decision"] == "allowed" and decision["cost"] == 10.0
+    assert db.timeout_ms == decision["timeout_ms"] == 30000
+
+
+def test_other_errors_are_not_rejections(trade_db):
+    sql, params, meta = _query()
+
+    class Broken(StreamSession):
+        async def execute(self, sql, params=None, timeout_ms=None):
+            raise RuntimeError("relation does not exist")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(guarded_rows(Broken(trade_db), sql, params, meta))
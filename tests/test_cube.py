@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.replica.cube import CHECKED, Cube, CubeSet, cube_sql, mark_checked
+from app.replica.sync import fetch_month_stats
+from app.sql.builder import build_sql
+from app.sql.derive import compute_rows
+from tests.sqlite_pg import VIEW, assert_same_rows
+from tests.test_derive import CALCS, TIMES
+
+
+@pytest.fixture(scope="module")
+def cube(trade_db) -> Cube:
+    return Cube.from_rows(VIEW, trade_db.rows(cube_sql(VIEW)))
+
+
+def _intent(calc="year_total", time=None, filters=None, metric="amountUSD"):
+    return {"domain": "export", "calc": calc, "metric": metric, "time": time or {"year": 2023}, "filters": filters or {}}
+
+
+@pytest.mark.parametrize("calc", CALCS)
+@pytest.mark.parametrize("metric", ("amountUSD", "weighted_price"))
+@pytest.mark.parametrize("time", TIMES, ids=str)
+@pytest.mark.parametrize(
+    "filters",
+    ({"hscode": ["2701"]}, {"hscode": ["2603", "8703"], "country": "r"}, {"country": "CN"}, {}),
+    ids=("hs", "hs+country", "country", "all"),
+)
+def test_cube_rows_match_sql(trade_db, cube, calc, metric, time, filters):
+    sql, params, meta = build_sql(_intent(calc, time, filters, metric), "")
+
+    got = compute_rows(meta, cube.monthly(meta))
+    if got is None:
+        pytest.skip(f"{calc} {time}: cube-ээр бодогдохгүй (SQL руу явна)")
+    assert_same_rows(got, trade_db.rows(sql, params))
+
+
+def test_month_stats_match_sync_watermark(trade_db, cube):
+    # refresh нь cube.month_stats()-ийг SQL-ийн watermark-тай харьцуулна
+    stats = asyncio.run(fetch_month_stats(trade_db.conn(), VIEW))
+    assert cube.month_stats().keys() == stats.keys()
+    for key, st in stats.items():
+        got = cube.month_stats()[key]
+        assert got["rows"] == st["rows"]
+        assert got["amount"] == pytest.approx(st["amount"]) and got["qty"] == pytest.approx(st["qty"])
+
+
+def test_replace_months_equals_full_build(trade_db, cube):
+    rows = trade_db.rows(cube_sql(VIEW))
+    months = ["2025-07", "2025-08"]
+    recent = [r for r in rows if (r["year"], r["month"]) in {(2025, 7), (2025, 8)}]
+    old = Cube.from_rows(VIEW, [r for r in rows if r not in recent])
+
+    patched = old.replace_months(recent, months)
+    assert patched.latest == cube.latest == (2025, 8)
+    for filters in ({"hscode": ["8703"], "country": "KR"}, {}):
+        _, _, meta = build_sql(_intent("timeseries_month", {"year": 2025}, filters), "")
+        assert compute_rows(meta, patched.monthly(meta)) == compute_rows(meta, cube.monthly(meta))
+
+
+def test_cubeset_stops_answering_when_stale(cube, tmp_path):
+    cubes = CubeSet(tmp_path, check_seconds=0, max_age_seconds=60)
+    _, _, meta = build_sql(_intent(), "")
+
+    cubes.publish({VIEW: cube})
+    assert cubes.version is not None
+    # CHECKED бичигдээгүй → хэзээ SQL-тэй тулгагдсан нь мэдэгдэхгүй
+    assert cubes.rows(meta) is None
+
+    mark_checked(tmp_path)
+    assert cubes.rows(meta) == compute_rows(meta, cube.monthly(meta))
+
+    past = time.time() - 120
+    os.utime(tmp_path / CHECKED, (past, past))
+    assert cubes.rows(meta) is None and cubes.stale()
+
+
+def test_build_reads_through_router_and_publishes(trade_db, tmp_path, monkeypatch):
+    from app.core import database
+    from tests.sqlite_pg import StreamSession
+
+    routers = []
+
+    def session(router):
+        routers.append(router)
+        return StreamSession(trade_db)
+
+    monkeypatch.setattr(database, "LazySession", session)
+    cubes = CubeSet(tmp_path, check_seconds=0, max_age_seconds=60)
+    (st,) = asyncio.run(cubes.build([VIEW]))
+
+    assert routers == [database.read_router]
+    assert st["view"] == VIEW and cubes.version is not None
+    _, _, meta = build_sql(_intent(), "")
+    assert cubes.rows(meta) == compute_rows(meta, Cube.from_rows(VIEW, trade_db.rows(cube_sql(VIEW))).monthly(meta))
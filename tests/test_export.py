@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import csv
+import io
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import export
+from app.api.chat import require_key
+from app.core.database import get_db
+from app.sql.builder import build_sql
+from tests.sqlite_pg import StreamSession
+
+INTENT = {"domain": "export", "calc": "timeseries_month", "metric": "amountUSD", "time": {"year": 2023}, "filters": {"hscode": ["2701"]}}
+
+
+@pytest.fixture
+def client(trade_db) -> TestClient:
+    app = FastAPI()
+    app.include_router(export.router)
+    app.dependency_overrides[require_key] = lambda: "test"
+    app.dependency_overrides[get_db] = lambda: StreamSession(trade_db)
+    return TestClient(app)
+
+
+def _csv(r):
+    return list(csv.DictReader(io.StringIO(r.content.decode("utf-8-sig"))))
+
+
+def test_csv_export_reports_row_count(client, trade_db):
+    r = client.post("/export", json={"intent": INTENT, "detail": False})
+    assert r.status_code == 200
+    rows = _csv(r)
+    assert r.headers["x-truncated"] == "0" and r.headers["x-row-count"] == str(len(rows))
+    assert int(r.headers["content-length"]) == len(r.content)
+    sql, params, _ = build_sql(INTENT, "")
+    assert [int(x["month"]) for x in rows] == [x["month"] for x in trade_db.rows(sql, params)]
+
+
+def test_csv_export_flags_truncation(client):
+    r = client.post("/export", json={"intent": INTENT, "detail": True, "max_rows": 5})
+    assert r.status_code == 200
+    assert len(_csv(r)) == 5
+    assert r.headers["x-truncated"] == "1" and r.headers["x-row-count"] == "5"
+
+
+def test_export_at_exact_limit_is_not_truncated(client):
+    n = len(_csv(client.post("/export", json={"intent": INTENT, "detail": False})))
+    r = client.post("/export", json={"intent": INTENT, "detail": False, "max_rows": n})
+    assert len(_csv(r)) == n and r.headers["x-truncated"] == "0"
+
+
+@pytest.mark.parametrize("fmt", ("parquet", "xlsx"))
+def test_binary_exports_flag_truncation(client, fmt):
+    if export.missing_dependency(fmt):
+        pytest.skip(f"{fmt}: optional dependency суугаагүй")
+    r = client.post("/export", json={"intent": INTENT, "format": fmt, "max_rows": 7})
+    assert r.status_code == 200 and r.headers["content-type"] == export.MEDIA_TYPES[fmt]
+    assert r.headers["x-truncated"] == "1" and r.headers["x-row-count"] == "7"
+    assert len(r.content) == int(r.headers["content-length"]) > 0
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+import pytest
+
+from app.analytics import log_report
+from app.analytics.log_report import SpaceSaving, analyze, compact, iter_events, log_files
+
+
+def test_space_saving_keeps_heavy_hitters_and_bounded_size():
+    rnd = random.Random(3)
+    keys = [f"hot{rnd.randrange(5)}" if rnd.random() < 0.5 else f"cold{rnd.randrange(5000)}" for _ in range(20_000)]
+    ss = SpaceSaving(capacity=50)
+    for k in keys:
+        ss.add(k)
+
+    assert len(ss.counts) == 50 and len(ss._heap) == 50
+    assert {k for k, _ in ss.top(5)} == {f"hot{i}" for i in range(5)}
+    # space-saving: count нь бодит давтамжаас бага биш, нийлбэр нь event-ийн тоо
+    assert sum(ss.counts.values()) == len(keys)
+    for k, c in ss.top(5):
+        assert c >= keys.count(k)
+
+
+def test_space_saving_guarantee_on_skewed_stream():
+    # давтамж нь N / capacity-аас их түлхүүр бүр үлдэнэ; хамгийн бага count ≤ N / capacity
+    rnd = random.Random(5)
+    keys = [str(int(rnd.paretovariate(1.2))) for _ in range(3000)]
+    ss = SpaceSaving(capacity=20)
+    for k in keys:
+        ss.add(k)
+    bound = len(keys) / 20
+    assert min(ss.counts.values()) <= bound
+    assert {k for k in set(keys) if keys.count(k) > bound} <= set(ss.counts)
+
+
+def _write_log(path: Path) -> None:
+    events = [
+        {"ts": 100, "intent_key": "a", "view": "v", "calc": "ytd", "status": "ok", "timings_ms": {"total": 5, "db.execute": 3}},
+        {"ts": 101, "intent_key": "a", "view": "v", "calc": "ytd", "status": "no_data"},
+        {"event": "query_log_dropped", "dropped": 7, "ts": 102},
+        {"ts": 103, "intent_key": "b", "view": "v", "calc": "yoy", "status": "ok"},
+        {"event": "query_log_dropped", "dropped": 2, "ts": 104},
+    ]
+    path.write_text("\n".join(json.dumps(e) for e in events) + "\n", encoding="utf-8")
+
+
+def test_compact_keeps_dropped_counts(tmp_path):
+    pytest.importorskip("pyarrow")
+    src = tmp_path / "query_log.jsonl"
+    _write_log(src)
+    out = tmp_path / "query_log.parquet"
+
+    assert compact(iter_events([src]), out) == 3
+    from_jsonl = analyze(iter_events([src]))
+    from_parquet = analyze(iter_events([out]))
+    assert from_parquet["dropped_events"] == from_jsonl["dropped_events"] == 9
+    assert from_parquet["events"] == 3 and from_parquet["calcs"] == from_jsonl["calcs"]
+
+
+def test_default_path_follows_query_log_path(tmp_path, monkeypatch):
+    current = tmp_path / "trade_ql.jsonl"
+    _write_log(current)
+    (tmp_path / "trade_ql.20250101-000000.jsonl.gz").write_bytes(b"")
+    monkeypatch.setattr(log_report, "default_log_path", lambda: current)
+
+    assert log_files(tmp_path, "trade_ql") == [tmp_path / "trade_ql.20250101-000000.jsonl.gz", current]
+    assert log_report.main(["--json"]) == 0
+
+
+def test_default_log_path_uses_settings():
+    from app.core.config import settings
+
+    assert log_report.default_log_path() == Path(settings.query_log_path)
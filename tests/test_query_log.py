@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+from app.analytics.query_log import QueryLogWriter
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_full_queue_drops_and_reports_count(tmp_path, monkeypatch):
+    w = QueryLogWriter(tmp_path / "query_log.jsonl", queue_size=2, flush_seconds=0.05)
+    # writer thread-гүй → queue хоосрохгүй
+    monkeypatch.setattr(w, "start", lambda: None)
+
+    assert [w.submit({"n": i}) for i in range(5)] == [True, True, False, False, False]
+    assert w.dropped == 3
+
+    QueryLogWriter.start(w)
+    w.close()
+    events = _lines(w.path)
+    assert [e["n"] for e in events if "n" in e] == [0, 1]
+    assert [e["dropped"] for e in events if e.get("event") == "query_log_dropped"] == [3]
+
+    # нэг удаа л мэдээлнэ
+    w._write([])
+    assert len(_lines(w.path)) == len(events)
+
+
+def test_size_rotation_gzips_and_prunes_backups(tmp_path):
+    w = QueryLogWriter(tmp_path / "query_log.jsonl", max_bytes=1, rotate_seconds=0, backup_count=2)
+    for i in range(4):
+        w._write([{"n": i}])
+        w._maybe_rotate()
+
+    backups = sorted(tmp_path.glob("query_log.*.jsonl.gz"))
+    assert len(backups) == 2 and not w.path.exists()
+    assert not list(tmp_path.glob("query_log.*.jsonl"))
+    assert [json.loads(gzip.decompress(b.read_bytes()))["n"] for b in backups] == [2, 3]
+
+
+def test_time_rotation(tmp_path):
+    w = QueryLogWriter(tmp_path / "query_log.jsonl", max_bytes=0, rotate_seconds=60)
+    w._write([{"n": 0}])
+    w._maybe_rotate()
+    assert w.path.exists()
+
+    w._opened_at -= 61
+    w._maybe_rotate()
+    assert not w.path.exists() and len(list(tmp_path.glob("query_log.*.jsonl.gz"))) == 1
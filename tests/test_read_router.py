@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.database import Endpoint, LazySession, ReadRouter
+
+
+class FakeEngine:
+    def __init__(self, fail: BaseException | None = None):
+        self.fail = fail
+        self.disposed = False
+
+    @asynccontextmanager
+    async def connect(self):
+        if self.fail:
+            raise self.fail
+
+        class Conn:
+            async def execute(self, sql, params=None):
+                return None
+
+        yield Conn()
+
+    async def dispose(self) -> None:
+        self.disposed = True
+
+
+def _endpoint(name: str, fail: BaseException | None = None, primary: bool = False) -> Endpoint:
+    ep = Endpoint(name, FakeEngine(fail), primary=primary)
+    ep.calls = []
+
+    @asynccontextmanager
+    async def sessions():
+        class Session:
+            async def connection(self):
+                if ep.engine.fail:
+                    raise ep.engine.fail
+
+            async def execute(self, sql, params=None):
+                ep.calls.append(str(sql))
+                if isinstance(ep.engine.fail, ValueError):
+                    raise ep.engine.fail
+                return name
+
+        yield Session()
+
+    ep.sessions = sessions
+    return ep
+
+
+def test_ewma_and_score():
+    ep = _endpoint("a")
+    ep.observe(100.0)
+    ep.observe(200.0)
+    assert ep.ewma_ms == pytest.approx(120.0)
+    ep.inflight = 2
+    assert ep.score() == pytest.approx(360.0)
+
+
+def test_pick_prefers_lower_ewma_and_load():
+    fast, slow = _endpoint("fast"), _endpoint("slow")
+    fast.ewma_ms, slow.ewma_ms = 5.0, 50.0
+    router = ReadRouter(_endpoint("primary", primary=True), [fast, slow])
+    # 2 replica → хоёулаа sample-д орно → оноо багатай нь
+    assert {router.pick().name for _ in range(20)} == {"fast"}
+
+    fast.inflight = 20  # 5 * 21 > 50
+    assert router.pick().name == "slow"
+    assert router.pick(exclude=[slow]).name == "fast"
+
+
+def test_failover_marks_replica_down_and_uses_next():
+    bad = _endpoint("bad", fail=OSError("connection refused"))
+    good = _endpoint("good")
+    bad.ewma_ms, good.ewma_ms = 1.0, 10.0  # муу нь эхэлж сонгогдоно
+    router = ReadRouter(_endpoint("primary", primary=True), [bad, good])
+
+    assert asyncio.run(LazySession(router).execute("SELECT 1")) == "good"
+    assert not bad.healthy and bad.failures == 1 and good.healthy
+    # дараагийн query шууд healthy replica руу
+    assert router.pick() is good
+
+
+def test_all_replicas_down_falls_back_to_primary():
+    primary = _endpoint("primary", primary=True)
+    router = ReadRouter(primary, [_endpoint("r1", fail=OSError("down")), _endpoint("r2", fail=OSError("down"))])
+    assert asyncio.run(LazySession(router).execute("SELECT 1")) == "primary"
+    assert [ep.healthy for ep in router.replicas] == [False, False]
+
+
+def test_sql_errors_do_not_fail_over():
+    replica = _endpoint("r1", fail=ValueError("syntax error"))
+    router = ReadRouter(_endpoint("primary", primary=True), [replica])
+    with pytest.raises(ValueError):
+        asyncio.run(LazySession(router).execute("SELECT oops"))
+    assert replica.healthy and router.primary.calls == []
+
+
+def test_health_check_brings_replica_back():
+    ep = _endpoint("r1", fail=OSError("down"))
+    router = ReadRouter(_endpoint("primary", primary=True), [ep])
+    assert asyncio.run(router.check(ep)) is False and not ep.healthy
+
+    ep.engine.fail = None
+    assert asyncio.run(router.check(ep)) is True and ep.healthy and ep.ewma_ms is not None
+
+
+def test_dispose_closes_primary_and_replicas():
+    router = ReadRouter(_endpoint("primary", primary=True), [_endpoint("r1"), _endpoint("r2")])
+    asyncio.run(router.dispose())
+    assert all(ep.engine.disposed for ep in router.endpoints)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from app.conversation.models import Commodity, ConversationState
+from app.core.session_store import _RAW, _ZLIB, SQLiteSessionStore, decode_state, encode_state
+
+
+def _state() -> ConversationState:
+    s = ConversationState(
+        domain="export",
+        metric="quantity",
+        commodity=Commodity(label="нүүрс", hscode=["2701", "2702"]),
+        scale_label="сая",
+        analysis="rolling_12m",
+    )
+    s.time.start = {"year": 2024, "month": 3}
+    s.time.end = {"year": 2025, "month": 6}
+    s.time.granularity = "month"
+    return s
+
+
+def test_round_trip_keeps_state_and_intent():
+    s = _state()
+    out = decode_state(encode_state(s))
+    assert out.model_dump() == s.model_dump()
+    assert out.to_intent() == s.to_intent()
+
+
+def test_default_state_is_tiny_and_round_trips():
+    blob = encode_state(ConversationState())
+    assert blob[:1] == _RAW and len(blob) < 16
+    assert decode_state(blob).model_dump() == ConversationState().model_dump()
+    assert decode_state(b"").model_dump() == ConversationState().model_dump()
+
+
+def test_large_state_is_compressed():
+    s = _state()
+    s.pending_clarify = {"question": "Аль оны мэдээлэл вэ?", "choices": [{"label": f"{y} он", "prompt": f"{y} он"} for y in range(2000, 2026)]}
+    blob = encode_state(s)
+    assert blob[:1] == _ZLIB
+    assert decode_state(blob).pending_clarify == s.pending_clarify
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    assert store.get("missing").model_dump() == ConversationState().model_dump()
+    store.set("a", _state())
+    assert store.get("a").to_intent() == _state().to_intent()
+    assert store.size() == 1
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+
+from app.analytics import slow_query
+from app.sql.builder import build_sql
+from tests.sqlite_pg import StreamSession, _Result
+
+
+def test_slow_query_explains_the_executed_limited_sql(trade_db, monkeypatch):
+    monkeypatch.setattr(
+        slow_query, "settings", dataclasses.replace(slow_query.settings, slow_query_ms=0.001, slow_query_explain_sample=1.0)
+    )
+    events, explained = [], []
+    monkeypatch.setattr(slow_query.slow_writer, "submit", events.append)
+
+    class Explain:
+        def __init__(self, router):
+            pass
+
+        async def execute(self, sql, params=None, timeout_ms=None):
+            explained.append((str(sql), params, timeout_ms))
+            return _Result([("Limit  (cost=0..1)",)])
+
+    monkeypatch.setattr(slow_query, "LazySession", Explain)
+    sql, params, meta = build_sql(
+        {"domain": "export", "calc": "timeseries_month", "metric": "amountUSD", "time": {"year": 2023}}, ""
+    )
+
+    async def run():
+        rows = await slow_query.execute_rows(StreamSession(trade_db), sql, params, meta, limit=5, timeout_ms=800)
+        await asyncio.gather(*slow_query._pending)
+        return rows
+
+    rows = asyncio.run(run())
+    assert len(rows) == 5
+    ((explain_sql, explain_params, timeout_ms),) = explained
+    (event,) = events
+    assert explain_sql.startswith("EXPLAIN (ANALYZE, BUFFERS) ") and explain_sql.rstrip().endswith("LIMIT :_row_limit")
+    assert explain_params["_row_limit"] == 5 and timeout_ms == 800
+    # log-д ч яг ажилласан SQL/params
+    assert event["sql"] == explain_sql[len("EXPLAIN (ANALYZE, BUFFERS) "):] and event["params"] == explain_params
+    assert event["plan"] == ["Limit  (cost=0..1)"]
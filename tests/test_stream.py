@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import copy
+import dataclasses
+import json
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.api import stream
+from app.conversation.models import Commodity, ConversationState
+from app.core.database import get_db
+from app.core.result_cache import LastResultStore
+from app.sql.builder import build_sql
+from tests.sqlite_pg import StreamSession
+
+INTENT = {"domain": "export", "calc": "timeseries_month", "metric": "amountUSD", "time": {"year": 2023}, "filters": {"hscode": ["2701"]}}
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch) -> LastResultStore:
+    # өөр worker: last_results хоосон
+    cache = LastResultStore()
+    monkeypatch.setattr(stream, "last_results", cache)
+    return cache
+
+
+def test_resolve_intent_uses_shared_session_store(fresh_cache):
+    s = ConversationState(domain="import", commodity=Commodity(label="нүүрс", hscode=["2701"]))
+    s.time.year = 2024
+    stream.session_store.set("stream-s1", s)
+
+    intent = stream.resolve_intent(None, "stream-s1")
+    assert intent["domain"] == "import"
+    assert intent["filters"] == {"hscode": ["2701"]} and intent["time"] == {"year": 2024}
+
+
+def test_resolve_intent_prefers_local_last_result(fresh_cache):
+    fresh_cache.set("stream-s2", "k", {"domain": "export", "calc": "ytd"}, {}, [])
+    assert stream.resolve_intent(None, "stream-s2") == {"domain": "export", "calc": "ytd"}
+
+
+def test_resolve_intent_rejects_unknown_session(fresh_cache):
+    with pytest.raises(HTTPException) as e:
+        stream.resolve_intent(None, "stream-missing")
+    assert e.value.status_code == 400
+    with pytest.raises(HTTPException):
+        stream.resolve_intent(None, None)
+
+
+@pytest.fixture
+def client(trade_db, monkeypatch) -> TestClient:
+    # жижиг chunk → хязгаар chunk дундуур таарна
+    monkeypatch.setattr(stream, "settings", dataclasses.replace(stream.settings, stream_chunk_rows=2))
+    app = FastAPI()
+    app.include_router(stream.router)
+    app.dependency_overrides[stream.require_key] = lambda: "test"
+    app.dependency_overrides[get_db] = lambda: StreamSession(trade_db)
+    return TestClient(app)
+
+
+def _ndjson(r):
+    assert r.status_code == 200 and r.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    return lines[0], lines[1:-1], lines[-1]
+
+
+def test_stream_rows_match_sql(client, trade_db):
+    meta, rows, done = _ndjson(client.post("/query/stream", json={"intent": INTENT}))
+    sql, params, _ = build_sql(copy.deepcopy(INTENT), "")
+    expected = trade_db.rows(sql, params)
+
+    assert meta["meta"]["calc"] == "timeseries_month" and meta["meta"]["columns"] == list(expected[0].keys())
+    assert [r["month"] for r in rows] == [r["month"] for r in expected]
+    assert done == {"done": True, "rows": len(expected), "truncated": False}
+
+
+def test_stream_truncates_at_max_rows(client):
+    _, rows, done = _ndjson(client.post("/query/stream", json={"intent": INTENT, "detail": True, "max_rows": 5}))
+    assert len(rows) == 5 and done == {"done": True, "rows": 5, "truncated": True}
+
+
+def test_stream_reports_errors_in_band(client, trade_db):
+    class Broken(StreamSession):
+        async def stream(self, sql, params=None, timeout_ms=None, chunk_rows=1000):
+            yield [{"year": 2023}]
+            raise RuntimeError("connection lost")
+
+    client.app.dependency_overrides[get_db] = lambda: Broken(trade_db)
+    lines = client.post("/query/stream", json={"intent": INTENT}).text.splitlines()
+    assert json.loads(lines[-1]) == {"error": "RuntimeError: connection lost"}
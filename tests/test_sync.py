@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from app.replica.sync import changed_months
+
+
+def _st(rows=10, amount=1000.0, qty=50.0):
+    return {"rows": rows, "amount": amount, "qty": qty}
+
+
+def test_unchanged_months_are_skipped():
+    old = {"2025-07": _st(), "2025-08": _st(rows=3)}
+    assert changed_months(old, {k: dict(v) for k, v in old.items()}) == ([], [])
+
+
+def test_new_changed_and_removed_months():
+    old = {"2025-06": _st(), "2025-07": _st(), "2025-08": _st(), "2025-09": _st()}
+    new = {
+        "2025-06": _st(rows=11),  # мөр нэмэгдсэн
+        "2025-07": _st(amount=1000.5),  # засвар: мөрийн тоо ижил
+        "2025-08": _st(qty=49.0),
+        "2025-10": _st(),  # шинэ сар
+    }
+    assert changed_months(old, new) == (["2025-06", "2025-07", "2025-08", "2025-10"], ["2025-09"])
+
+
+def test_float_noise_is_not_a_change():
+    old = {"2025-08": _st(amount=0.1 + 0.2, qty=0.0)}
+    new = {"2025-08": _st(amount=0.3, qty=1e-9)}
+    assert changed_months(old, new) == ([], [])
+
+
+def test_empty_previous_state_takes_everything():
+    new = {"2025-08": _st(), "2024-01": _st()}
+    assert changed_months({}, new) == (["2024-01", "2025-08"], [])